@@ -0,0 +1,44 @@
+"""
+Finding near-duplicate citations in a large library with injected duplicates.
+
+Usage: python benchmarks/bench_dedup.py [N ...]
+"""
+import random
+import sys
+import time
+from bibtexparser.entrypoint import parse_string
+from citeman.dedup import findDuplicates
+from synthetic import WORDS, syntheticBibliography
+
+# Fraction of the entries copied under another key, without their DOI and with a reworded title.
+DUPLICATES = 0.01
+# Real titles draw on a large vocabulary of a few common words and many rare ones (Zipf's law);
+# with only the default words, most titles would look alike. A word repeated k times in the
+# list is drawn k times as often.
+VOCABULARY = WORDS * 200 + [f"term{i}" for i in range(50000) for _ in range(1000 // (i + 1) + 1)]
+
+def duplicate(entry, i):
+    # The same entry under a new key, without its DOI and with its (braced) title lowercased
+    # and ending in a full stop.
+    text = entry.raw.replace(f"{{{entry.key},", f"{{Copy{i},", 1)
+    text = "\n".join(line for line in text.splitlines() if "DOI" not in line)
+    title = entry["title"]
+    return text.replace(title, title.lower()[:-1] + ".}")
+
+def main(sizes):
+    for n in sizes:
+        library = parse_string(syntheticBibliography(n, words=VOCABULARY))
+        rng = random.Random(1)
+        originals = rng.sample(library.entries, int(n * DUPLICATES))
+        copies = parse_string("\n\n".join(duplicate(entry, i) for i, entry in enumerate(originals))).entries
+        entries = library.entries + copies
+        start = time.perf_counter()
+        groups = findDuplicates(entries)
+        elapsed = time.perf_counter() - start
+        found = {entry.key for group in groups for entry in group.duplicates}
+        recall = sum(entry.key in found for entry in copies) / len(copies)
+        print(f"{len(entries)} entries: {elapsed:.2f}s, {len(groups)} groups, "
+              f"{recall:.1%} of {len(copies)} injected duplicates found")
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10000, 100000])
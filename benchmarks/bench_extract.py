@@ -0,0 +1,42 @@
+"""
+Extracting the article identifiers of a large pasted reference list, with a DOI and
+a PMID in every reference.
+
+Usage: python benchmarks/bench_extract.py [--references N] [--runs R] [--max-seconds S]
+Exits with 1 if the fastest run takes longer than --max-seconds.
+"""
+import argparse
+import sys
+import time
+from citeman.extract import extractIds
+
+REFERENCES = 20000
+RUNS = 5
+MAX_SECONDS = 2.0
+
+def referenceList(n) -> str:
+    return "\n".join(f"{i}. Author A. Title {i}. Journal. 2019;{i % 50}:{i}. doi:10.{1000 + i % 9000}/abc.{i}. PMID: {30000000 + i}."
+                     for i in range(n))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--references", type=int, default=REFERENCES)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--max-seconds", type=float, default=MAX_SECONDS)
+    args = parser.parse_args(argv)
+
+    text = referenceList(args.references)
+    times = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        ids = extractIds(text)
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    print(f"{len(text) / 2**20:.1f} MB, {len(ids)} IDs: {best:.3f}s (best of {args.runs})")
+    if best > args.max_seconds:
+        print(f"slower than {args.max_seconds:.1f}s")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Import time of the modules loaded before the main menu appears.
+
+Runs `python -X importtime` in a fresh interpreter several times and reports the
+median cumulative import time of citeman.cli and citeman.ui, the slowest modules
+they pull in, and whether any module that should only load on demand (e.g., the
+HTTP stack) was imported at startup.
+
+Usage: python benchmarks/bench_import.py [--runs N] [--max-ms MS]
+Exits with 1 if a deferred module was imported or the median exceeds --max-ms.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+STARTUP = ("citeman.cli", "citeman.ui")
+# Modules that must not be imported until they are needed.
+DEFERRED = ("requests", "urllib3", "pkg_resources", "concurrent.futures.process")
+
+def importTimes(modules=STARTUP):
+    """
+    Imports modules in a fresh interpreter.
+
+    Args:
+        modules (tuple): The modules to import.
+
+    Returns:
+        dict: The cumulative import time, in microseconds, of every module imported,
+        including those the interpreter imports on its own.
+    """
+    code = "; ".join(f"import {module}" for module in modules) or "pass"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    times = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    runs = [importTimes() for _ in range(args.runs)]
+    totals = [sum(times.get(module, 0) for module in STARTUP) / 1000 for times in runs]
+    median = statistics.median(totals)
+    print(f"startup imports: median {median:.1f} ms over {args.runs} runs (min {min(totals):.1f} ms)")
+
+    # Leave out what the interpreter imports without citeman (site, .pth files).
+    baseline = importTimes(())
+    last = {name: us for name, us in runs[-1].items() if name not in baseline}
+    print("slowest top-level modules (cumulative ms):")
+    slowest = sorted(((us, name) for name, us in last.items() if "." not in name), reverse=True)
+    for us, name in slowest[:10]:
+        print(f"  {us / 1000:>7.1f}  {name}")
+
+    loaded = [module for module in DEFERRED if module in last]
+    failed = False
+    if loaded:
+        print(f"imported at startup but should be deferred: {', '.join(loaded)}")
+        failed = True
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"median exceeds {args.max_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
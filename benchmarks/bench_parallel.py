@@ -0,0 +1,38 @@
+"""
+Serial vs. parallel parsing of bibliography.bib.
+
+Times parse_string and parallelParse with 1, 2, 4 and 8 processes, and checks that
+every parallel parse yields the same entries as the serial one. The speedup is bounded
+by the number of CPUs of the machine (printed first).
+
+Usage: python benchmarks/bench_parallel.py [N ...]
+"""
+import os
+import sys
+import time
+from bibtexparser.entrypoint import parse_string
+from citeman.parallel import parallelParse
+from synthetic import syntheticBibliography
+
+JOBS = (1, 2, 4, 8)
+
+def timeit(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def main(sizes):
+    print(f"CPUs: {os.cpu_count()}")
+    print(f"{'entries':>8} {'serial (s)':>11}" + "".join(f" {f'{jobs} jobs (s)':>15}" for jobs in JOBS))
+    for n in sizes:
+        text = syntheticBibliography(n)
+        serial, library = timeit(lambda: parse_string(text))
+        row = f"{n:>8} {serial:>11.3f}"
+        for jobs in JOBS:
+            elapsed, parallel = timeit(lambda: parallelParse(text, jobs))
+            assert parallel.entries == library.entries
+            row += f" {elapsed:>7.3f} ({serial / elapsed:>4.1f}x)"
+        print(row)
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10000, 50000])
@@ -0,0 +1,39 @@
+"""
+Building, persisting and querying the full-text search index.
+
+Usage: python benchmarks/bench_search.py [N ...]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from citeman.prepare import prepare_library
+from citeman.search import SearchIndex
+from synthetic import writeSyntheticBibliography
+
+QUERIES = ["smith", "smith 2019", "ra", "randomized trial lancet", "müller jane 2001 cohort", "entry42", "synthetic 10"]
+
+def timeit(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            bib = os.path.join(tmp, f"bibliography-{n}.bib")
+            writeSyntheticBibliography(bib, n)
+            entries = prepare_library(bib).entries
+            build, index = timeit(lambda: SearchIndex(entries))
+            save, _ = timeit(lambda: index.save(bib, entries))
+            load, loaded = timeit(lambda: SearchIndex.load(bib, entries))
+            assert loaded is not None
+            print(f"{n} entries: build {build:.2f}s, save {save:.2f}s, load {load:.2f}s")
+            for query in QUERIES:
+                times = [timeit(lambda: index.search(query))[0] for _ in range(5)]
+                print(f"  {query!r:<28} {len(index.search(query, None)):>6} matches "
+                      f"{statistics.median(times) * 1000:>7.2f} ms")
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10000, 100000])
@@ -0,0 +1,34 @@
+"""
+Cold vs. warm startup of prepare_library.
+
+Cold: no snapshot exists, bibliography.bib is parsed and a snapshot is written.
+Warm: the snapshot matches and is loaded instead of parsing.
+
+Usage: python benchmarks/bench_startup.py [N ...]
+"""
+import os
+import sys
+import tempfile
+import time
+from citeman.prepare import prepare_library
+from citeman.snapshot import snapshotPath
+from synthetic import writeSyntheticBibliography
+
+def timeit(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main(sizes):
+    print(f"{'entries':>8} {'cold (s)':>10} {'warm (s)':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            bib = os.path.join(tmp, f"bibliography-{n}.bib")
+            writeSyntheticBibliography(bib, n)
+            cold = timeit(lambda: prepare_library(bib))
+            warm = min(timeit(lambda: prepare_library(bib)) for _ in range(3))
+            assert os.path.exists(snapshotPath(bib))
+            print(f"{n:>8} {cold:>10.3f} {warm:>10.3f} {cold / warm:>7.1f}x")
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1000, 10000, 50000])
@@ -0,0 +1,293 @@
+"""
+Times the main operations of citeman on synthetic bibliographies of several sizes.
+
+Each operation runs in a fresh temporary directory holding bibliography.bib. Queries
+are resolved by a local mock of the DOI resolver, so no network is used. Results are
+written as JSON so runs on different commits can be compared with --compare.
+
+Usage: python benchmarks/bench_suite.py [--sizes N ...] [--repeat R] [--only NAME ...]
+                                        [--json OUT] [--compare BASELINE.json]
+Exits with 1 if --compare finds an operation more than --tolerance slower than the baseline.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from citeman.entry import EntrySplitter, getEntryRaw
+from citeman.history import History
+from citeman.prepare import prepare_library, prepare_processor
+from citeman.query import CrossRef, Query
+from citeman.resolver import configureSharedClient
+from citeman.snapshot import snapshotPath
+from citeman.ui_pretty import prettyPrintBlocks
+from synthetic import syntheticBibliography, syntheticEntry
+
+SIZES = (1000, 10000, 100000)
+REPEAT = 5
+# Entries added and removed per run of the mutation benchmarks.
+MUTATIONS = 20
+# Queries made per run of the query benchmark.
+QUERIES = 20
+# Operations slower than the baseline by more than this fraction are reported as regressions.
+TOLERANCE = 0.25
+
+class MockResolver(BaseHTTPRequestHandler):
+    """
+    Answers DOI content negotiation like doi.org, with a single-line BibTeX entry.
+    DOIs with 'missing' in them are not found.
+    """
+
+    def do_GET(self):
+        doi = self.path.lstrip('/')
+        if 'missing' in doi:
+            self.send_response(404)
+            self.end_headers()
+            return
+        suffix = doi.rsplit('.', 1)[-1]
+        body = (f"@article{{Mock_{suffix}, title={{Mock title {suffix}}}, author={{Doe, Jane and Roe, Rick}}, "
+                f"year={{2020}}, DOI={{{doi}}}, journal={{Mock Journal}}, volume={{1}}, pages={{1-10}}}}").encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-bibtex')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def startResolver():
+    """
+    Starts the mock resolver in a background thread and points CrossRef at it.
+
+    Returns:
+        ThreadingHTTPServer: The server, to be shut down by the caller.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockResolver)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    CrossRef.url = f"http://127.0.0.1:{server.server_address[1]}"
+    Query.cache = None
+    # The mock needs no rate limit and fails nothing worth retrying.
+    configureSharedClient(rate=1e6, burst=1000, retries=0)
+    return server
+
+def newEntries(n, count, seed=1):
+    # Entries whose keys and DOIs are not in a synthetic bibliography of n entries.
+    rng = random.Random(seed)
+    return [EntrySplitter(syntheticEntry(n + i, rng)).split() for i in range(count)]
+
+def measure(run, repeat, setup=None):
+    """
+    Times a function several times.
+
+    Args:
+        run (function): Takes the value returned by setup and returns the number of
+            operations it performed.
+        repeat (int): Number of timed runs.
+        setup (function): Called before each run, untimed.
+
+    Returns:
+        dict: The median, minimum and maximum seconds per operation and the number of runs.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        operations = run(state)
+        times.append((time.perf_counter() - start) / operations)
+    return {'median': statistics.median(times), 'min': min(times), 'max': max(times), 'runs': repeat}
+
+def once(fn):
+    # A run of measure performing a single operation.
+    def run(_):
+        fn()
+        return 1
+    return run
+
+def benchmarks(n, text, repeat):
+    """
+    Yields the name of every benchmark on a bibliography with a function timing it,
+    so that benchmarks left out are not run.
+
+    Args:
+        n (int): The number of entries.
+        text (str): The bibliography.
+        repeat (int): Number of timed runs of each benchmark.
+    """
+    bib = 'bibliography.bib'
+    with open(bib, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+    def cold():
+        if os.path.exists(snapshotPath(bib)):
+            os.remove(snapshotPath(bib))
+    yield 'prepare_library.cold', lambda: measure(once(lambda: prepare_library(bib)), repeat, cold)
+    prepare_library(bib)
+    yield 'prepare_library.snapshot', lambda: measure(once(lambda: prepare_library(bib)), repeat)
+
+    library = prepare_library(bib)
+    yield 'prepare_processor', lambda: measure(once(lambda: prepare_processor(library, History())), repeat)
+
+    def fresh():
+        # A processor over the original file, as mutations change both.
+        with open(bib, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return prepare_processor(prepare_library(bib), History())
+
+    def add(processor):
+        for entry in newEntries(n, MUTATIONS):
+            processor.add(entry)
+        return MUTATIONS
+    yield 'Processor.add', lambda: measure(add, repeat, fresh)
+
+    def removeSetup():
+        processor = fresh()
+        return processor, random.Random(2).sample(processor.library.entries, MUTATIONS)
+
+    def remove(state):
+        processor, entries = state
+        for entry in entries:
+            processor.remove(entry)
+        return MUTATIONS
+    yield 'Processor.remove', lambda: measure(remove, repeat, removeSetup)
+
+    processor = fresh()
+    yield 'Processor._write', lambda: measure(once(processor._write), repeat)
+
+    misses = [f"Missing{i}" for i in range(1000)]
+
+    def keyExists(_):
+        for key in misses:
+            processor.keyExists(key)
+        return len(misses)
+    yield 'Processor.keyExists', lambda: measure(keyExists, repeat)
+
+    queries = [SimpleNamespace(type='DOI', id=entry['DOI'].strip('{}'), block=None)
+               for entry in random.Random(4).sample(library.entries, min(n, 1000))]
+    assert all(processor.idExists(query) for query in queries)
+
+    def idExists(_):
+        for query in queries:
+            processor.idExists(query)
+        return len(queries)
+    yield 'Processor.idExists', lambda: measure(idExists, repeat)
+
+    raws = [syntheticEntry(n + i, random.Random(i)) for i in range(1000)]
+
+    def split(_):
+        for raw in raws:
+            EntrySplitter(raw).split()
+        return len(raws)
+    yield 'EntrySplitter.split', lambda: measure(split, repeat)
+
+    sample = random.Random(5).sample(library.entries, min(n, 1000))
+
+    def entryRaw(_):
+        for entry in sample:
+            getEntryRaw(entry)
+        return len(sample)
+    yield 'getEntryRaw', lambda: measure(entryRaw, repeat)
+
+    yield 'prettyPrintBlocks', lambda: measure(lambda _: len(prettyPrintBlocks(library.entries)), repeat)
+
+    def query(state):
+        processor, run = state
+        for i in range(QUERIES):
+            processor.processQuery(f"10.5555/mock.{run}{i}")
+        processor.processQuery("10.5555/missing.1")
+        return QUERIES + 1
+    runs = iter(range(repeat))
+    yield 'Processor.processQuery', lambda: measure(query, repeat, lambda: (processor, next(runs)))
+
+def gitCommit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results, baseline, tolerance=TOLERANCE) -> bool:
+    """
+    Prints the change of every operation timed in both runs.
+
+    Returns:
+        bool: True if no operation is slower than the baseline by more than tolerance.
+    """
+    before = {(result['name'], result['entries']): result['median'] for result in baseline['results']}
+    ok = True
+    print(f"compared with {baseline['commit'] or 'baseline'}:")
+    for result in results:
+        old = before.get((result['name'], result['entries']))
+        if old is None:
+            continue
+        ratio = result['median'] / old
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = '  SLOWER'
+            ok = False
+        elif ratio < 1 / (1 + tolerance):
+            flag = '  faster'
+        print(f"  {result['name']:<26} {result['entries']:>7}  {ratio:>6.2f}x{flag}")
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--only', nargs='+', default=None, metavar='NAME',
+                        help="run only the benchmarks whose name starts with one of these")
+    parser.add_argument('--json', default=None, metavar='OUT', help="write the results to this file")
+    parser.add_argument('--compare', default=None, metavar='BASELINE', help="results of an earlier run")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    server = startResolver()
+    results = []
+    try:
+        for n in args.sizes:
+            text = syntheticBibliography(n)
+            with tempfile.TemporaryDirectory() as tmp:
+                cwd = os.getcwd()
+                os.chdir(tmp)
+                try:
+                    for name, run in benchmarks(n, text, args.repeat):
+                        if args.only and not name.startswith(tuple(args.only)):
+                            continue
+                        timing = run()
+                        results.append({'name': name, 'entries': n, **timing})
+                        print(f"{name:<26} {n:>7}  {timing['median'] * 1e6:>12.1f} µs/op")
+                finally:
+                    os.chdir(cwd)
+    finally:
+        server.shutdown()
+
+    report = {
+        'commit': gitCommit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import random
+
+SURNAMES = ["Smith", "Nguyen", "Garcia", "Müller", "Rossi", "Kim", "Okafor", "Novak", "Silva", "Cohen"]
+GIVEN = ["John", "Jane", "Ana", "Wei", "Olu", "Marta", "Luca", "Sara", "Ivan", "Noor"]
+WORDS = ["clinical", "outcomes", "randomized", "trial", "cohort", "analysis", "surgical",
+         "patients", "review", "risk", "imaging", "therapy", "genomic", "model", "study"]
+JOURNALS = ["PLOS ONE", "The Lancet", "Nature Medicine", "JAMA Surgery", "BMJ Open"]
+
+def syntheticEntry(i, rng, words=WORDS):
+    """
+    Generates a single CrossRef-like BibTeX entry.
+
+    Args:
+        i (int): The index of the entry, used to make the key and DOI unique.
+        rng (random.Random): The random number generator.
+        words (list): The vocabulary of the titles.
+
+    Returns:
+        str: The BibTeX entry.
+    """
+    authors = " and ".join(f"{rng.choice(SURNAMES)}, {rng.choice(GIVEN)}" for _ in range(rng.randint(1, 6)))
+    title = " ".join(rng.choice(words) for _ in range(rng.randint(4, 12))).capitalize()
+    year = rng.randint(1980, 2024)
+    return (
+        f"@article{{Entry{i}_{year},\n"
+        f"\ttitle = {{{{{title}}}}},\n"
+        f"\tvolume = {{{{{rng.randint(1, 400)}}}}},\n"
+        f"\tDOI = {{{{10.{rng.randint(1000, 9999)}/synthetic.{i}}}}},\n"
+        f"\tjournal = {{{{{rng.choice(JOURNALS)}}}}},\n"
+        f"\tauthor = {{{authors}}},\n"
+        f"\tyear = {{{{{year}}}}},\n"
+        f"\tpages = {{{{{rng.randint(1, 999)}-{rng.randint(1000, 2000)}}}}}\n"
+        f"}}\n"
+    )
+
+def syntheticBibliography(n, seed=0, words=WORDS):
+    """
+    Generates a bibliography of n entries in the layout citeman writes.
+
+    Args:
+        n (int): The number of entries.
+        seed (int): Seed for reproducible output.
+        words (list): The vocabulary of the titles.
+
+    Returns:
+        str: The contents of the .bib file.
+    """
+    rng = random.Random(seed)
+    return "\n\n".join(syntheticEntry(i, rng, words) for i in range(n))
+
+def writeSyntheticBibliography(path, n, seed=0):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(syntheticBibliography(n, seed))
@@ -1,4 +1,5 @@
-from .ui import mainMenu
+from .cli import main
+import sys
 
 if __name__ == "__main__":
-    mainMenu()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+
+def atomicWrite(path, data) -> None:
+    """
+    Replaces the contents of a file so that it holds either its old or its new contents,
+    even if the program is interrupted or the machine crashes while writing.
+
+    The data is written to a temporary file in the same directory, flushed to disk and
+    renamed over the file. A symbolic link is followed, so the file it points to is replaced.
+
+    Args:
+        path (str): Path to the file.
+        data (str | bytes): The new contents. Strings are encoded as UTF-8.
+    """
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    fd, temporary = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file readable by its owner only.
+        try:
+            shutil.copymode(path, temporary)
+        except FileNotFoundError:
+            os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+    syncDirectory(directory)
+
+def syncDirectory(directory) -> None:
+    """
+    Flushes a directory to disk so that a file renamed into it survives a crash.
+    Does nothing where directories cannot be opened (Windows).
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def appendDurably(f, text) -> None:
+    """
+    Writes text at the end of a file opened for appending and flushes it to disk.
+    A crash can only tear the appended text, never what was in the file before.
+    """
+    f.write(text)
+    f.flush()
+    os.fsync(f.fileno())
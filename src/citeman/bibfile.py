@@ -0,0 +1,178 @@
+from bibtexparser.entrypoint import write_string
+from bibtexparser.library import Library
+from bibtexparser.model import Entry
+from bibtexparser.writer import BibtexFormat, VAL_SEP, _val_intent_string
+from .atomic import appendDurably, atomicWrite
+from .spans import timed
+import os
+import re
+
+# Unescaped braces, as matched by bibtexparser.Splitter.
+BRACES = re.compile(rb"(?<!\\)[{}]")
+FORMAT = BibtexFormat()
+
+def _serializeEntry(block) -> str:
+    # What bibtexparser's default unparse stack and writer produce for an entry: every
+    # value enclosed in braces. Unlike write_string, the library is not deep-copied first.
+    last = len(block.fields) - 1
+    pieces = ["@", block.entry_type, "{", block.key, ",\n"]
+    for i, field in enumerate(block.fields):
+        pieces.append(f"{FORMAT.indent}{field.key}{_val_intent_string(FORMAT, field.key)}{VAL_SEP}{{{field.value}}}"
+                      f"{',' if FORMAT.trailing_comma or i < last else ''}\n")
+    pieces.append("}\n")
+    return "".join(pieces)
+
+def serializeEntry(block) -> str:
+    """
+    Serializes a single block exactly as a full write of the library would.
+
+    Entries are formatted as bibtexparser's default unparse stack and writer format them.
+    Other blocks are passed through the unparse stack itself.
+
+    Args:
+        block (Block): The block to serialize.
+
+    Returns:
+        str: The BibTeX representation of the block.
+    """
+    if type(block) is Entry:
+        return _serializeEntry(block)
+    return write_string(Library([block]))
+
+class SerializedCache():
+    """
+    The text of entries as written to the .bib file, kept until they are marked dirty,
+    so that writing the library only serializes the entries that changed.
+
+    Entries are looked up by identity: bibtexparser blocks are unhashable and compare
+    by their attributes, so the text is not stored on the entries themselves.
+
+    Methods:
+        serialize(self, block): Returns the text of a block, serializing it only if it is dirty.
+        markDirty(self, block): Drops the text of an entry whose key or fields changed.
+    """
+
+    def __init__(self):
+        self._texts = dict()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def serialize(self, block) -> str:
+        if type(block) is not Entry:
+            return serializeEntry(block)
+        cached = self._texts.get(id(block))
+        if cached is not None and cached[0] is block:
+            return cached[1]
+        text = _serializeEntry(block)
+        self._texts[id(block)] = (block, text)
+        return text
+
+    def markDirty(self, block) -> None:
+        self._texts.pop(id(block), None)
+
+@timed('bibfile.write')
+def writeBlocks(bib, blocks, cache=None) -> list:
+    """
+    Writes blocks to a .bib file, replacing its contents atomically, as bibtexparser's
+    write_file would.
+
+    Args:
+        bib (str): Path to the .bib file.
+        blocks (list): The blocks to write.
+        cache (SerializedCache): The text of the entries that did not change, if any.
+
+    Returns:
+        list: The text written for each block.
+    """
+    serialize = cache.serialize if cache is not None else serializeEntry
+    texts = [serialize(block) for block in blocks]
+    atomicWrite(bib, FORMAT.block_separator.join(texts))
+    return texts
+
+@timed('bibfile.append')
+def appendEntries(bib, blocks, cache=None) -> None:
+    """
+    Appends entries to the end of a .bib file without rewriting existing entries.
+
+    Args:
+        bib (str): Path to the .bib file.
+        blocks (list): The entries to append.
+        cache (SerializedCache): Keeps the text of the entries for later writes, if given.
+    """
+    serialize = cache.serialize if cache is not None else serializeEntry
+    separator = FORMAT.block_separator
+    text = separator.join(serialize(block) for block in blocks)
+    if not text:
+        return
+    with open(bib, 'a', encoding='utf-8') as f:
+        if f.tell() > 0:
+            text = separator + text
+        appendDurably(f, text)
+
+def appendEntry(bib, block, cache=None) -> None:
+    """
+    Appends a single entry to the end of a .bib file.
+
+    Args:
+        bib (str): Path to the .bib file.
+        block (Entry): The entry to append.
+        cache (SerializedCache): Keeps the text of the entry for later writes, if given.
+    """
+    appendEntries(bib, [block], cache)
+
+def entrySpan(data, key):
+    """
+    Finds the byte span of the entry with the given key.
+
+    Args:
+        data (bytes): The contents of the .bib file.
+        key (str): The key of the entry.
+
+    Returns:
+        tuple: (start, end) offsets of the entry, end being one past its closing brace,
+        or None if no entry with that key exists.
+    """
+    header = re.compile(rb"^[ \t]*@[ \t]*\w+[ \t]*\{\s*" + re.escape(key.encode('utf-8')) + rb"\s*,", re.M)
+    match = header.search(data)
+    if match is None:
+        return None
+    depth = 0
+    for brace in BRACES.finditer(data, data.index(b"{", match.start())):
+        depth += 1 if brace.group(0) == b"{" else -1
+        if depth == 0:
+            return match.start(), brace.end()
+    return match.start(), len(data)
+
+@timed('bibfile.remove')
+def removeEntry(bib, key) -> bool:
+    """
+    Cuts the entry with the given key out of a .bib file, replacing the file atomically.
+    No entry is re-serialized.
+
+    Args:
+        bib (str): Path to the .bib file.
+        key (str): The key of the entry to remove.
+
+    Returns:
+        bool: True if the entry was found and removed, False otherwise.
+    """
+    if not os.path.exists(bib):
+        return False
+    with open(bib, 'rb') as f:
+        data = f.read()
+    span = entrySpan(data, key)
+    if span is None:
+        return False
+    start, end = span
+    # Take the separating whitespace with the entry.
+    while end < len(data) and data[end:end + 1].isspace():
+        end += 1
+    if end == len(data):
+        # Last entry: trim the separator before it instead.
+        start = len(data[:start].rstrip())
+        tail = b"\n" if start > 0 else b""
+    else:
+        tail = data[end:]
+    atomicWrite(bib, data[:start] + tail)
+    return True
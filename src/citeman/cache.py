@@ -0,0 +1,172 @@
+from threading import Lock
+from time import time
+from .utils import normalizeId
+import os
+import sqlite3
+
+DAY = 86400
+TTL = 30 * DAY
+NEGATIVE_TTL = DAY
+MAX_ENTRIES = 10000
+
+def cachePath() -> str:
+    """
+    Returns the default location of the resolver cache, shared by all projects.
+    Follows $XDG_CACHE_HOME, falling back to ~/.cache.
+    """
+    root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'citeman', 'resolver.sqlite')
+
+class ResolverCache():
+    """
+    A persistent cache of resolver responses, keyed by normalized article ID and output format.
+
+    Responses expire after a TTL. Identifiers that could not be found are cached too
+    (negative caching) with their own, usually shorter, TTL. When the cache holds more
+    than maxEntries responses, the least recently used ones are evicted.
+
+    Attributes:
+        path (str): Path to the SQLite database.
+        ttl (float): Seconds a response stays valid.
+        negativeTtl (float): Seconds a 'not found' response stays valid.
+        maxEntries (int): Maximum number of cached responses.
+
+    Methods:
+        get(self, type, id, format): Looks up a cached response.
+        put(self, type, id, format, value): Caches a response.
+        putMissing(self, type, id, format): Caches that an article ID could not be found.
+        stats(self): Returns the hit/miss counters.
+        clear(self): Removes all cached responses.
+    """
+
+    def __init__(self, path=None, ttl=TTL, negativeTtl=NEGATIVE_TTL, maxEntries=MAX_ENTRIES):
+        self.path = path if path is not None else cachePath()
+        self.ttl = ttl
+        self.negativeTtl = negativeTtl
+        self.maxEntries = maxEntries
+        self.hits = 0
+        self.negativeHits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        # The batch importer resolves from several threads.
+        self._lock = Lock()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT, stored REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._db.commit()
+
+    @staticmethod
+    def _key(type, id, format) -> str:
+        return f"{format}:{type}:{normalizeId(type, id)}"
+
+    def get(self, type, id, format):
+        """
+        Looks up a cached response.
+
+        Args:
+            type (str): The article ID type (e.g., 'DOI').
+            id (str): The article ID.
+            format (str): The output format (e.g., 'bibtex').
+
+        Returns:
+            tuple: (hit, value). value is None on a miss and for a cached 'not found'.
+        """
+        key = self._key(type, id, format)
+        now = time()
+        with self._lock:
+            row = self._db.execute("SELECT value, stored FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            value, stored = row
+            if now - stored > (self.ttl if value is not None else self.negativeTtl):
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.expired += 1
+                self.misses += 1
+                return False, None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            if value is None:
+                self.negativeHits += 1
+            else:
+                self.hits += 1
+            return True, value
+
+    def has(self, type, id, format) -> bool:
+        """
+        Checks for an unexpired cached response without counting a hit or miss.
+        """
+        key = self._key(type, id, format)
+        with self._lock:
+            row = self._db.execute("SELECT value, stored FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return False
+        value, stored = row
+        return time() - stored <= (self.ttl if value is not None else self.negativeTtl)
+
+    def put(self, type, id, format, value) -> None:
+        """
+        Caches a response, evicting the least recently used responses if the cache is full.
+
+        Args:
+            type (str): The article ID type (e.g., 'DOI').
+            id (str): The article ID.
+            format (str): The output format (e.g., 'bibtex').
+            value (str): The response, or None if the article ID could not be found.
+        """
+        key = self._key(type, id, format)
+        now = time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, stored, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            evicted = self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed ASC "
+                "LIMIT max(0, (SELECT COUNT(*) FROM responses) - ?))",
+                (self.maxEntries,),
+            ).rowcount
+            self._db.commit()
+            self.evictions += max(evicted, 0)
+
+    def putMissing(self, type, id, format) -> None:
+        self.put(type, id, format, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of this cache since it was opened.
+
+        Returns:
+            dict: hits, negativeHits, misses, expired, evictions, hitRate and size.
+        """
+        lookups = self.hits + self.negativeHits + self.misses
+        return {
+            'hits': self.hits,
+            'negativeHits': self.negativeHits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'hitRate': (self.hits + self.negativeHits) / lookups if lookups else 0.0,
+            'size': len(self),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,246 @@
+from argparse import ArgumentParser
+from colors import strip_color
+from .cache import DAY, TTL, ResolverCache
+from .dedup import SIMILARITY
+from .errors import UnsavedChangesError
+from .extract import extractIds
+from .history import History, MAX_AGE_DAYS, MAX_RECORDS
+from .importer import WORKERS, importIds
+from .manuscript import checkCitations, writePruned
+from .parallel import THRESHOLD
+from .prepare import prepare_libraries, prepare_library, prepare_processor, prepare_workspace
+from .processor import Processor
+from .query import CrossRef, PubMed, Query
+from .resolver import POOL_SIZE, RATE, configureSharedClient
+from .search import LIMIT
+from .spans import disable, enable
+from .stream import exportEntries, iterEntries, validate
+from .ui_pretty import prettyPrintBlockShort
+import signal
+import sqlite3
+import sys
+
+def parser() -> ArgumentParser:
+    parser = ArgumentParser(prog='citeman', description="A simple command line citation manager for your academic manuscript.")
+    parser.add_argument('--history-size', type=int, default=MAX_RECORDS, metavar='N',
+                        help=f"number of most recent queries to keep in the query history (default: {MAX_RECORDS})")
+    parser.add_argument('--history-days', type=float, default=MAX_AGE_DAYS, metavar='DAYS',
+                        help="forget queries older than this many days (default: never)")
+    parser.add_argument('--cache-days', type=float, default=TTL / DAY, metavar='DAYS',
+                        help=f"reuse resolved citations for this many days (default: {TTL // DAY:.0f})")
+    parser.add_argument('--no-cache', action='store_true', help="always query the resolver")
+    parser.add_argument('--mailto', metavar='EMAIL',
+                        help="contact address sent to the resolvers to use the polite pool (default: $CITEMAN_MAILTO)")
+    parser.add_argument('--rate', type=float, default=RATE, metavar='N',
+                        help=f"maximum resolver requests per second (default: {RATE:.0f})")
+    parser.add_argument('--jobs', type=int, metavar='N',
+                        help=f"processes parsing bibliography.bib (default: all CPUs for files over {THRESHOLD >> 20} MB, else 1)")
+    parser.add_argument('--bib', dest='bibs', action='append', metavar='FILE',
+                        help="the .bib file to manage; repeat to open several as one workspace, "
+                             "adding to the first (default: bibliography.bib)")
+    parser.add_argument('--write-behind', action='store_true',
+                        help="write changes to bibliography.bib in the background, batching those made in quick succession")
+    parser.add_argument('--profile', action='store_true',
+                        help="time the phases of the run (network, parsing, writing, ...) and print them on exit")
+    parser.add_argument('--profile-out', metavar='FILE', help="write the --profile timings to FILE as JSON")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.add_parser('compact', help="rewrite bibliography.bib and the query history journal")
+    importer = commands.add_parser('import', help="add the citations of every DOI, PMID, PMCID and arXiv ID in a file, without prompting")
+    importer.add_argument('file', help="file with the article IDs, e.g., one per line or a pasted reference list; '-' reads standard input")
+    importer.add_argument('--workers', type=int, default=WORKERS, metavar='N',
+                          help=f"number of identifiers resolved concurrently (default: {WORKERS})")
+    importer.add_argument('--resolver', metavar='URL', help="base URL of the DOI resolver (default: https://doi.org)")
+    importer.add_argument('--pubmed', metavar='URL', help="base URL of the E-utilities service resolving PMIDs and PMCIDs")
+    commands.add_parser('list', help="list the entries of the .bib files")
+    commands.add_parser('validate', help="check the .bib files for duplicate keys, missing critical fields and syntax errors")
+    exporter = commands.add_parser('export', help="copy the entries of the .bib files, or only some of them, to another file")
+    exporter.add_argument('output', help="the .bib file to write")
+    exporter.add_argument('--keys', help="comma-separated keys of the entries to export (default: all)")
+    searcher = commands.add_parser('search', help="find citations by author, title, year, journal, key or DOI")
+    searcher.add_argument('query', nargs='+', help="words to look for; words also match as prefixes")
+    searcher.add_argument('--limit', type=int, default=LIMIT, metavar='N',
+                          help=f"maximum number of results (default: {LIMIT})")
+    deduplicator = commands.add_parser('dedup', help="find citations of the same work under different keys, with or without a DOI")
+    deduplicator.add_argument('--merge', action='store_true',
+                              help="merge each group into its most complete citation and rewrite bibliography.bib")
+    deduplicator.add_argument('--threshold', type=float, default=SIMILARITY, metavar='T',
+                              help=f"minimum title similarity (0-1) of citations without a shared DOI or PMID (default: {SIMILARITY})")
+    scanner = commands.add_parser('scan', help="check the [@key] and \\cite{key} citations of Markdown or LaTeX manuscripts against the library")
+    scanner.add_argument('paths', nargs='+', metavar='PATH', help="manuscript files, or directories searched for .md and .tex files")
+    scanner.add_argument('--output', metavar='FILE', help="write the cited entries to FILE, e.g., to ship with the manuscript")
+    scanner.add_argument('--unused', action='store_true', help="list the entries of the library that are not cited")
+    return parser
+
+def bibsOf(args) -> list:
+    # The files given with --bib, or bibliography.bib.
+    return args.bibs or [Processor.bib]
+
+def iterBibs(bibs):
+    # The entries of each file in turn, streamed.
+    for bib in bibs:
+        with open(bib, 'r', encoding='utf-8') as f:
+            yield from iterEntries(f)
+
+def scan(args):
+    # A check only: missing .bib files are read as empty rather than created.
+    libraries = prepare_libraries(bibsOf(args), args.jobs, read_only=True)
+    keys = dict()
+    for library in libraries:
+        for key, entry in library.entries_dict.items():
+            keys.setdefault(key, entry)
+    report = checkCitations(args.paths, keys)
+    for key in report.missing:
+        path, line = report.cited[key]
+        print(f"{path}:{line}: Missing citation key: {key}")
+    if args.unused:
+        for key in report.unused:
+            print(f"Unused: {key}")
+    print(f"{len(report.cited)} keys cited, {len(report.missing)} missing, {len(report.unused)} unused.")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            written = writePruned(libraries, report, f)
+        print(f"Wrote {written} entries to {args.output}.")
+    return 1 if report.missing else 0
+
+def listEntries(args):
+    for entry in iterBibs(bibsOf(args)):
+        print(f"{entry.key}\t{strip_color(prettyPrintBlockShort(entry))}")
+    return 0
+
+def validateBib(args):
+    problems = 0
+    for bib in bibsOf(args):
+        with open(bib, 'r', encoding='utf-8') as f:
+            for line, message in validate(f):
+                print(f"{bib}:{line}: {message}")
+                problems += 1
+    return 1 if problems else 0
+
+def export(args):
+    keys = set(key.strip() for key in args.keys.split(',')) if args.keys else None
+    with open(args.output, 'w', encoding='utf-8') as out:
+        written = exportEntries(iterBibs(bibsOf(args)), out, keys)
+    print(f"Exported {written} entries to {args.output}.")
+    return 0
+
+def search(processor, args):
+    results = processor.search(' '.join(args.query), args.limit)
+    for entry in results:
+        print(f"{entry.key}\t{strip_color(prettyPrintBlockShort(entry))}")
+    return 0 if results else 1
+
+def processorsOf(processor):
+    # The processor of every .bib file, whether one file or a workspace is open.
+    return getattr(processor, 'processors', [processor])
+
+def dedup(processor, args):
+    # Duplicates are looked for within each file, as merging across files would move entries.
+    return max(dedupFile(processor, args) for processor in processorsOf(processor))
+
+def dedupFile(processor, args):
+    groups = processor.findDuplicates(args.threshold)
+    for group in groups:
+        print(f"{group.keep.key}\t{strip_color(prettyPrintBlockShort(group.keep))}")
+        for entry in group.duplicates:
+            print(f"  {entry.key}\t({group.reasons[entry.key]})")
+    duplicates = sum(len(group.duplicates) for group in groups)
+    if args.merge:
+        processor.mergeDuplicates(groups)
+        print(f"Merged {duplicates} duplicates into {len(groups)} citations.")
+    else:
+        print(f"Found {duplicates} duplicates of {len(groups)} citations. Run with --merge to merge them.")
+    return 0
+
+def compact(processor):
+    processor.compact()
+    files = ', '.join(f"{each.bib} ({len(each.library.entries)} entries)" for each in processorsOf(processor))
+    print(f"Compacted {files} and {processor.history.path} ({len(processor.history)} queries).")
+
+def bulkImport(processor, args):
+    if args.resolver:
+        CrossRef.url = args.resolver.rstrip('/')
+    if args.pubmed:
+        PubMed.url = args.pubmed.rstrip('/')
+    if args.file == '-':
+        text = sys.stdin.read()
+    else:
+        with open(args.file, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+    ids = extractIds(text)
+    report = importIds(processor, ids, workers=args.workers)
+    print(report.summary())
+    if CrossRef.cache is not None:
+        stats = CrossRef.cache.stats()
+        print(f"Resolver cache: {stats['hits']} hits, {stats['negativeHits']} cached failures, {stats['misses']} misses.")
+    return 1 if report.failures else 0
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    if not (args.profile or args.profile_out):
+        return run(args)
+    profile = enable()
+    try:
+        return run(args)
+    finally:
+        disable()
+        if args.profile_out:
+            profile.dump(args.profile_out)
+        else:
+            print(profile.report(), file=sys.stderr)
+
+def run(args):
+    # These stream the .bib file instead of loading the library, or need no processor.
+    streaming = {'list': listEntries, 'validate': validateBib, 'export': export, 'scan': scan}
+    if args.command in streaming:
+        return streaming[args.command](args)
+
+    workers = getattr(args, 'workers', 0)
+    configureSharedClient(rate=args.rate, poolSize=max(POOL_SIZE, workers), mailto=args.mailto)
+    if not args.no_cache:
+        try:
+            Query.cache = ResolverCache(ttl=args.cache_days * DAY)
+        except (OSError, sqlite3.Error):
+            # Resolve without a cache rather than not at all.
+            Query.cache = None
+    history = History(maxRecords=args.history_size, maxAgeDays=args.history_days)
+    bibs = bibsOf(args)
+    if len(bibs) > 1:
+        processor = prepare_workspace(bibs, history, jobs=args.jobs)
+    else:
+        processor = prepare_processor(prepare_library(bibs[0], jobs=args.jobs), history, bibs[0])
+    if args.write_behind:
+        processor.enableWriteBehind()
+        # Unwind on SIGTERM too, so that pending changes are written.
+        signal.signal(signal.SIGTERM, terminate)
+
+    status = None
+    try:
+        if args.command == 'compact':
+            compact(processor)
+        elif args.command == 'import':
+            status = bulkImport(processor, args)
+        elif args.command == 'search':
+            status = search(processor, args)
+        elif args.command == 'dedup':
+            status = dedup(processor, args)
+        else:
+            from .ui import mainMenu
+            mainMenu(processor)
+    finally:
+        written = close(processor)
+    return status if written else 1
+
+def close(processor) -> bool:
+    # Tells which changes were lost rather than failing with a traceback, for every file.
+    written = True
+    for each in processorsOf(processor):
+        try:
+            each.close()
+        except UnsavedChangesError as e:
+            keys = getattr(e.error, 'keys', None)
+            print(f"{e}{e.error}{', '.join(keys) if keys else ''}", file=sys.stderr)
+            written = False
+    return written
+
+def terminate(signum, frame):
+    sys.exit(128 + signum)
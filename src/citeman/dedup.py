@@ -0,0 +1,229 @@
+from collections import Counter, defaultdict
+from math import ceil
+from .index import ID_TYPES
+from .search import tokenize
+from .utils import normalizeId
+import gc
+import re
+
+# Title words that say little about which paper it is.
+STOPWORDS = {'a', 'an', 'and', 'as', 'at', 'by', 'for', 'from', 'in', 'into', 'is', 'of', 'on',
+             'or', 'the', 'to', 'with'}
+# Titles whose word sets have a Jaccard similarity of at least SIMILARITY are duplicates
+# if their years and first authors do not disagree.
+SIMILARITY = 0.8
+# Buckets with more entries than this (e.g., titled 'Reply' or 'Editorial') are split by year, then by
+# first author, since compare rejects entries that disagree on either. What remains too large,
+# and entries of a split bucket missing the year or author, are not compared pairwise.
+MAX_BUCKET = 50
+YEAR = re.compile(r"\d{4}")
+
+class DuplicateGroup():
+    """
+    Entries that appear to be the same work.
+
+    Attributes:
+        keep (Entry): The entry suggested to keep: the one with an identifier and the most fields.
+        duplicates (list): The other entries of the group.
+        reasons (dict): Maps the keys of the duplicates to why they matched an entry of the group.
+    """
+
+    def __init__(self, keep, duplicates, reasons):
+        self.keep = keep
+        self.duplicates = duplicates
+        self.reasons = reasons
+
+    def __repr__(self):
+        return f"DuplicateGroup({self.keep.key!r}, {[entry.key for entry in self.duplicates]!r})"
+
+class Features():
+    """
+    The normalized parts of an entry that duplicates are compared on.
+
+    Attributes:
+        title (frozenset): The title words, without stopwords.
+        year (str): The four-digit year, if any.
+        author (str): The normalized surname of the first author, if any.
+        ids (set): The normalized (type, id) article identifiers.
+        types (set): The types of the identifiers.
+    """
+
+    def __init__(self, entry):
+        # One pass over the fields; Entry.get rebuilds a dict of the fields on every call.
+        values = dict()
+        for field in entry.fields:
+            if isinstance(field.value, str):
+                values.setdefault(field.key.lower(), field.value)
+        self.title = frozenset(word for word in tokenize(values.get('title', '')) if word not in STOPWORDS)
+        year = YEAR.search(values.get('year', ''))
+        self.year = year.group(0) if year else None
+        self.author = firstAuthor(values.get('author', ''))
+        self.ids = set()
+        for type in ID_TYPES:
+            if type.lower() in values:
+                id = normalizeId(type, values[type.lower()])
+                if id:
+                    self.ids.add((type, id))
+        self.types = {type for type, _ in self.ids}
+
+def firstAuthor(authors):
+    """
+    Returns the normalized surname of the first author of a BibTeX author list,
+    e.g., 'muller' for 'Müller, Ana and Smith, John' or 'Ana Müller and John Smith'.
+    """
+    first = authors.split(' and ')[0].strip()
+    if ',' in first:
+        words = tokenize(first.split(',')[0])
+    else:
+        words = tokenize(first)[-1:]
+    return ' '.join(words) or None
+
+def jaccard(a, b) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+def compare(a, b, threshold=SIMILARITY):
+    """
+    Decides whether two entries are duplicates.
+
+    Args:
+        a (Features): The first entry.
+        b (Features): The second entry.
+        threshold (float): The minimum title similarity.
+
+    Returns:
+        str: Why they are duplicates, or None if they are not.
+    """
+    if not a.types.isdisjoint(b.types):
+        shared = a.ids & b.ids
+        if shared:
+            return f"same {sorted(shared)[0][0]}"
+        # Different identifiers of the same type mean different works.
+        return None
+    if a.year and b.year and a.year != b.year:
+        return None
+    if a.author and b.author and a.author != b.author:
+        return None
+    similarity = jaccard(a.title, b.title)
+    if similarity >= threshold:
+        return f"title {similarity:.2f}"
+    return None
+
+def candidatePairs(features, threshold=SIMILARITY, maxBucket=MAX_BUCKET) -> set:
+    """
+    Finds the pairs of entries worth comparing without comparing every pair: entries
+    sharing an article identifier, and entries whose titles may be similar enough.
+
+    Titles are blocked by prefix filtering: with the words of each title ordered from the
+    rarest to the most common, two titles with a similarity of at least threshold share
+    one of the first len(title) - ceil(threshold * len(title)) + 1 words of each.
+    Unlike MinHash, no pair above the threshold is missed (short of oversized buckets),
+    and rare words make small buckets.
+
+    Args:
+        features (list): The Features of the entries.
+        threshold (float): The minimum title similarity.
+        maxBucket (int): Buckets with more entries than this are split by year and author.
+
+    Returns:
+        set: (i, j) pairs of positions in features, with i < j.
+    """
+    frequency = Counter(word for feature in features for word in feature.title)
+    buckets = defaultdict(list)
+    for i, feature in enumerate(features):
+        for ident in feature.ids:
+            buckets[ident].append(i)
+        words = sorted(feature.title, key=lambda word: (frequency[word], word))
+        for word in words[:len(words) - ceil(threshold * len(words) - 1e-9) + 1]:
+            buckets[word].append(i)
+
+    pairs = set()
+    for bucket in buckets.values():
+        for part in _splitBucket(bucket, features, maxBucket):
+            for x in range(len(part)):
+                for y in range(x + 1, len(part)):
+                    pairs.add((part[x], part[y]))
+    return pairs
+
+def _splitBucket(bucket, features, maxBucket, attributes=('year', 'author')):
+    # Yields the parts of a bucket small enough to compare pairwise.
+    if len(bucket) < 2:
+        return
+    if len(bucket) <= maxBucket:
+        yield bucket
+        return
+    if not attributes:
+        return
+    parts = defaultdict(list)
+    for i in bucket:
+        value = getattr(features[i], attributes[0])
+        if value is not None:
+            parts[value].append(i)
+    for part in parts.values():
+        yield from _splitBucket(part, features, maxBucket, attributes[1:])
+
+def _completeness(entry, feature):
+    # Prefer an entry with an identifier, then the one with the most fields.
+    return (bool(feature.ids), len(entry.fields))
+
+def findDuplicates(entries, threshold=SIMILARITY) -> list:
+    """
+    Groups the entries that appear to be the same work, e.g., the same paper under two keys
+    or with and without a DOI. Entries sharing a DOI or PMID are duplicates; otherwise
+    their normalized titles must be similar and their years and first authors must agree.
+    A group never holds two different identifiers of the same type.
+
+    Args:
+        entries (list): The entries.
+        threshold (float): The minimum title similarity (Jaccard of the title words).
+
+    Returns:
+        list: The DuplicateGroups, in order of their first entry.
+    """
+    # As when building the search index, the cyclic garbage collector would otherwise
+    # run many times while allocating the features and pairs.
+    gc.disable()
+    try:
+        features = [Features(entry) for entry in entries]
+        matches = sorted(
+            (i, j, reason) for i, j in candidatePairs(features, threshold)
+            for reason in (compare(features[i], features[j], threshold),) if reason is not None
+        )
+    finally:
+        gc.enable()
+    parent = list(range(len(entries)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # The identifiers of each group, by type, kept at its root. Groups are not joined if that
+    # would put different identifiers of a type in one group: an entry without a DOI matching
+    # the titles of two entries with different DOIs does not make them the same work.
+    ids = [dict(feature.ids) for feature in features]
+    reasons = dict()
+    for i, j, reason in matches:
+        a, b = find(i), find(j)
+        if a == b:
+            continue
+        if any(ids[a][type] != id for type, id in ids[b].items() if type in ids[a]):
+            continue
+        reasons.setdefault(j, reason)
+        reasons.setdefault(i, reason)
+        parent[b] = a
+        ids[a].update(ids[b])
+
+    members = defaultdict(list)
+    for i in reasons:
+        members[find(i)].append(i)
+    groups = []
+    for group in sorted(sorted(group) for group in members.values()):
+        keep = max(group, key=lambda i: _completeness(entries[i], features[i]))
+        duplicates = [i for i in group if i != keep]
+        groups.append(DuplicateGroup(
+            entries[keep],
+            [entries[i] for i in duplicates],
+            {entries[i].key: reasons[i] for i in duplicates},
+        ))
+    return groups
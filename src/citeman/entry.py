@@ -79,12 +79,14 @@ class EntrySplitter(Splitter):
 
         return entry
 
+FORMAT = BibtexFormat()
+
 # Taken from https://github.com/sciunto-org/python-bibtexparser/blob/main/bibtexparser/writer.py#L41
 # Modified slightly to use here without having to specify a bibtex_format as in the original and 
 # to return a concatenated string at the end.
 def getEntryRaw(block: Entry) -> List[str]:
     res = ["@", block.entry_type, "{", block.key, ",\n"]
-    bibtex_format = BibtexFormat()
+    bibtex_format = FORMAT
     field: Field
     for i, field in enumerate(block.fields):
         res.append(bibtex_format.indent)
@@ -24,4 +24,19 @@ class LibraryEmptyError(ValueError):
 
 class HistoryEmptyError(ValueError):
     def __init__(self) -> None:
-        super().__init__("Query history is empty.")
\ No newline at end of file
+        super().__init__("Query history is empty.")
+
+class ExternalEditError(Exception):
+    def __init__(self, keys, message="Changed both in the .bib file and in citeman: ") -> None:
+        self.keys = keys
+        super().__init__(message)
+
+class StaleEntryError(ExternalEditError):
+    def __init__(self, keys) -> None:
+        super().__init__(keys, "Changed or removed in the .bib file outside citeman: ")
+
+class UnsavedChangesError(Exception):
+    def __init__(self, bib, error) -> None:
+        self.bib = bib
+        self.error = error
+        super().__init__(f"Changes could not be written to {bib}: ")
@@ -0,0 +1,92 @@
+from .utils import normalizeId
+import re
+
+# The supported article identifiers. Each alternative has a single named group, read back
+# with Match.lastgroup:
+# - doi: a DOI anywhere, bare or in a URL, with the characters Crossref recommends.
+# - pmid: a PMID labelled 'PMID' or in a PubMed URL.
+# - pmidline: a number alone on its line, only taken as a PMID in a list of IDs (see isIdList).
+# - pmcid: a PubMed Central ID, e.g., PMC5354266.
+# - arxiv: an arXiv ID labelled 'arXiv' or in an arxiv.org URL, new (2101.00001v2) or
+#   old style (hep-th/9901001).
+ALTERNATIVES = (
+    r"(?P<doi>10\.\d{4,9}/[-._;()/:A-Z0-9]+)"
+    r"|PMID\s*:?\s*(?P<pmid>\d{1,9})\b"
+    r"|(?:pubmed\.ncbi\.nlm\.nih\.gov/|ncbi\.nlm\.nih\.gov/pubmed/)(?P<pmidurl>\d{1,9})\b"
+    r"|^[ \t]*(?P<pmidline>\d{1,9})[ \t]*$"
+    r"|(?P<pmcid>PMC\d{1,9})\b"
+    r"|(?:arXiv\s*:?\s*|arxiv\.org/(?:abs|pdf)/)(?P<arxiv>\d{4}\.\d{4,5}|[a-z-]+(?:\.[a-z]{2})?/\d{7})(?:v\d+)?\b"
+)
+# Every identifier in one pass. The lookahead on the first character lets most positions
+# of the text fail at once, instead of trying every alternative; it halves the time to
+# scan a reference list.
+IDENTIFIER = re.compile(r"(?:(?<!\w)(?=[1pan])|^)(?:" + ALTERNATIVES + r")", flags=re.I | re.M)
+# A line holding a single identifier, with the prefix of its URL or its label if any.
+ID_LINE = re.compile(
+    r"\s*(?:https?://(?:dx\.|www\.)?(?:doi\.org/)?|doi:\s*|PMCID:?\s*)?(?:" + ALTERNATIVES + r")[/.,;]?\s*",
+    flags=re.I | re.M
+)
+# Punctuation ending a sentence or a reference rather than the DOI.
+TRAILING = '.,;:'
+# arXiv IDs are resolved by DOI through DataCite, which registers one for every arXiv ID.
+ARXIV_PREFIX = '10.48550/arxiv.'
+
+def trimDoi(doi) -> str:
+    """
+    Removes the punctuation following a DOI in running text, e.g., "(doi:10.1000/1)." or
+    "10.1000/1;", keeping the parentheses that are part of it, e.g., 10.1016/0370-2693(82)90059-8.
+    """
+    while True:
+        doi = doi.rstrip(TRAILING)
+        if doi.endswith(')') and doi.count(')') > doi.count('('):
+            doi = doi[:-1]
+        else:
+            return doi
+
+def isIdList(text) -> bool:
+    """
+    Checks whether every non-blank line of a text holds a single article identifier, as in
+    a file of IDs, one per line, rather than a reference list or prose.
+    """
+    return all(ID_LINE.fullmatch(line) for line in text.splitlines() if line.strip())
+
+def extractIds(text) -> list:
+    """
+    Finds the article identifiers in free text, e.g., a pasted reference list, a
+    manuscript or a file of DOIs and PMIDs, one per line.
+
+    A number alone on its line is taken as a PMID only if every line of the text holds an
+    identifier; elsewhere it is more likely a page number, a year or a reference number,
+    and PMIDs must be labelled 'PMID' or linked to PubMed.
+
+    DOIs are lowercased and stripped of their URL or 'doi:' prefix, PMCIDs uppercased, and
+    arXiv IDs converted to their DOI without version, so that each identifier is kept once.
+
+    Args:
+        text (str): The text to search.
+
+    Returns:
+        list: The identifiers, in order of first appearance, ready to be queried.
+    """
+    ids = dict()
+    idList = None
+    for match in IDENTIFIER.finditer(text):
+        group = match.lastgroup
+        value = match.group(group)
+        if group == 'doi':
+            id = normalizeId('DOI', trimDoi(value))
+        elif group == 'pmcid':
+            id = value.upper()
+        elif group == 'arxiv':
+            id = ARXIV_PREFIX + value.lower()
+        else:
+            if group == 'pmidline':
+                if idList is None:
+                    idList = isIdList(text)
+                if not idList:
+                    continue
+            id = value.lstrip('0')
+            if not id:
+                continue
+        ids.setdefault(id, None)
+    return list(ids)
@@ -0,0 +1,154 @@
+from collections import deque
+from .atomic import appendDurably, atomicWrite
+from .spans import timed
+import json
+import os
+import time
+
+# Default eviction policy of the query history.
+MAX_RECORDS = 1000
+MAX_AGE_DAYS = None
+
+class QueryRecord():
+    """
+    A compact record of a processed query, as stored in the history journal.
+    Exposes the same attributes the UI reads from a Query.
+
+    Attributes:
+        id (str): The queried article ID.
+        type (str): The article ID type (e.g., 'DOI'), if recognized.
+        success (bool): Whether the query found a citation.
+        result (str): The success or error message of the query.
+        raw (str): The citation found by the query, if any.
+        time (float): When the query was processed, in seconds since the epoch.
+    """
+
+    def __init__(self, id, type, success, result, raw, time):
+        self.id = id
+        self.type = type
+        self.success = success
+        self.result = result
+        self.raw = raw
+        self.time = time
+
+    @classmethod
+    def fromQuery(cls, query):
+        return cls(query.id, query.type, query.success, str(query.result), query.raw, query.time)
+
+    @classmethod
+    def fromJSON(cls, line):
+        record = json.loads(line)
+        return cls(record['id'], record['type'], record['success'], record['result'], record['raw'], record['time'])
+
+    def toJSON(self) -> str:
+        return json.dumps({
+            'id': self.id,
+            'type': self.type,
+            'success': self.success,
+            'result': self.result,
+            'raw': self.raw,
+            'time': self.time,
+        }, ensure_ascii=False)
+
+class History():
+    """
+    The query history, backed by an append-only journal with one JSON record per line.
+
+    Queries processed during this session are kept as Query objects; queries read
+    back from the journal are QueryRecord objects.
+
+    Attributes:
+        path (str): Path to the journal file.
+        maxRecords (int): Number of most recent records to keep, or None for no limit.
+        maxAgeDays (float): Age in days after which records are evicted, or None for no limit.
+        records (list): The retained queries, oldest first.
+
+    Methods:
+        load(self): Streams the journal into memory, evicting old records.
+        append(self, query): Adds a query to the history and journals it.
+        compact(self): Rewrites the journal with only the retained records.
+    """
+
+    def __init__(self, path='citeman.history', maxRecords=MAX_RECORDS, maxAgeDays=MAX_AGE_DAYS):
+        self.path = path
+        self.maxRecords = maxRecords
+        self.maxAgeDays = maxAgeDays
+        self.records = list()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _expired(self, record, now) -> bool:
+        return self.maxAgeDays is not None and now - record.time > self.maxAgeDays * 86400
+
+    def _evict(self) -> None:
+        now = time.time()
+        self.records = [record for record in self.records if not self._expired(record, now)]
+        if self.maxRecords is not None and len(self.records) > self.maxRecords:
+            del self.records[:len(self.records) - self.maxRecords]
+
+    @timed('history.load')
+    def load(self) -> None:
+        """
+        Streams the journal into memory, keeping at most maxRecords records in memory.
+        The journal is compacted when more records were dropped than retained.
+        """
+        if not os.path.exists(self.path):
+            return
+        now = time.time()
+        records = deque(maxlen=self.maxRecords)
+        read = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                read += 1
+                try:
+                    record = QueryRecord.fromJSON(line)
+                except (ValueError, KeyError, TypeError):
+                    # Skip a line torn by a crash mid-append.
+                    continue
+                if not self._expired(record, now):
+                    records.append(record)
+        self.records = list(records)
+        if read - len(self.records) > len(self.records):
+            self.compact()
+
+    def _torn(self) -> bool:
+        # Whether the journal ends in a line torn by a crash mid-append.
+        try:
+            with open(self.path, 'rb') as f:
+                if f.seek(0, os.SEEK_END) == 0:
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b'\n'
+        except FileNotFoundError:
+            return False
+
+    @timed('history.append')
+    def append(self, query) -> None:
+        """
+        Adds a query to the history and appends its record to the journal.
+        A line torn by an earlier crash is ended first, so the new record starts on its own line.
+
+        Args:
+            query (Query): The processed query.
+        """
+        record = QueryRecord.fromQuery(query)
+        text = record.toJSON() + '\n'
+        if self._torn():
+            text = '\n' + text
+        with open(self.path, 'a', encoding='utf-8') as f:
+            appendDurably(f, text)
+        self.records.append(query)
+        self._evict()
+
+    @timed('history.compact')
+    def compact(self) -> None:
+        """
+        Rewrites the journal atomically with only the records retained by the eviction policy.
+        """
+        self._evict()
+        lines = []
+        for query in self.records:
+            record = query if isinstance(query, QueryRecord) else QueryRecord.fromQuery(query)
+            lines.append(record.toJSON() + '\n')
+        atomicWrite(self.path, ''.join(lines))
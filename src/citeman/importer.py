@@ -0,0 +1,161 @@
+from string import ascii_lowercase
+from time import perf_counter
+from .errors import CriticalFieldException, FieldMissingError
+from .index import entryIds
+from .query import PubMed, PubMedCentral, classify, makeQuery
+from .utils import normalizeId, removeBraces
+
+CRITICAL_FIELDS = ['author', 'year', 'title']
+WORKERS = 8
+
+class ImportReport():
+    """
+    The outcome of a bulk import.
+
+    Attributes:
+        added (list): The blocks added to the library.
+        duplicates (list): The queries whose article ID was already in the library.
+        failures (list): (id, reason) tuples of the identifiers that could not be imported.
+        resolveTime (float): Seconds spent resolving the identifiers.
+        totalTime (float): Seconds spent on the whole import.
+        workers (int): Number of concurrent resolver workers.
+    """
+
+    def __init__(self, workers):
+        self.added = []
+        self.duplicates = []
+        self.failures = []
+        self.resolveTime = 0.0
+        self.totalTime = 0.0
+        self.workers = workers
+
+    @property
+    def total(self) -> int:
+        return len(self.added) + len(self.duplicates) + len(self.failures)
+
+    def summary(self) -> str:
+        rate = self.total / self.resolveTime if self.resolveTime > 0 else 0.0
+        lines = [
+            f"Resolved {self.total} identifiers in {self.resolveTime:.2f}s "
+            f"({rate:.1f}/s, {self.workers} workers); total {self.totalTime:.2f}s.",
+            f"Added: {len(self.added)}",
+            f"Already in library: {len(self.duplicates)}",
+            f"Failed: {len(self.failures)}",
+        ]
+        lines.extend(f"  {id}: {reason}" for id, reason in self.failures)
+        return "\n".join(lines)
+
+def prefetchPubMed(ids) -> None:
+    """
+    Resolves all PMIDs and PMCIDs among the article IDs in batched requests ahead of the queries.
+    """
+    from requests import RequestException
+    batches = {resolver.idType: [] for resolver in (PubMed, PubMedCentral)}
+    for id in ids:
+        try:
+            batches.get(classify(id), []).append(id)
+        except ValueError:
+            pass
+    for resolver in (PubMed, PubMedCentral):
+        try:
+            resolver.prefetch(batches[resolver.idType])
+        except RequestException:
+            # Each ID is retried on its own when queried.
+            pass
+
+def resolveIds(ids, workers=WORKERS, resolver=makeQuery) -> list:
+    """
+    Resolves article IDs concurrently with a bounded pool of worker threads.
+    PMIDs and PMCIDs are resolved in batches first.
+
+    Args:
+        ids (list): The article IDs.
+        workers (int): Maximum number of concurrent requests.
+        resolver (callable): Creates the query resolving an ID.
+
+    Returns:
+        list: The queries, in the order of ids.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if resolver is makeQuery:
+        prefetchPubMed(ids)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(resolver, ids))
+
+def uniqueKey(processor, key, taken) -> str:
+    """
+    Returns key, or key with the first free suffix ('a', 'b', ..., 'aa', ...) appended
+    if it collides with the library or with keys taken earlier in the batch.
+    """
+    candidate = key
+    n = 0
+    while processor.index.hasKey(candidate) or candidate in taken:
+        suffix = ''
+        i = n
+        while True:
+            suffix = ascii_lowercase[i % 26] + suffix
+            i = i // 26 - 1
+            if i < 0:
+                break
+        candidate = key + suffix
+        n += 1
+    return candidate
+
+def importIds(processor, ids, workers=WORKERS, resolver=makeQuery) -> ImportReport:
+    """
+    Resolves article IDs (DOIs, PMIDs and PMCIDs) and adds the citations found to the library without prompting.
+
+    The checks of the interactive query are applied automatically: citations missing a
+    critical field are reported as failures, citations already in the library are skipped
+    and colliding keys get a suffix. Everything accepted is written in a single write.
+
+    Args:
+        processor (Processor): The processor managing the library.
+        ids (list): The article IDs to import.
+        workers (int): Maximum number of concurrent requests.
+        resolver (callable): Creates the query resolving an ID.
+
+    Returns:
+        ImportReport: What was added, skipped and failed, with timings.
+    """
+    report = ImportReport(workers)
+    start = perf_counter()
+    queries = resolveIds(ids, workers, resolver)
+    report.resolveTime = perf_counter() - start
+
+    blocks = []
+    taken = set()
+    seen = set()
+    for query in queries:
+        processor.history.append(query)
+        if not query.success:
+            report.failures.append((query.id, str(query.result)))
+            continue
+        ids = {(query.type, normalizeId(query.type, query.id))} | set(entryIds(query.block))
+        if processor.idExists(query) or not ids.isdisjoint(seen):
+            report.duplicates.append(query)
+            continue
+        try:
+            for field in CRITICAL_FIELDS:
+                processor.checkCriticalField(query.block, field)
+        except CriticalFieldException as e:
+            report.failures.append((query.id, f"{e}{e.field}"))
+            continue
+        # Remove the braces of the author field, as the interactive query does, to prevent
+        # double brace wrapping which treats a list of multiple authors as a single author.
+        try:
+            processor.updateField(query.block, 'author', removeBraces(query.block.get('author').value))
+        except FieldMissingError:
+            pass
+        key = uniqueKey(processor, query.block.key, taken)
+        if key != query.block.key:
+            processor.updateKey(query.block, key)
+        taken.add(key)
+        seen |= ids
+        blocks.append(query.block)
+
+    if blocks:
+        processor.addAll(blocks)
+    report.added = blocks
+    report.totalTime = perf_counter() - start
+    return report
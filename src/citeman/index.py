@@ -0,0 +1,133 @@
+from collections import ChainMap
+from .utils import normalizeId
+
+# Article identifier types (see query.ReID) that are indexed.
+ID_TYPES = ('DOI', 'PMID', 'PMCID')
+
+def entryIds(entry) -> list:
+    """
+    Collects the normalized article identifiers of an entry.
+    Field names are matched case-insensitively (CrossRef returns 'DOI').
+
+    Args:
+        entry (Entry): The entry.
+
+    Returns:
+        list: (type, id) tuples of the identifiers present in the entry.
+    """
+    ids = []
+    for field in entry.fields:
+        type = field.key.upper()
+        if type in ID_TYPES and isinstance(field.value, str):
+            value = normalizeId(type, field.value)
+            if value:
+                ids.append((type, value))
+    return ids
+
+class Index():
+    """
+    Hash indexes of library entries by citation key and by article identifier.
+
+    Attributes:
+        keys (dict): Maps citation keys to entries.
+        ids (dict): Maps (type, normalized id) tuples to the entries carrying that identifier.
+
+    Methods:
+        add(self, entry): Indexes an entry.
+        remove(self, entry): Removes an entry from the indexes.
+        hasKey(self, key): Checks whether an entry with the given key is indexed.
+        hasId(self, type, id): Checks whether an entry with the given identifier is indexed.
+    """
+
+    def __init__(self, entries=()):
+        self.keys = dict()
+        self.ids = dict()
+        # What each entry was indexed under, so it can be removed
+        # even after its key or fields have changed.
+        self._indexed = dict()
+        for entry in entries:
+            self.add(entry)
+
+    def __contains__(self, entry) -> bool:
+        return id(entry) in self._indexed
+
+    def __len__(self) -> int:
+        return len(self._indexed)
+
+    def add(self, entry) -> None:
+        """
+        Indexes an entry by its current key and identifiers.
+
+        Args:
+            entry (Entry): The entry to index.
+        """
+        if entry in self:
+            self.remove(entry)
+        ids = entryIds(entry)
+        self.keys.setdefault(entry.key, entry)
+        for ident in ids:
+            self.ids.setdefault(ident, []).append(entry)
+        self._indexed[id(entry)] = (entry, entry.key, ids)
+
+    def remove(self, entry) -> None:
+        """
+        Removes an entry from the indexes. Does nothing if the entry is not indexed.
+
+        Args:
+            entry (Entry): The entry to remove.
+        """
+        try:
+            _, key, ids = self._indexed.pop(id(entry))
+        except KeyError:
+            return
+        if self.keys.get(key) is entry:
+            del self.keys[key]
+        for ident in ids:
+            entries = [other for other in self.ids[ident] if other is not entry]
+            if entries:
+                self.ids[ident] = entries
+            else:
+                del self.ids[ident]
+
+    def hasKey(self, key) -> bool:
+        return key in self.keys
+
+    def hasId(self, type, id) -> bool:
+        if type is None or id is None:
+            return False
+        return (type, normalizeId(type, id)) in self.ids
+
+class SharedIndex():
+    """
+    The indexes of several libraries, looked up as one, e.g., to check a key against every
+    .bib file of a Workspace. The libraries keep their own indexes up to date; lookups see
+    their current contents.
+
+    Attributes:
+        indexes (list): The Index of each library.
+        keys (ChainMap): Maps citation keys to entries, across the libraries.
+        ids (ChainMap): Maps (type, normalized id) tuples to entries, across the libraries.
+
+    Methods:
+        hasKey(self, key): Checks whether an entry with the given key is in any library.
+        hasId(self, type, id): Checks whether an entry with the given identifier is in any library.
+    """
+
+    def __init__(self, indexes):
+        self.indexes = list(indexes)
+        self.keys = ChainMap(*[index.keys for index in self.indexes])
+        self.ids = ChainMap(*[index.ids for index in self.indexes])
+
+    def __contains__(self, entry) -> bool:
+        return any(entry in index for index in self.indexes)
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self.indexes)
+
+    def hasKey(self, key) -> bool:
+        return key in self.keys
+
+    def hasId(self, type, id) -> bool:
+        if type is None or id is None:
+            return False
+        return (type, normalizeId(type, id)) in self.ids
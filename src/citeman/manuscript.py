@@ -0,0 +1,157 @@
+from .stream import CHUNK
+import os
+import re
+
+# The key list of a LaTeX citation command (\cite, \citep[p. 2]{a, b}, \parencite,
+# \autocite*, \nocite{*}, ...).
+LATEX = r"\\\w{0,20}cite\w{0,20}\*?(?:\s{0,50}\[[^\]]{0,200}\]){0,2}\s{0,50}\{(?P<keys>[^{}]{0,2000})\}"
+# A pandoc key (@key, [@key; -@other], @{key}) that is not part of an email address and not
+# escaped (\@). Pandoc keys may contain internal punctuation.
+PANDOC = r"(?<![\w@\\])@(?:\{(?P<braced>[^{}\s]{1,200})\}|(?P<key>\w(?:[\w:.#$%&+?<>~/-]{0,200}\w)?))"
+# The citations of a Markdown manuscript in one pass, which may also hold LaTeX commands.
+CITATION = re.compile(PANDOC + "|" + LATEX)
+# The citations of a LaTeX manuscript, where '@' is no citation, e.g., \@maketitle.
+LATEX_CITATION = re.compile(LATEX)
+# No match is longer than this, so a match starting this far before the end of the text
+# read so far is complete.
+MAX_MATCH = 3000
+# Files read when a directory is scanned.
+EXTENSIONS = ('.md', '.markdown', '.rmd', '.qmd', '.tex', '.ltx', '.txt')
+# Files read as LaTeX rather than Markdown.
+LATEX_EXTENSIONS = ('.tex', '.ltx')
+
+def scanCitations(f, chunkSize=CHUNK, pattern=CITATION):
+    """
+    Reads the citation keys of a Markdown or LaTeX manuscript one chunk at a time,
+    so that memory use does not depend on the length of the manuscript.
+
+    Args:
+        f (TextIO): The open manuscript.
+        chunkSize (int): Number of characters read at a time.
+        pattern (Pattern): CITATION for Markdown, LATEX_CITATION for LaTeX.
+
+    Yields:
+        tuple: (line, key) of every key cited, in order. '*' stands for \\nocite{*}.
+    """
+    buffer = ''
+    # Where the scan resumes in the buffer, and the line it is on.
+    pos = 0
+    line = 1
+    eof = False
+    while not eof:
+        chunk = f.read(chunkSize)
+        eof = not chunk
+        buffer += chunk
+        limit = len(buffer) if eof else len(buffer) - MAX_MATCH
+        if limit <= pos:
+            continue
+        end = limit
+        for match in pattern.finditer(buffer, pos):
+            if match.start() >= limit:
+                break
+            line += buffer.count('\n', pos, match.start())
+            pos = match.start()
+            keys = match.group('keys')
+            if keys is None:
+                yield line, match.group('braced') or match.group('key')
+            else:
+                for key in keys.split(','):
+                    key = key.strip()
+                    if key:
+                        yield line, key
+            end = max(limit, match.end())
+        line += buffer.count('\n', pos, end)
+        # Keep a character before the resume point for the lookbehind of the next match.
+        keep = max(end - 1, 0)
+        pos = end - keep
+        buffer = buffer[keep:]
+
+def manuscriptFiles(paths) -> list:
+    """
+    Lists the manuscript files among paths, replacing directories by the Markdown and LaTeX
+    files they contain, at any depth. Hidden directories are skipped.
+
+    Args:
+        paths (list): Paths to files or directories.
+
+    Returns:
+        list: Paths to the files, sorted within each directory.
+    """
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            files.extend(os.path.join(root, name) for name in sorted(names)
+                         if name.lower().endswith(EXTENSIONS))
+    return files
+
+class CitationReport():
+    """
+    The citations of a manuscript checked against a library.
+
+    Attributes:
+        cited (dict): Maps every key cited to (path, line) of its first citation, in order.
+        missing (list): The keys cited that are not in the library, in order.
+        unused (list): The keys of the library that are not cited, in library order.
+        citesAll (bool): Whether the manuscript cites every entry (\\nocite{*}).
+    """
+
+    def __init__(self):
+        self.cited = dict()
+        self.missing = []
+        self.unused = []
+        self.citesAll = False
+
+def checkCitations(paths, keys) -> CitationReport:
+    """
+    Scans manuscripts for citation keys and checks them against the keys of a library.
+
+    Args:
+        paths (list): Paths to manuscripts or directories of manuscripts.
+        keys (dict): The entries of the library by key, in library order, e.g., Library.entries_dict.
+
+    Returns:
+        CitationReport: The keys cited, missing and unused.
+    """
+    report = CitationReport()
+    cited = report.cited
+    for path in manuscriptFiles(paths):
+        pattern = LATEX_CITATION if path.lower().endswith(LATEX_EXTENSIONS) else CITATION
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line, key in scanCitations(f, pattern=pattern):
+                if key not in cited:
+                    cited[key] = (path, line)
+    report.citesAll = cited.pop('*', None) is not None
+    report.missing = [key for key in cited if key not in keys]
+    if not report.citesAll:
+        report.unused = [key for key in keys if key not in cited]
+    return report
+
+def writePruned(libraries, report, f) -> int:
+    """
+    Writes the @string definitions of libraries and the entries a manuscript cites, keeping
+    their original text, e.g., to ship a manuscript with only the references it uses.
+
+    Args:
+        libraries (list): The libraries, e.g., of the .bib files of a workspace.
+        report (CitationReport): The citations of the manuscript.
+        f (TextIO): The open output file.
+
+    Returns:
+        int: The number of entries written.
+    """
+    blocks = [string for library in libraries for string in library.strings]
+    entries = dict()
+    for library in libraries:
+        for entry in library.entries:
+            # A key in several files is taken from the first, as the citation resolves to it.
+            if (report.citesAll or entry.key in report.cited) and entry.key not in entries:
+                entries[entry.key] = entry
+    blocks.extend(entries.values())
+    f.write('\n\n'.join(block.raw.rstrip('\n') for block in blocks))
+    if blocks:
+        f.write('\n')
+    return len(entries)
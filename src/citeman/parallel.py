@@ -0,0 +1,168 @@
+from bibtexparser.entrypoint import parse_string
+from bibtexparser.library import Library
+from bibtexparser.model import DuplicateBlockKeyBlock, Entry, Field, ParsingFailedBlock
+from bibtexparser.splitter import Splitter
+import os
+import re
+
+# Files smaller than this are parsed serially; starting the processes costs more than it saves.
+THRESHOLD = 4 << 20
+# A block start at the beginning of a line. Only these are considered as chunk boundaries.
+BOUNDARY = re.compile(r"^@\w*[ \t]*\{", re.M)
+# @string definitions are resolved across the whole file, so they prevent chunking.
+STRING = re.compile(r"@string[ \t]*\{", re.I)
+
+def defaultJobs() -> int:
+    return os.cpu_count() or 1
+
+def _depth(text, start, end) -> int:
+    # The change in brace depth over text[start:end], ignoring escaped braces.
+    return (text.count('{', start, end) - text.count('\\{', start, end)
+            - text.count('}', start, end) + text.count('\\}', start, end))
+
+def chunkOffsets(text, parts) -> list:
+    """
+    Finds where a .bib file can be cut into about equally sized chunks without cutting a block.
+
+    A cut is only made right before an '@' that starts a line at brace depth 0. If the
+    braces outside the blocks are unbalanced, splitting stops where that is detected.
+
+    Args:
+        text (str): The contents of the .bib file.
+        parts (int): The desired number of chunks.
+
+    Returns:
+        list: The offsets at which the chunks start, beginning with 0.
+    """
+    offsets = [0]
+    depth = 0
+    pos = 0
+    for i in range(1, parts):
+        target = len(text) * i // parts
+        if target <= pos:
+            continue
+        for match in BOUNDARY.finditer(text, target):
+            depth += _depth(text, pos, match.start())
+            pos = match.start()
+            if depth < 0:
+                return offsets
+            if depth == 0:
+                offsets.append(pos)
+                break
+        else:
+            break
+    return offsets
+
+def _shift(blocks, lines) -> None:
+    # Moves the line numbers of blocks parsed from a chunk to their line in the file.
+    # Each object is shifted once, even when referenced by a DuplicateBlockKeyBlock too.
+    seen = set()
+    stack = list(blocks)
+    while stack:
+        block = stack.pop()
+        if block is None or id(block) in seen:
+            continue
+        seen.add(id(block))
+        if block._start_line_in_file is not None:
+            block._start_line_in_file += lines
+        if isinstance(block, Entry):
+            for field in block.fields:
+                if field._start_line is not None:
+                    field._start_line += lines
+        if isinstance(block, ParsingFailedBlock):
+            stack.append(block.ignore_error_block)
+        if isinstance(block, DuplicateBlockKeyBlock):
+            stack.append(block._previous_block)
+
+def packLibrary(library) -> list:
+    """
+    Turns a library into rows to send it to or from a worker process.
+    Entries become plain tuples, which the process pool transfers much faster than the
+    bibtexparser objects; other (rare) block types are sent as they are.
+
+    Args:
+        library (Library): The library to send.
+
+    Returns:
+        list: The blocks of the library as rows, for unpackLibrary.
+    """
+    rows = []
+    for block in library.blocks:
+        if type(block) is Entry:
+            fields = [(field.key, field.value, field.start_line) for field in block.fields]
+            rows.append((block.entry_type, block.key, fields, block.start_line, block.raw, block.parser_metadata))
+        else:
+            rows.append(block)
+    return rows
+
+def unpackLibrary(rows) -> Library:
+    """
+    Rebuilds a library from the rows made by packLibrary.
+
+    Args:
+        rows (list): The rows received from another process.
+
+    Returns:
+        Library: The library.
+    """
+    blocks = []
+    for row in rows:
+        if type(row) is tuple:
+            entry_type, key, fields, start_line, raw, metadata = row
+            row = Entry(entry_type, key, [Field(*field) for field in fields], start_line, raw)
+            row._parser_metadata = metadata
+        blocks.append(row)
+    return Library(blocks)
+
+def _parseChunk(args):
+    text, lines = args
+    library = parse_string(text)
+    _shift(library.blocks, lines)
+    return packLibrary(library)
+
+def _unparsed(entry) -> Entry:
+    # The entry as the splitter produced it, before the middlewares ran, which is what
+    # a serial parse keeps as the duplicate of a DuplicateBlockKeyBlock.
+    block = Splitter(entry.raw).split().blocks[0]
+    _shift([block], entry.start_line)
+    return block
+
+def parallelParse(text, jobs=None) -> Library:
+    """
+    Parses a .bib file in chunks with a pool of processes.
+
+    The result is identical to parse_string(text): blocks keep their line numbers and a
+    key repeated in a later chunk becomes a DuplicateBlockKeyBlock, as in a serial parse.
+    Files defining @string macros are parsed serially, since a macro may be used in
+    another chunk than the one defining it.
+
+    Args:
+        text (str): The contents of the .bib file.
+        jobs (int): Number of processes. Defaults to the number of CPUs.
+
+    Returns:
+        Library: The parsed library.
+    """
+    jobs = jobs or defaultJobs()
+    offsets = chunkOffsets(text, jobs) if jobs > 1 and not STRING.search(text) else [0]
+    if len(offsets) == 1:
+        return parse_string(text)
+
+    # Only loaded when a file is actually split.
+    from concurrent.futures import ProcessPoolExecutor
+    ends = offsets[1:] + [len(text)]
+    chunks = [(text[start:end], text.count('\n', 0, start)) for start, end in zip(offsets, ends)]
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        results = list(executor.map(_parseChunk, chunks))
+
+    blocks = []
+    keys = set()
+    for rows in results:
+        for block in unpackLibrary(rows).blocks:
+            if isinstance(block, Entry):
+                if block.key in keys:
+                    block = _unparsed(block)
+                keys.add(block.key)
+            blocks.append(block)
+    # Library turns the repeated keys into DuplicateBlockKeyBlocks.
+    return Library(blocks)
@@ -0,0 +1,166 @@
+from collections import deque
+from threading import Condition
+
+# Queries resolved at the same time. Requests still go through the shared rate limiter.
+WORKERS = 4
+
+class PendingQuery():
+    """
+    A query submitted to a QueryPipeline, resolving in the background.
+
+    Attributes:
+        id (str): The article ID as entered.
+        future (Future): Resolves to the processed Query.
+        recorded (bool): Whether the query was added to the query history.
+    """
+
+    def __init__(self, id, future=None):
+        self.id = id
+        self.future = future
+        self.recorded = False
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def pending(self) -> bool:
+        # Listed in the query history from the moment it is recorded there.
+        return not (self.recorded or self.future.done())
+
+    def result(self, timeout=None):
+        """
+        Returns the processed query, waiting for it to resolve.
+
+        Raises:
+            Exception: The unanticipated error raised while processing the query, if any.
+        """
+        return self.future.result(timeout)
+
+class QueryPipeline():
+    """
+    Resolves queries in background threads, so that more article IDs can be entered while
+    earlier ones resolve. Each query is added to the query history as soon as it resolves,
+    and handed back in the order the queries were submitted.
+
+    Attributes:
+        processor (Processor): The processor processing the queries.
+        workers (int): Maximum number of queries resolved at the same time.
+        queue (deque): The PendingQuery objects not handed back yet, in submission order.
+        progress (int): The number of queries resolved so far, successfully or not.
+
+    Methods:
+        submit(self, id): Starts resolving an article ID.
+        ready(self): Hands back the next query if it has resolved.
+        next(self, timeout): Hands back the next query, waiting for it to resolve.
+        unresolved(self): Lists the queries still resolving.
+        history(self): Lists the query history followed by the queries still resolving.
+        waitForProgress(self, progress, timeout): Waits for another query to resolve.
+        close(self, wait): Stops the background threads.
+    """
+
+    def __init__(self, processor, workers=WORKERS):
+        self.processor = processor
+        self.workers = workers
+        self.queue = deque()
+        self.progress = 0
+        self._executor = None
+        # Held while a query is recorded in the query history, and signalled when one resolves.
+        self._condition = Condition()
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def submit(self, id) -> PendingQuery:
+        """
+        Starts resolving an article ID in the background.
+
+        Args:
+            id (str): The article ID to query.
+
+        Returns:
+            PendingQuery: The query being resolved.
+        """
+        if self._executor is None:
+            # Only loaded when the first query is made.
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='citeman-query')
+        pending = PendingQuery(id)
+        pending.future = self._executor.submit(self._resolve, pending)
+        pending.future.add_done_callback(self._resolved)
+        self.queue.append(pending)
+        return pending
+
+    def _resolve(self, pending):
+        query = self.processor.processQuery(pending.id, record=False)
+        with self._condition:
+            self.processor.recordQuery(query)
+            pending.recorded = True
+        return query
+
+    def _resolved(self, future) -> None:
+        with self._condition:
+            self.progress += 1
+            self._condition.notify_all()
+
+    def ready(self):
+        """
+        Returns the earliest submitted query not handed back yet if it has resolved, else None.
+        """
+        if self.queue and self.queue[0].done:
+            return self.queue.popleft().result()
+        return None
+
+    def next(self, timeout=None):
+        """
+        Returns the earliest submitted query not handed back yet, waiting for it to resolve.
+
+        Raises:
+            IndexError: If no query is queued.
+        """
+        pending = self.queue[0]
+        query = pending.result(timeout)
+        self.queue.popleft()
+        return query
+
+    def readyCount(self) -> int:
+        return sum(1 for pending in self.queue if pending.done)
+
+    def unresolved(self) -> list:
+        return [pending for pending in self.queue if pending.pending]
+
+    def history(self) -> list:
+        """
+        Returns the query history followed by the queries still resolving. Both are read while
+        no query is being recorded, so that a query resolving meanwhile is listed exactly once.
+        """
+        with self._condition:
+            return list(self.processor.history.records) + self.unresolved()
+
+    def waitForProgress(self, progress, timeout=None) -> int:
+        """
+        Waits until a query resolves, unless one did since progress was read.
+
+        Args:
+            progress (int): The progress last seen.
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            int: The progress now, equal to progress if the wait timed out.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.progress != progress, timeout)
+            return self.progress
+
+    def close(self, wait=False) -> None:
+        """
+        Stops the background threads. Queries not started yet are cancelled; those resolving
+        still finish, and are added to the query history, unless the program exits first.
+        """
+        if self._executor is not None:
+            # Executor.shutdown only cancels queued futures itself from Python 3.9.
+            for pending in self.queue:
+                pending.future.cancel()
+            self.queue = deque(pending for pending in self.queue if not pending.future.cancelled())
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -1,32 +1,120 @@
 import os
-from bibtexparser.entrypoint import parse_file
+from bibtexparser.entrypoint import parse_string
 from bibtexparser.library import Library
 from pickle import load
+from citeman.history import History
+from citeman.parallel import THRESHOLD, defaultJobs, packLibrary, parallelParse, unpackLibrary
 from citeman.processor import Processor
+from citeman.snapshot import fingerprint, loadSnapshot, saveSnapshot
+from citeman.spans import span
 
-def prepare_library():
-    bib = 'bibliography.bib'
+def _cached_library(bib, read_only=False):
+    # The library of a .bib file if it is empty or unchanged since its snapshot,
+    # else None with the contents and fingerprint of the file to parse.
     if not os.path.exists(bib):
-        # Create the file if it doesn't exist
-        with open(bib, 'a'):
-            pass
-        return Library()
+        # Create the file if it doesn't exist, unless only reading
+        if not read_only:
+            with open(bib, 'a'):
+                pass
+        return Library(), None, None
 
-    # Read the file into a library object
-    return parse_file(bib)
+    with open(bib, 'rb') as f:
+        data = f.read()
 
-def prepare_processor(library):
+    # Use the snapshot of the previous parse if the file is unchanged
+    current = fingerprint(bib, data)
+    with span('prepare.snapshotLoad'):
+        library = loadSnapshot(bib, current)
+    return library, data, current
+
+def _parse_library(bib, data, current, jobs, read_only=False):
+    # Read the file into a library object, on several cores if it is large
+    text = data.decode('utf-8')
+    with span('prepare.parse'):
+        library = parallelParse(text, jobs) if jobs > 1 else parse_string(text)
+    if not read_only:
+        with span('prepare.snapshotSave'):
+            saveSnapshot(bib, library, current)
+    return library
+
+def _parse_packed(args):
+    # Parses a .bib file in a worker process; the entries travel back as plain tuples.
+    bib, data, current, read_only = args
+    return packLibrary(_parse_library(bib, data, current, 1, read_only))
+
+def prepare_library(bib='bibliography.bib', jobs=None):
+    library, data, current = _cached_library(bib)
+    if library is None:
+        if jobs is None:
+            jobs = defaultJobs() if len(data) >= THRESHOLD else 1
+        library = _parse_library(bib, data, current, jobs)
+    return library
+
+def prepare_libraries(bibs, jobs=None, read_only=False):
+    """
+    Loads several .bib files at once. Files unchanged since their snapshot are loaded from
+    it; the others are parsed concurrently, one per process.
+
+    Args:
+        bibs (list): Paths to the .bib files.
+        jobs (int): Maximum number of processes. Defaults to the number of CPUs.
+        read_only (bool): Whether to leave the disk untouched: missing files are read as
+        empty instead of created, and no snapshot is saved.
+
+    Returns:
+        list: The library of each file, in the order of bibs.
+    """
+    libraries = []
+    misses = []
+    for i, bib in enumerate(bibs):
+        library, data, current = _cached_library(bib, read_only)
+        libraries.append(library)
+        if library is None:
+            misses.append((i, bib, data, current))
+
+    if len(misses) <= 1 or jobs == 1:
+        for i, bib, data, current in misses:
+            parts = (jobs or defaultJobs()) if len(data) >= THRESHOLD else 1
+            libraries[i] = _parse_library(bib, data, current, parts, read_only)
+        return libraries
+
+    # Only loaded when several files must be parsed.
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(jobs or defaultJobs(), len(misses))) as executor:
+        results = executor.map(_parse_packed, [(bib, data, current, read_only) for _, bib, data, current in misses])
+        for (i, *_), rows in zip(misses, results):
+            libraries[i] = unpackLibrary(rows)
+    return libraries
+
+def prepare_history(history):
     pickle = 'citeman.p'
-    if not os.path.exists(pickle):
-        # Create the file if it doesn't exist
-        with open(pickle, 'w'):
-            pass
-        processor = Processor(library)
-        processor.save()
-        return processor
-    
-    # Read in pickle file
-    with open(pickle, 'rb') as f:
-        processor = load(f)
-    processor.overwriteLibrary(library)
-    return processor
\ No newline at end of file
+    if not os.path.exists(history.path) and os.path.exists(pickle):
+        # Migrate the query history pickled by previous versions
+        try:
+            with open(pickle, 'rb') as f:
+                queries = load(f)._queryHistory
+        except Exception:
+            queries = []
+        for query in queries:
+            if not hasattr(query, 'time'):
+                query.time = os.path.getmtime(pickle)
+            history.records.append(query)
+        history.compact()
+
+    # Stream the journal
+    history.load()
+    return history
+
+def prepare_processor(library, history=None, bib=None):
+    if history is None:
+        history = History()
+    return Processor(library, prepare_history(history), bib)
+
+def prepare_workspace(bibs, history=None, jobs=None):
+    # Imported here, as a single .bib file is the common case.
+    from citeman.workspace import Workspace
+    if history is None:
+        history = History()
+    history = prepare_history(history)
+    libraries = prepare_libraries(bibs, jobs)
+    return Workspace([Processor(library, history, bib) for bib, library in zip(bibs, libraries)])
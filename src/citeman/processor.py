@@ -1,10 +1,96 @@
-from bibtexparser.model import DuplicateBlockKeyBlock, Field
-from bibtexparser.entrypoint import write_file
-from pickle import dump
-from .errors import CriticalFieldException, FieldExistsError, FieldMissingError, HistoryEmptyError, KeyExistsError, LibraryEmptyError
+from contextlib import contextmanager
+from functools import wraps
+from threading import RLock
+from bibtexparser.entrypoint import parse_string
+from bibtexparser.model import DuplicateBlockKeyBlock, Entry, Field
+from bibtexparser.library import Library
+from .bibfile import SerializedCache, appendEntries, removeEntry, writeBlocks
+from .dedup import SIMILARITY, findDuplicates
+from .errors import CriticalFieldException, ExternalEditError, FieldExistsError, FieldMissingError, HistoryEmptyError, KeyExistsError, LibraryEmptyError, StaleEntryError, UnsavedChangesError
 from .entry import getEntryRaw
-from .query import CrossRef, Query
-from .utils import removeBraces
+from .history import History
+from .index import Index, entryIds
+from .query import Query, makeQuery
+from .rendercache import RenderCache
+from .search import LIMIT, SearchIndex
+from .snapshot import fingerprint, saveSnapshot, snapshotMatches
+from .spans import span, timed
+from .watch import DiskState, FileChanges, fileStat, sameText, scanEntries
+from .writebehind import DELAY, MAX_DELAY, WriteBehind
+
+class PendingWrites():
+    """
+    Changes to the library not written to the .bib file yet.
+
+    Attributes:
+        added (list): The entries added to the library, in order.
+        removed (list): The entries removed from the library that are in the .bib file.
+        rewrite (bool): Whether entries already in the .bib file were removed or changed, so that
+            the file must be rewritten rather than appended to.
+    """
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.rewrite = False
+
+    def __bool__(self) -> bool:
+        return bool(self.added) or self.rewrite
+
+    def isAdded(self, block) -> bool:
+        return any(added is block for added in self.added)
+
+    def removeBlock(self, block) -> None:
+        if self.isAdded(block):
+            # Never written, so there is nothing to cut out of the file.
+            self.added = [added for added in self.added if added is not block]
+        else:
+            self.removed.append(block)
+            self.rewrite = True
+
+    def changeBlock(self, block) -> None:
+        if not self.isAdded(block):
+            self.rewrite = True
+
+    def merge(self, other) -> None:
+        self.added.extend(other.added)
+        self.removed.extend(other.removed)
+        self.rewrite = self.rewrite or other.rewrite
+
+class Transaction(PendingWrites):
+    """
+    The changes made to the library within Processor.transaction(), to be written or undone at once.
+
+    Attributes:
+        blocks (list): The blocks of the library when the transaction began, in order.
+        edited (dict): The key, fields and raw text of the entries of the library before they
+            first changed, by the identity of the entry.
+        unsaved (dict): The entries with changes not written to the .bib file when the
+            transaction began (see Processor.reload).
+        disk (DiskState): What the .bib file held before it was reloaded within the transaction.
+        reloaded (list): The entries added to or removed from the library by a reload.
+    """
+
+    def __init__(self, library, unsaved):
+        super().__init__()
+        self.blocks = list(library.blocks)
+        self.edited = dict()
+        self.unsaved = dict(unsaved)
+        self.disk = None
+        self.reloaded = []
+
+    def remember(self, block) -> None:
+        # Keeps the state of an entry before its first change, to restore it on rollback.
+        if id(block) not in self.edited:
+            self.edited[id(block)] = (block, block.key, list(block.fields), block._raw)
+
+def synchronized(method):
+    # Changes to the library are not interleaved with each other or with a background flush.
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class Processor():
     """
@@ -13,27 +99,71 @@ class Processor():
 
     Attributes:
         library (Library): The library object that stores the blocks.
-        queryHistory (TypedList): A typed list that stores the query history.
+        history (History): The query history, journaled to disk.
+        queryHistory (list): The queries in the query history, oldest first.
+        index (Index): Hash indexes of the library entries by key and article ID.
+        lookup (Index): The index keys and article IDs are checked against for collisions:
+            the index, or the SharedIndex of a Workspace.
+        bib (str): The path of the .bib file the library is written to.
+        renderCache (RenderCache): The one-line summaries of the entries shown in lists.
+        serializedCache (SerializedCache): The text of the entries as written to the .bib file.
+            Every change to the key or fields of an entry must mark it dirty.
+        searchIndex (SearchIndex): The full-text index of the entries, built on first use.
+        persistSearch (bool): Whether the search index is saved next to the .bib file.
+        writeError (Exception): Why the changes pending in write-behind mode could not be written
+            in the background, if they could not.
 
     Methods:
-        __init__(self, library): Initializes a Processor object with a library.
-        processQuery(self, input): Processes a query and adds it to the query history.
-        add(self, block): Adds a block to the library and writes the library to .bib file.
-        remove(self, block): Removes a block from the library and writes the library .bib file.
-        write(self): Writes the library to .bib file.
+        __init__(self, library, history): Initializes a Processor object with a library.
+        processQuery(self, input, record): Processes a query and adds it to the query history.
+        recordQuery(self, query): Adds a processed query to the query history.
+        add(self, block): Adds a block to the library and appends it to the .bib file.
+        addAll(self, blocks): Adds blocks to the library and appends them to the .bib file at once.
+        remove(self, block): Removes a block from the library and cuts it out of the .bib file.
+        removeAll(self, blocks): Removes blocks from the library and rewrites the .bib file once.
+        transaction(self): Groups changes to the library into a single write, undone on failure.
+        enableWriteBehind(self, delay, maxDelay): Writes changes in the background instead of at once.
+        flush(self): Writes the changes pending in write-behind mode.
+        close(self): Flushes pending changes, stops writing behind and saves the snapshot.
+        reload(self, resolve): Picks up the entries edited in the .bib file outside citeman.
+        search(self, query, limit): Finds the entries matching a query.
+        findDuplicates(self, threshold): Finds entries that appear to be the same work.
+        mergeDuplicates(self, groups): Merges groups of duplicate entries.
+        compact(self, history): Rewrites the whole library to .bib file.
         getQuery(self, index): Retrieves a query from the query history based on the index.
         getLastQuery(self): Retrieves the last query from the query history.
     """
 
-    def __init__(self, library):
+    bib = 'bibliography.bib'
+    persistSearch = True
+
+    def __init__(self, library, history=None, bib=None):
         """
         Initializes a Processor object with a library.
 
         Args:
             library (Library): The library object that stores the entries.
+            history (History): The query history. Defaults to the journal in the working directory.
+            bib (str): The .bib file of the library. Defaults to bibliography.bib in the working directory.
         """
+        if bib is not None:
+            self.bib = bib
         self.library = library
-        self._queryHistory = list()
+        with span('processor.index'):
+            self.index = Index(library.entries)
+        self.lookup = self.index
+        self.history = history if history is not None else History()
+        self.renderCache = RenderCache()
+        self.serializedCache = SerializedCache()
+        self._searchIndex = None
+        self._transaction = None
+        self._pendingWrites = None
+        self._writeBehind = None
+        self._lock = RLock()
+        self._disk = DiskState.fromLibrary(self.bib, library)
+        # The entries of the .bib file changed in the library but not written yet,
+        # with their key in the file, by identity.
+        self._unsaved = dict()
 
     @property
     def entries(self):
@@ -43,23 +173,69 @@ class Processor():
 
     @property 
     def queryHistory(self):
-        if not self._queryHistory:
+        if not self.history.records:
             raise HistoryEmptyError()
-        return self._queryHistory
+        return self.history.records
     
     def overwriteLibrary(self, library):
         self.library = library
+        self.index = Index(library.entries)
+        self.lookup = self.index
+        self.renderCache = RenderCache()
+        self.serializedCache = SerializedCache()
+        self._searchIndex = None
+        self._disk = DiskState.fromLibrary(self.bib, library)
+        self._unsaved = dict()
 
-    def save(self):
-        with open('citeman.p', 'wb') as f:
-            dump(self, f)
+    @property
+    def writeError(self):
+        writeBehind = self._writeBehind
+        return writeBehind.error if writeBehind is not None else None
+
+    @property
+    def searchIndex(self) -> SearchIndex:
+        # Built on first use rather than at startup, then kept up to date by add and remove.
+        if self._searchIndex is None:
+            entries = self.library.entries
+            with span('search.load'):
+                index = SearchIndex.load(self.bib, entries) if self.persistSearch else None
+            if index is None:
+                with span('search.build'):
+                    index = SearchIndex(entries)
+                if self.persistSearch:
+                    with span('search.save'):
+                        index.save(self.bib, entries)
+            self._searchIndex = index
+        return self._searchIndex
+
+    @timed('processor.search')
+    def search(self, query, limit=LIMIT) -> list:
+        """
+        Finds the entries matching every word of a query in their author, title, year,
+        journal, key or DOI. Words also match as prefixes (e.g., 'card' finds 'cardiac').
+
+        Args:
+            query (str): The words to look for.
+            limit (int): Maximum number of results, or None for all.
+
+        Returns:
+            list: The matching entries, best first.
+        """
+        return self.searchIndex.search(query, limit)
 
-    def processQuery(self, input):
+    @timed('processor.processQuery')
+    def processQuery(self, input, record=True):
         """
         Processes a query and adds it to the query history.
+        Safe to call from several threads at once, e.g., by a QueryPipeline.
 
         Args:
             input (str): The article ID to query.
+            record (bool): Whether to add the query to the query history; if not, the caller
+                adds it with recordQuery.
+
+        Returns:
+            Query: The processed query.
 
         Raises:
             Exception: If an error occurs while processing the query.
@@ -67,36 +243,261 @@ class Processor():
             handled in the Query class.
         """
         try:
-            query = CrossRef(input)
-            self._queryHistory.append(query)
+            query = makeQuery(input)
+            if record:
+                self.recordQuery(query)
+            return query
         except:
             raise
+
+    @synchronized
+    def recordQuery(self, query) -> None:
+        # Only the history is shared; the network requests run concurrently.
+        self.history.append(query)
     
+    @timed('processor.add')
+    @synchronized
     def add(self, block) -> None:
         """
-        Adds a block to the library and writes the library to .bib file.
+        Adds a block to the library and appends it to the .bib file.
 
         Args:
             block (Block): The block to be added to the library.
+
+        Raises:
+            KeyExistsError: If an entry with the same key is in the library.
         """
-        try:
-            self.library.add(block, fail_on_duplicate_key=True)
-        except:
-            raise
+        pending = self._pending()
+        if pending is None:
+            # An entry with the key may have been added to the file outside citeman.
+            self._reload(pending)
+        # Checked first, as the library keeps a block with a duplicate key even when it fails.
+        self.keyExists(block.key)
+        self.library.add(block, fail_on_duplicate_key=True)
+        self.index.add(block)
+        if self._searchIndex is not None:
+            self._searchIndex.add(block)
+        if pending is not None:
+            pending.added.append(block)
+            self._notify()
+        else:
+            self._append([block])
 
-        self._write()
-        self.save()
+    @timed('processor.addAll')
+    def addAll(self, blocks) -> None:
+        """
+        Adds several blocks to the library and appends them to the .bib file in a single write.
+        If any of them cannot be added, none are.
 
+        Args:
+            blocks (list): The blocks to be added to the library.
+        """
+        with self.transaction():
+            for block in blocks:
+                self.add(block)
+
+    @timed('processor.remove')
+    @synchronized
     def remove(self, block) -> None:
         """
-        Removes a block from the library and writes the library to .bib file.
+        Removes a block from the library and cuts it out of the .bib file.
 
         Args:
             block (Block): The block to be removed from the library.
+
+        Raises:
+            StaleEntryError: If the entry was changed or removed in the .bib file outside citeman,
+                so that the library holds its version in the file, if any, instead.
+            ExternalEditError: If entries changed in the library were also changed in the file.
         """
+        pending = self._pending()
+        if pending is None:
+            self._reload(pending)
+        if isinstance(block, Entry) and block not in self.index:
+            raise StaleEntryError([block.key])
         self.library.remove(block)
+        self._forget(block)
+        if pending is None:
+            key = self._fileKey(block)
+            removeEntry(self.bib, key)
+            self._unsaved.pop(id(block), None)
+            self._disk.texts.pop(key, None)
+            self._disk.stat = fileStat(self.bib)
+        else:
+            pending.removeBlock(block)
+            self._notify()
+
+    @timed('processor.removeAll')
+    @synchronized
+    def removeAll(self, blocks) -> None:
+        """
+        Removes several blocks from the library and rewrites the .bib file once.
+        If the write fails, none are removed.
+
+        Args:
+            blocks (list): The blocks to be removed from the library.
+
+        Raises:
+            StaleEntryError: If entries were changed or removed in the .bib file outside citeman.
+        """
+        blocks = list(blocks)
+        with self.transaction() as transaction:
+            self._reload(transaction)
+            stale = [block.key for block in blocks if block not in self.index]
+            if stale:
+                raise StaleEntryError(stale)
+            removed = {id(block) for block in blocks}
+            # Removing blocks one at a time from a large library is quadratic.
+            self.library = Library([block for block in self.library.blocks if id(block) not in removed])
+            for block in blocks:
+                self._forget(block)
+                transaction.removeBlock(block)
+
+    def _forget(self, block) -> None:
+        # Drops a block removed from the library from its indexes and caches.
+        self.index.remove(block)
+        if self._searchIndex is not None:
+            self._searchIndex.remove(block)
+        self.renderCache.discard(block.key)
+        self.serializedCache.markDirty(block)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups changes to the library so that they are written to the .bib file at once, or not at all.
+
+        Within the transaction, add, addAll, remove, updateField, addField and updateKey change
+        the library and its indexes, and are validated against them (e.g., adding a duplicate key
+        raises KeyExistsError), but nothing is written. When the transaction ends, the added
+        entries are appended to the .bib file in a single write, or the file is rewritten once if
+        entries already in it were removed or changed. If the transaction raises, or the write
+        fails, every change to the library is undone and the exception propagates.
+        A transaction started within another one is part of the outer one.
+
+        Example:
+            with processor.transaction():
+                for block in blocks:
+                    processor.add(block)
+
+        Yields:
+            Transaction: The changes made so far.
+        """
+        if self._transaction is not None:
+            yield self._transaction
+            return
+        # Held throughout, so that a background flush never writes half a transaction.
+        with self._lock:
+            transaction = self._transaction = Transaction(self.library, self._unsaved)
+            try:
+                yield transaction
+                self._commit(transaction)
+            except BaseException:
+                self._rollback(transaction)
+                raise
+            finally:
+                self._transaction = None
+
+    @timed('processor.commit')
+    def _commit(self, transaction) -> None:
+        if self._writeBehind is not None:
+            self._pendingWrites.merge(transaction)
+            self._writeBehind.changed()
+        else:
+            self._writePending(transaction)
+
+    def _writePending(self, pending) -> None:
+        self._reload(pending)
+        if pending.rewrite:
+            self._writeLibrary()
+        elif pending.added:
+            self._append(pending.added)
+
+    def _append(self, blocks) -> None:
+        appendEntries(self.bib, blocks, self.serializedCache)
+        texts = self._disk.texts
+        for block in blocks:
+            texts[block.key] = self.serializedCache.serialize(block)
+        self._disk.stat = fileStat(self.bib)
+
+    def _pending(self):
+        """
+        Returns where changes to the .bib file are recorded instead of being written at once:
+        the transaction in progress, else the pending writes in write-behind mode, else None.
+        """
+        if self._transaction is not None:
+            return self._transaction
+        return self._pendingWrites
+
+    def _notify(self) -> None:
+        # A transaction signals its changes once, when it is committed.
+        if self._writeBehind is not None and self._transaction is None:
+            self._writeBehind.changed()
+
+    @timed('processor.rollback')
+    def _rollback(self, transaction) -> None:
+        touched = dict()
+        for block, key, fields, raw in transaction.edited.values():
+            self.renderCache.discard(block.key)
+            block.key = key
+            block.fields = fields
+            block._raw = raw
+            touched[id(block)] = block
+        for block in transaction.added + transaction.removed + transaction.reloaded:
+            touched[id(block)] = block
+        self.library = Library(transaction.blocks)
+        self._unsaved = transaction.unsaved
+        if transaction.disk is not None:
+            # Reloaded again by the next write, as the library is back to before the reload.
+            self._disk = transaction.disk
+        present = {id(block) for block in transaction.blocks}
+        for block in touched.values():
+            self.renderCache.discard(block.key)
+            self.serializedCache.markDirty(block)
+            if id(block) in present:
+                self.index.add(block)
+                if self._searchIndex is not None:
+                    self._searchIndex.add(block)
+            else:
+                self.index.remove(block)
+                if self._searchIndex is not None:
+                    self._searchIndex.remove(block)
+
+    def _changing(self, block) -> None:
+        """
+        Records that the key or fields of a block are about to change, so that the transaction
+        in progress can undo the change and rewrites the .bib file if the block is in it.
+        """
+        if block not in self.index:
+            return
+        transaction = self._transaction
+        if transaction is not None:
+            transaction.remember(block)
+            transaction.changeBlock(block)
+        pending = self._pending()
+        if id(block) not in self._unsaved and (pending is None or not pending.isAdded(block)):
+            self._unsaved[id(block)] = (block, block.key)
+
+    def _fileKey(self, block) -> str:
+        # The key of an entry in the .bib file, which differs from its key in the library
+        # until a changed key is written.
+        unsaved = self._unsaved.get(id(block))
+        return unsaved[1] if unsaved is not None else block.key
+
+    @timed('processor.compact')
+    @synchronized
+    def compact(self, history=True) -> None:
+        """
+        Rewrites the whole library to .bib file, normalizing its formatting,
+        and rewrites the query history journal without evicted records.
+
+        Args:
+            history (bool): Whether to rewrite the query history journal too, e.g., not when
+                several processors share it.
+        """
         self._write()
-        self.save()
+        if history:
+            self.history.compact()
+        self._saveCaches()
 
     @staticmethod
     def updateEntryRaw(block) -> None:
@@ -109,75 +510,363 @@ class Processor():
         except:
             raise CriticalFieldException(field)
 
-    @staticmethod
-    def updateField(block, field, value) -> None:
+    @contextmanager
+    def _editing(self, block):
+        """
+        Changes the key or fields of an entry of the library within a transaction, so that the
+        change is written like any other (at once, when the enclosing transaction ends, or in
+        the background) and undone if the write fails. Other blocks, e.g., the result of a query
+        not added yet, are only changed in memory.
+        """
+        if block not in self.index:
+            yield
+            return
+        with self.transaction():
+            self._changing(block)
+            yield
+
+    @timed('processor.updateField')
+    @synchronized
+    def updateField(self, block, field, value) -> None:
         try:
             Processor.fieldMissing(block, field)
         except:
             raise
         
-        block.set_field(Field(field, value))
-        Processor.updateEntryRaw(block)
+        with self._editing(block):
+            block.set_field(Field(field, value))
+            Processor.updateEntryRaw(block)
+            self._reindex(block)
+            self.renderCache.discard(block.key)
+            self.serializedCache.markDirty(block)
 
-    @staticmethod
-    def addField(block, field, value) -> None:
+    @timed('processor.addField')
+    @synchronized
+    def addField(self, block, field, value) -> None:
         try:
             Processor.fieldExists(block, field)
         except:
             raise
 
-        block.set_field(Field(field, value))
-        Processor.updateEntryRaw(block)
+        with self._editing(block):
+            block.set_field(Field(field, value))
+            Processor.updateEntryRaw(block)
+            self._reindex(block)
+            self.renderCache.discard(block.key)
+            self.serializedCache.markDirty(block)
 
-    @staticmethod
-    def updateKey(block, key) -> None:
+    @timed('processor.updateKey')
+    @synchronized
+    def updateKey(self, block, key) -> None:
         """
         Changes the key of a block in the library.
 
         Args:
             block (Block): The block whose key is to be changed.
             key (str): The new key to assign to the block.
+
+        Raises:
+            KeyExistsError: If another entry of the library has the key.
         """
-        block.key = key
-        block._raw = getEntryRaw(block)
+        if block in self.index:
+            other = self.lookup.keys.get(key)
+            if other is not None and other is not block:
+                raise KeyExistsError(key)
+        with self._editing(block):
+            if block in self.index:
+                # The library keeps its own map of keys to entries.
+                entries = self.library._entries_by_key
+                if entries.get(block.key) is block:
+                    del entries[block.key]
+                    entries[key] = block
+            self.renderCache.discard(block.key)
+            self.serializedCache.markDirty(block)
+            block.key = key
+            block._raw = getEntryRaw(block)
+            self._reindex(block)
+
+    def _reindex(self, block) -> None:
+        """
+        Refreshes the index of a block already in the library after its key or fields changed.
+        Blocks not yet in the library (e.g., a fresh query result) are left alone.
+        """
+        if block in self.index:
+            self.index.add(block)
+            if self._searchIndex is not None:
+                self._searchIndex.add(block)
 
     def _write(self) -> None:
         """
-        Writes the library to .bib file.
+        Writes the library to .bib file. Only the entries that changed since they were
+        last written are serialized again.
+
+        Raises:
+            ExternalEditError: If entries changed in the library were also changed in the file.
         """
-        bib = 'bibliography.bib'
-        write_file(bib, self.library)
+        self._reload(self._pending())
+        self._writeLibrary()
+
+    def _writeLibrary(self) -> None:
+        blocks = self.library.blocks
+        texts = writeBlocks(self.bib, blocks, self.serializedCache)
+        self._disk = DiskState(fileStat(self.bib), {
+            block.key: text for block, text in zip(blocks, texts) if type(block) is Entry
+        })
+        self._unsaved = dict()
+        if self._pendingWrites is not None:
+            # The file now holds every change, including those pending.
+            self._pendingWrites = PendingWrites()
+
+    @timed('processor.reload')
+    @synchronized
+    def reload(self, resolve=None):
+        """
+        Picks up the entries edited in the .bib file outside citeman (e.g., in a text editor)
+        since citeman last read or wrote it. Only the entries whose text changed are parsed again;
+        they replace their old versions in the library and its indexes. Entries removed from the
+        file are removed from the library, and those added are added.
+
+        Entries also changed in the library and not written yet (edited, added or removed within
+        a transaction or in write-behind mode) are conflicts: by default nothing is reloaded and
+        ExternalEditError is raised, as it is by every write until the conflicts are resolved.
+        The file is checked before every write, so edits made outside citeman are never
+        overwritten.
+
+        Args:
+            resolve (str): How conflicts are resolved: 'file' keeps the version in the file,
+                dropping the changes made in citeman, and 'library' keeps the version in citeman,
+                to be written over the file.
+
+        Returns:
+            FileChanges: The entries edited outside citeman, or None if the file is unchanged.
+
+        Raises:
+            ExternalEditError: If there are conflicts and resolve is not given.
+        """
+        return self._reload(self._pending(), resolve)
+
+    def _reload(self, pending, resolve=None):
+        stat = fileStat(self.bib)
+        if stat == self._disk.stat:
+            return None
+        text = ''
+        if stat is not None:
+            with open(self.bib, 'rb') as f:
+                text = f.read().decode('utf-8')
+        disk = self._disk
+        added = pending.added if pending is not None else []
+        removed = pending.removed if pending is not None else []
+        addedIds = {id(block) for block in added}
+        removedIds = {id(block) for block in removed}
+
+        # The entries of the library as they are in the file, by their key there.
+        onDisk = {self._fileKey(block): block for block in self.library.entries if id(block) not in addedIds}
+        onDisk.update((self._fileKey(block), block) for block in removed)
+
+        def unchanged(key, text):
+            return key in onDisk and key in disk.texts and sameText(disk.texts[key], text)
+
+        changes = FileChanges()
+        # (key, block, parsed) of the blocks of the file in order, key being None for other blocks.
+        fileBlocks = None
+        texts = dict()
+        scanned = scanEntries(text)
+        if scanned is not None:
+            stale = [entryText for key, entryText in scanned if not unchanged(key, entryText)]
+            parsed = parse_string("\n\n".join(stale)).blocks if stale else []
+            if len(parsed) == len(stale) and all(type(block) is Entry for block in parsed):
+                parsed = iter(parsed)
+                fileBlocks = []
+                for key, entryText in scanned:
+                    texts[key] = entryText
+                    if unchanged(key, entryText):
+                        fileBlocks.append((key, onDisk[key], False))
+                    else:
+                        fileBlocks.append((key, next(parsed), True))
+                changes.parsed = len(stale)
+        if fileBlocks is None:
+            # Comments, @string blocks or syntax errors: parse the whole file.
+            fileBlocks = []
+            for block in parse_string(text).blocks:
+                if type(block) is not Entry:
+                    fileBlocks.append((None, block, True))
+                    continue
+                texts[block.key] = block.raw
+                if unchanged(block.key, block.raw):
+                    fileBlocks.append((block.key, onDisk[block.key], False))
+                else:
+                    fileBlocks.append((block.key, block, True))
+                    changes.parsed += 1
+
+        for key, block, parsed in fileBlocks:
+            if key is not None and parsed:
+                (changes.changed if key in disk.texts else changes.added).append(key)
+        changes.removed = [key for key in disk.texts if key not in texts]
+
+        # Keys with changes in citeman not written yet, in the file or the library.
+        unsaved = {key for _, key in self._unsaved.values()}
+        unsaved.update(block.key for block, _ in self._unsaved.values())
+        removedKeys = {self._fileKey(block) for block in removed}
+        unsaved.update(removedKeys)
+        unsaved.update(block.key for block in added)
+        conflicts = [key for key in changes.changed + changes.added if key in unsaved]
+        conflicts += [key for key in changes.removed if key in unsaved and key not in removedKeys]
+        changes.conflicts = conflicts
+        if conflicts and resolve not in ('file', 'library'):
+            raise ExternalEditError(conflicts)
+
+        conflicting = set(conflicts)
+        mine = resolve == 'library'
+        blocks = []
+        for key, block, parsed in fileBlocks:
+            if key in conflicting and mine:
+                block = onDisk.get(key)
+                if block is not None and id(block) not in removedIds:
+                    blocks.append(block)
+            elif parsed or id(block) not in removedIds:
+                blocks.append(block)
+        if mine:
+            for key in changes.removed:
+                block = onDisk.get(key)
+                if key in conflicting and block is not None and id(block) not in removedIds:
+                    blocks.append(block)
+        elif conflicting and pending is not None:
+            # The versions in the file replace the changes made in citeman.
+            pending.added = [block for block in added if block.key not in conflicting]
+            pending.removed = [block for block in removed if self._fileKey(block) not in conflicting]
+        blocks.extend(pending.added if pending is not None else [])
+
+        library = Library(blocks)
+        before = {id(block): block for block in self.library.entries}
+        after = {id(block): block for block in library.entries}
+        gone = [block for ident, block in before.items() if ident not in after]
+        came = [block for ident, block in after.items() if ident not in before]
+        for block in gone:
+            self.index.remove(block)
+            if self._searchIndex is not None:
+                self._searchIndex.remove(block)
+            self.renderCache.discard(block.key)
+            self.serializedCache.markDirty(block)
+        for block in came:
+            self.index.add(block)
+            if self._searchIndex is not None:
+                self._searchIndex.add(block)
+        transaction = self._transaction
+        if transaction is not None:
+            if transaction.disk is None:
+                transaction.disk = disk
+            transaction.reloaded.extend(gone + came)
+        kept = {id(block) for block in (pending.removed if pending is not None else [])}
+        self._unsaved = {ident: unsaved for ident, unsaved in self._unsaved.items() if ident in after or ident in kept}
+        self.library = library
+        self._disk = DiskState(stat, texts)
+        if conflicting and mine and pending is not None:
+            pending.rewrite = True
+        return changes
+
+    @timed('processor.flush')
+    @synchronized
+    def flush(self) -> None:
+        """
+        Writes the changes pending in write-behind mode to the .bib file: the added entries are
+        appended in a single write, or the file is rewritten once if entries in it were removed.
+        Does nothing outside write-behind mode, where changes are written as they are made.
+        """
+        pending = self._pendingWrites
+        if not pending:
+            return
+        self._pendingWrites = PendingWrites()
+        try:
+            self._writePending(pending)
+            if self._writeBehind is not None:
+                self._writeBehind.error = None
+        except BaseException:
+            # What the file holds is unknown after a failed append, so the next flush rewrites it.
+            pending.merge(self._pendingWrites)
+            pending.rewrite = True
+            self._pendingWrites = pending
+            raise
+
+    def enableWriteBehind(self, delay=DELAY, maxDelay=MAX_DELAY) -> None:
+        """
+        Makes changes to the library return without writing the .bib file. A background thread
+        writes them once no change was made for delay seconds, or at the latest maxDelay seconds
+        after the first change not written yet, coalescing the changes in between into a single
+        write. Pending changes are written by flush, by close and at exit.
+
+        Args:
+            delay (float): Seconds without a change after which the changes are written.
+            maxDelay (float): Seconds after the first change by which the changes are written.
+        """
+        with self._lock:
+            if self._writeBehind is not None:
+                return
+            self._pendingWrites = PendingWrites()
+            self._writeBehind = WriteBehind(self.flush, delay, maxDelay)
+
+    def close(self) -> None:
+        """
+        Writes the pending changes, leaves write-behind mode and saves the snapshot and search
+        index of the library as it was written, so that the next start needs no parse.
+        Safe to call more than once.
+
+        Raises:
+            UnsavedChangesError: If the pending changes cannot be written. They are kept, and
+                written by the next flush or close.
+        """
+        writeBehind = self._writeBehind
+        if writeBehind is not None:
+            try:
+                writeBehind.close()
+            except Exception as e:
+                raise UnsavedChangesError(self.bib, e) from e
+            with self._lock:
+                self._writeBehind = None
+                self._pendingWrites = None
+        self._saveCaches()
+
+    @timed('processor.saveCaches')
+    @synchronized
+    def _saveCaches(self) -> None:
+        """
+        Saves the snapshot and search index of the .bib file if citeman wrote it since they were
+        saved: every write changes the fingerprint of the file, so the next start would parse
+        the file and build the index again. Once every change is written, the library is what
+        the file holds.
+        """
+        if self._unsaved or self._pendingWrites or self._disk.changed(self.bib):
+            # Changes not written yet, or edits made outside citeman: the next start parses the file.
+            return
+        try:
+            with open(self.bib, 'rb') as f:
+                current = fingerprint(self.bib, f.read())
+        except OSError:
+            return
+        if snapshotMatches(self.bib, current):
+            return
+        saveSnapshot(self.bib, self.library, current, self._disk.texts)
+        if self.persistSearch and self._searchIndex is not None:
+            self._searchIndex.save(self.bib, self.library.entries)
 
     def idExists(self, query):
         """
-        Compares a given article ID with the library.
+        Compares the article ID of a given query, and any other article ID
+        found in its citation (e.g., the DOI of a PMID query), with the library.
 
         Args:
-            id (str): The article ID to compare.
+            query (Query): The query whose article ID to compare.
 
         Returns:
             bool: True if the article ID is in the library, False otherwise.
         """
-        try:
-            entries = self.entries
-        except LibraryEmptyError:
-            return False
-        type = query.type
-        for entry in entries:
-            id = removeBraces(entry.get(type).value)
-            if id is not None and id == query.id:
-                    return True
-            else:
-                return False
+        if self.lookup.hasId(query.type, query.id):
+            return True
+        block = getattr(query, 'block', None)
+        return block is not None and any(id in self.lookup.ids for id in entryIds(block))
     
     def keyExists(self, key):
-        try:
-            entries = self.entries
-        except LibraryEmptyError:
-            return
-        for entry in entries:
-            if entry.key == key:
-                raise KeyExistsError(key)
+        if self.lookup.hasKey(key):
+            raise KeyExistsError(key)
     
     @staticmethod
     def fieldExists(block, field):
@@ -189,13 +878,54 @@ class Processor():
         if block.get(field) is None:
             raise FieldMissingError(field)
     
-    # MIGHT NOT BE NEEDED
-    def removeDuplicateBlocks(self):
+    @timed('processor.findDuplicates')
+    def findDuplicates(self, threshold=SIMILARITY) -> list:
         """
-        Removes duplicate blocks from the library.
+        Finds entries that appear to be the same work, e.g., the same paper under two keys
+        or with and without a DOI.
+
+        Args:
+            threshold (float): The minimum title similarity of duplicates without a shared identifier.
+
+        Returns:
+            list: The DuplicateGroups found.
+        """
+        return findDuplicates(self.library.entries, threshold)
+
+    @timed('processor.mergeDuplicates')
+    @synchronized
+    def mergeDuplicates(self, groups) -> None:
+        """
+        Merges each group of duplicates into the entry it keeps: fields the kept entry lacks
+        are copied from the duplicates, which are then removed. Blocks repeating the key of
+        an earlier entry (DuplicateBlockKeyBlock), which the library ignores, are dropped too.
+        The .bib file is rewritten once, or left as it was if the write fails.
+
+        Args:
+            groups (list): The DuplicateGroups to merge, e.g., from findDuplicates.
+
+        Raises:
+            StaleEntryError: If entries of the groups were changed or removed in the .bib file outside citeman.
         """
-        duplicates = [block for block in self.library.blocks if isinstance(block, DuplicateBlockKeyBlock)]
-        self.library.remove(duplicates)
+        with self.transaction() as transaction:
+            self._reload(transaction)
+            stale = [entry.key for group in groups for entry in [group.keep] + group.duplicates
+                     if entry not in self.index]
+            if stale:
+                raise StaleEntryError(stale)
+            for group in groups:
+                keep = group.keep
+                present = {field.key.lower() for field in keep.fields}
+                for entry in group.duplicates:
+                    for field in entry.fields:
+                        if field.key.lower() not in present:
+                            self.addField(keep, field.key, field.value)
+                            present.add(field.key.lower())
+            self.removeAll(entry for group in groups for entry in group.duplicates)
+            dropped = [block for block in self.library.blocks if isinstance(block, DuplicateBlockKeyBlock)]
+            if dropped:
+                self.library = Library([block for block in self.library.blocks if not isinstance(block, DuplicateBlockKeyBlock)])
+                transaction.rewrite = True
 
     def getQuery(self, index) -> Query:
         """
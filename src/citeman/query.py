@@ -1,9 +1,13 @@
 from abc import ABCMeta, abstractmethod
 from enum import Enum
 from typing import Type
-from habanero import cn
-from requests import HTTPError
+from bibtexparser import parse_string, write_string
+from threading import Lock
+from time import time
 from .entry import EntrySplitter, getEntryRaw
+from .resolver import sharedClient
+from .spans import span
+import os
 import re
 import warnings
 import six
@@ -14,14 +18,21 @@ import six
 
 @six.add_metaclass(ABCMeta)
 class Query:
+    # A ResolverCache shared by all queries, or None to always resolve.
+    cache = None
+    # The format requested from the resolver, part of the cache key.
+    format = 'bibtex'
+
     def __init__(self, id: Type[str]) -> None:
+        self.time = time()
         self.success = True
         self.id = self._handleId(id)
         self.type = self._handleType()
         self.result = self._handleResult()
         self.block = self._handleBlock()
         self.raw = self._handleRaw()
-        self.block._raw = self._handleEntryRaw()
+        if self.block is not None:
+            self.block._raw = self._handleEntryRaw()
 
     def _fail(self, result):
         self.success = False
@@ -53,19 +64,22 @@ class Query:
         return None
 
     def _type(self, id):
-        for reid in ReID:
-            if bool(re.search(reid.value, id, flags=re.I)):
-                return reid.name
-        raise ValueError("ID is not a valid article identifier")
+        return classify(id)
 
     def _handleResult(self):
         if not self.success:
             return self.result
+        # requests is only imported once the first query is made.
+        from requests import HTTPError, RequestException
         try:
-            return self._result(self.id)
+            with span('query.resolve'):
+                return self._cachedResult(self.id)
         except HTTPError:
             error = f"Unable to find {self.id}"
             self._fail(error)
+        except RequestException:
+            error = f"Unable to reach the resolver for {self.id}"
+            self._fail(error)
         except ValueError as e:
             self._fail(e)
         except TypeError as e:
@@ -74,13 +88,33 @@ class Query:
             raise
         return self.result
 
+    def _cachedResult(self, id):
+        from requests import HTTPError
+        cache = Query.cache
+        if cache is None:
+            return self._result(id)
+        hit, result = cache.get(self.type, id, self.format)
+        if hit:
+            if result is None:
+                raise HTTPError(f"404 Client Error: cached as not found: {id}")
+            return result
+        try:
+            result = self._result(id)
+        except HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                cache.putMissing(self.type, id, self.format)
+            raise
+        cache.put(self.type, id, self.format, result)
+        return result
+
     @abstractmethod
     def _result(id):
         pass
 
     def _handleBlock(self):
         if self.success:
-            block = EntrySplitter(self.result).split()
+            with span('query.split'):
+                block = EntrySplitter(self.result).split()
             self.result = f"Found {self.type} {self.id}"
             return block
         return None
@@ -92,17 +126,197 @@ class Query:
 
     def _handleEntryRaw(self):
         if self.success and self.raw is not None:
-            return getEntryRaw(self.block)
+            with span('query.entryRaw'):
+                return getEntryRaw(self.block)
 
 class ReID(Enum):
     DOI = r"10\.\d{4,9}\/[-._;()/:A-Z0-9]+$"
+    PMCID = r"^PMC\d+$"
     PMID = r"^\d+$"
 
+# The patterns of ReID, compiled once rather than on every classification.
+PATTERNS = [(reid.name, re.compile(reid.value, flags=re.I)) for reid in ReID]
+
+def classify(id):
+    """
+    Determines the type of an article ID.
+
+    Args:
+        id (str): The article ID.
+
+    Returns:
+        str: The name of the matching ReID.
+
+    Raises:
+        ValueError: If the ID is not a valid article identifier.
+    """
+    for name, pattern in PATTERNS:
+        if pattern.search(id):
+            return name
+    raise ValueError("ID is not a valid article identifier")
+
+def notFound(id):
+    """
+    Builds the HTTPError a resolver raises for an unknown article ID, as a 404 so it is cached.
+    """
+    from requests import HTTPError, Response
+    response = Response()
+    response.status_code = 404
+    return HTTPError(f"404 Client Error: Not Found: {id}", response=response)
+
 class CrossRef(Query):
-   
-    @staticmethod
-    def _result(id):
-        try:
-            return cn.content_negotiation(id, format='bibtex', url="https://doi.org")
-        except:
-            raise
\ No newline at end of file
+    url = "https://doi.org"
+
+    @classmethod
+    def _result(cls, id):
+        # DOI content negotiation, through the shared pooled and rate-limited client.
+        response = sharedClient().get(f"{cls.url}/{id}", headers={'Accept': 'application/x-bibtex'})
+        response.raise_for_status()
+        response.encoding = 'UTF-8'
+        # Normalize the single-line BibTeX returned by the registries.
+        with span('query.normalize'):
+            return write_string(parse_string(response.text))
+
+class PubMed(Query):
+    """
+    Resolves PMIDs with the NCBI E-utilities esummary service.
+
+    PMIDs are looked up many per request: prefetch() resolves a whole list in batches
+    of batchSize and keeps the results until each PMID is queried.
+    """
+    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+    # The E-utilities database and the type of article ID it is looked up by.
+    db = 'pubmed'
+    idType = 'PMID'
+    batchSize = 200
+    _prefetched = dict()
+    _lock = Lock()
+
+    @classmethod
+    def _uid(cls, id):
+        # The ID of a record in the database.
+        return id
+
+    @classmethod
+    def prefetch(cls, ids) -> None:
+        """
+        Resolves article IDs in batches so that querying them afterwards needs no request.
+        IDs already in the resolver cache are skipped.
+
+        Args:
+            ids (list): The article IDs.
+        """
+        cache = Query.cache
+        ids = [id for id in dict.fromkeys(ids)
+               if id not in cls._prefetched and not (cache is not None and cache.has(cls.idType, id, cls.format))]
+        for start in range(0, len(ids), cls.batchSize):
+            batch = ids[start:start + cls.batchSize]
+            params = {'db': cls.db, 'retmode': 'json', 'tool': 'citeman', 'id': ','.join(cls._uid(id) for id in batch)}
+            if os.environ.get('NCBI_API_KEY'):
+                params['api_key'] = os.environ['NCBI_API_KEY']
+            response = sharedClient().get(f"{cls.url}/esummary.fcgi", params=params)
+            response.raise_for_status()
+            summaries = response.json().get('result', {})
+            with cls._lock:
+                for id in batch:
+                    summary = summaries.get(cls._uid(id))
+                    found = summary is not None and 'error' not in summary
+                    cls._prefetched[id] = summaryToBibtex(summary, cls.db) if found else None
+
+    @classmethod
+    def _result(cls, id):
+        with cls._lock:
+            prefetched = id in cls._prefetched
+        if not prefetched:
+            cls.prefetch([id])
+        with cls._lock:
+            result = cls._prefetched.pop(id, None)
+        if result is None:
+            raise notFound(id)
+        return result
+
+class PubMedCentral(PubMed):
+    """
+    Resolves PMCIDs with the E-utilities esummary service, as PubMed resolves PMIDs.
+    """
+    db = 'pmc'
+    idType = 'PMCID'
+    _prefetched = dict()
+
+    @classmethod
+    def _uid(cls, id):
+        # PMC records are looked up by the number of the PMCID.
+        return id[3:]
+
+def _bibtexValue(value):
+    return str(value).replace('{', '').replace('}', '').strip()
+
+def summaryToBibtex(summary, db='pubmed') -> str:
+    """
+    Converts an E-utilities esummary record into a BibTeX entry in the style of CrossRef's,
+    so that it can be read by EntrySplitter.
+
+    Args:
+        summary (dict): The esummary record of one PMID or PMCID.
+        db (str): The database of the record, 'pubmed' or 'pmc'.
+
+    Returns:
+        str: The BibTeX entry.
+    """
+    authors = []
+    for author in summary.get('authors', []):
+        if author.get('authtype', 'Author') != 'Author':
+            continue
+        # E-utilities names are "Surname Initials", e.g., "Smith JA".
+        name = _bibtexValue(author.get('name', ''))
+        surname, _, initials = name.rpartition(' ')
+        authors.append(f"{surname}, {initials}" if surname and initials.isupper() else name)
+    year = re.search(r"\d{4}", summary.get('pubdate', '') or summary.get('epubdate', ''))
+    year = year.group(0) if year else ''
+    articleIds = {i.get('idtype'): i.get('value') for i in summary.get('articleids', [])}
+    doi = articleIds.get('doi')
+    # PubMed records list the PMCID as 'pmc'; PMC records list the PMID as 'pmid'.
+    uid = _bibtexValue(summary.get('uid', ''))
+    pmid = uid if db == 'pubmed' else articleIds.get('pmid')
+    pmcid = articleIds.get('pmc') or articleIds.get('pmcid') or (f"PMC{uid}" if db == 'pmc' and uid else None)
+
+    surname = authors[0].split(',')[0] if authors else 'Anonymous'
+    key = re.sub(r"[^\w]", '', surname) + (f"_{year}" if year else '')
+    fields = [
+        ('title', _bibtexValue(summary.get('title', '')).rstrip('.')),
+        ('volume', _bibtexValue(summary.get('volume', ''))),
+        ('number', _bibtexValue(summary.get('issue', ''))),
+        ('pages', _bibtexValue(summary.get('pages', ''))),
+        ('journal', _bibtexValue(summary.get('fulljournalname') or summary.get('source', ''))),
+        ('author', ' and '.join(authors)),
+        ('year', year),
+        ('DOI', _bibtexValue(doi) if doi else ''),
+        ('PMID', _bibtexValue(pmid) if pmid else ''),
+        ('PMCID', _bibtexValue(pmcid) if pmcid else ''),
+    ]
+    body = ''.join(f",\n\t{name} = {{{value}}}" for name, value in fields if value)
+    return f"@article{{{key}{body}\n}}\n"
+
+# The Query subclass resolving each type of article ID.
+RESOLVERS = {
+    'DOI': CrossRef,
+    'PMID': PubMed,
+    'PMCID': PubMedCentral,
+}
+
+def makeQuery(id) -> Query:
+    """
+    Queries an article ID with the resolver for its type.
+    IDs of unknown type go to CrossRef, which reports them as invalid.
+
+    Args:
+        id (str): The article ID.
+
+    Returns:
+        Query: The processed query.
+    """
+    try:
+        type = classify(id) if isinstance(id, str) else None
+    except ValueError:
+        type = None
+    return RESOLVERS.get(type, CrossRef)(id)
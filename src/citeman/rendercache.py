@@ -0,0 +1,60 @@
+class RenderCache():
+    """
+    Remembers the one-line summaries of entries so lists of citations are not
+    re-formatted every time they are shown.
+
+    Summaries are keyed by entry key and stored with the raw text of the entry they
+    were rendered from; a summary is re-rendered when the raw text no longer matches.
+    The processor also discards the summary of an entry it changes or removes. The
+    summaries are rendered by the user interface (see ui_pretty.prettyPrintCached),
+    always with the same function.
+
+    Attributes:
+        hits (int): Number of summaries served from the cache.
+        misses (int): Number of summaries rendered.
+
+    Methods:
+        get(self, block, render): Returns the summary of a block.
+        getAll(self, blocks, render): Returns the summaries of a list of blocks.
+        discard(self, key): Forgets the summary of an entry.
+        stats(self): Returns the hit/miss counters.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lines = dict()
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def get(self, block, render) -> str:
+        cached = self._lines.get(block.key)
+        if cached is not None and cached[0] == block.raw:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        line = render(block)
+        self._lines[block.key] = (block.raw, line)
+        return line
+
+    def getAll(self, blocks, render) -> list:
+        return [self.get(block, render) for block in blocks]
+
+    def discard(self, key) -> None:
+        self._lines.pop(key, None)
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of this cache.
+
+        Returns:
+            dict: hits, misses, hitRate and size.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': self.hits / lookups if lookups else 0.0,
+            'size': len(self),
+        }
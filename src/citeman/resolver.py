@@ -0,0 +1,184 @@
+from email.utils import parsedate_to_datetime
+from .spans import span
+from threading import Lock
+from time import monotonic, sleep, time
+import os
+import random
+
+# Statuses worth retrying: rate limiting and transient server errors.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRIES = 4
+BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+RATE = 10.0
+BURST = 10
+POOL_SIZE = 10
+TIMEOUT = (5, 30)
+HOMEPAGE = "https://github.com/dylanrussellmd/citeman"
+
+class TokenBucket():
+    """
+    A thread-safe token bucket limiting the rate of requests.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (int): Maximum number of tokens, i.e., the allowed burst.
+    """
+
+    def __init__(self, rate=RATE, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = monotonic()
+        self._pausedUntil = 0.0
+        self._lock = Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a token is available, then takes it.
+        """
+        while True:
+            with self._lock:
+                now = monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._pausedUntil and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._pausedUntil - now, (1 - self._tokens) / self.rate)
+            sleep(wait)
+
+    def pause(self, seconds) -> None:
+        """
+        Stops handing out tokens for the given number of seconds, e.g., after a Retry-After.
+        """
+        with self._lock:
+            self._pausedUntil = max(self._pausedUntil, monotonic() + seconds)
+            self._tokens = 0.0
+
+def retryAfter(response):
+    """
+    Reads the Retry-After header of a response.
+
+    Returns:
+        float: Seconds to wait, or None if the header is absent or malformed.
+    """
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+    except (TypeError, ValueError):
+        return None
+
+class ResolverClient():
+    """
+    An HTTP client shared by the resolvers.
+
+    Keeps connections alive in a pool, retries rate-limited and transient failures with
+    exponential backoff and full jitter, and limits the request rate with a token bucket
+    that honours Retry-After. Identifies itself per the Crossref etiquette ("polite pool")
+    with a User-Agent carrying a mailto address when one is given (or set in $CITEMAN_MAILTO).
+
+    Methods:
+        get(self, url, **kwargs): Performs a GET request and returns the response.
+    """
+
+    def __init__(self, rate=RATE, burst=BURST, retries=RETRIES, backoff=BACKOFF,
+                 maxBackoff=MAX_BACKOFF, poolSize=POOL_SIZE, timeout=TIMEOUT, mailto=None):
+        # requests is imported here rather than at startup, as it is slow to import.
+        from requests import Session
+        from requests.adapters import HTTPAdapter
+        self.retries = retries
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+        self.session = Session()
+        adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        mailto = mailto or os.environ.get('CITEMAN_MAILTO')
+        contact = f"{HOMEPAGE}; mailto:{mailto}" if mailto else HOMEPAGE
+        self.session.headers['User-Agent'] = f"citeman ({contact})"
+
+    def _delay(self, attempt) -> float:
+        return random.uniform(0, min(self.maxBackoff, self.backoff * 2 ** attempt))
+
+    def get(self, url, **kwargs):
+        """
+        Performs a GET request, retrying retryable statuses and connection errors.
+
+        Args:
+            url (str): The URL to request.
+            **kwargs: Passed on to requests.Session.get.
+
+        Returns:
+            Response: The final response. Its status is not checked.
+
+        Raises:
+            requests.ConnectionError, requests.Timeout: If the last attempt failed to connect.
+        """
+        from requests import ConnectionError, Timeout
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            with span('resolver.wait'):
+                self.bucket.acquire()
+            try:
+                with span('resolver.http'):
+                    response = self.session.get(url, **kwargs)
+            except (ConnectionError, Timeout):
+                if attempt >= self.retries:
+                    raise
+                sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                return response
+            wait = retryAfter(response)
+            if wait is not None:
+                # Every thread waits, not only the one that was told to.
+                self.bucket.pause(min(wait, self.maxBackoff))
+            else:
+                sleep(self._delay(attempt))
+            attempt += 1
+
+_shared = None
+_sharedSettings = dict()
+_sharedLock = Lock()
+
+def sharedClient() -> ResolverClient:
+    """
+    Returns the ResolverClient used by all queries, creating it on first use.
+    """
+    global _shared
+    with _sharedLock:
+        if _shared is None:
+            _shared = ResolverClient(**_sharedSettings)
+        return _shared
+
+def setSharedClient(client) -> None:
+    """
+    Replaces the ResolverClient used by all queries.
+    """
+    global _shared
+    with _sharedLock:
+        _shared = client
+
+def configureSharedClient(**settings) -> None:
+    """
+    Sets the arguments of the ResolverClient used by all queries without creating it,
+    so the HTTP stack is only loaded once the first query is made.
+
+    Args:
+        **settings: Passed on to ResolverClient.
+    """
+    global _shared, _sharedSettings
+    with _sharedLock:
+        _shared = None
+        _sharedSettings = settings
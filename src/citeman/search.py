@@ -0,0 +1,331 @@
+from array import array
+from bisect import bisect_left, insort
+from heapq import nlargest
+from math import log
+from .snapshot import _header, fingerprint
+import gc
+import json
+import os
+import re
+import sys
+import unicodedata
+
+# Fields searched, with the weight of a match in each, from the highest weight down.
+FIELDS = {
+    'key': 3.0,
+    'doi': 3.0,
+    'author': 2.0,
+    'title': 1.5,
+    'journal': 1.0,
+    'year': 1.0,
+}
+# Words that match almost every author list.
+STOPWORDS = {'and', 'others'}
+# Shorter query terms only match whole words; longer ones also match word prefixes.
+# Numbers (e.g., years) always match whole words only.
+MIN_PREFIX = 2
+# A match on a prefix of a word counts for less than a match on the whole word.
+PREFIX_WEIGHT = 0.5
+LIMIT = 50
+WORD = re.compile(r"[^\W_]+")
+# Bump whenever the persisted layout changes so stale indexes are ignored.
+# Version 1 was pickled, which could run any code shipped with a shared .bib file (see
+# snapshot.py). Words are stored as JSON since, and postings as arrays of numbers.
+SEARCH_VERSION = 2
+
+def tokenize(text) -> list:
+    """
+    Splits text into lowercase words without accents, ignoring braces and punctuation.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        list: The words, in order.
+    """
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+    return WORD.findall(text)
+
+def entryTerms(entry) -> dict:
+    """
+    Collects the searchable words of an entry with the weight of the best field they appear in.
+
+    Args:
+        entry (Entry): The entry.
+
+    Returns:
+        dict: Maps words to weights.
+    """
+    values = {'key': entry.key}
+    for field in entry.fields:
+        name = field.key.lower()
+        if name in FIELDS and isinstance(field.value, str):
+            values[name] = field.value
+    terms = dict()
+    # FIELDS is ordered by weight, so the first field a word is seen in is its best.
+    for name, weight in FIELDS.items():
+        if name in values:
+            for word in tokenize(values[name]):
+                terms.setdefault(word, weight)
+    for word in STOPWORDS:
+        terms.pop(word, None)
+    return terms
+
+def searchPath(bib) -> str:
+    """
+    Returns the path of the persisted search index belonging to a .bib file.
+    """
+    head, tail = os.path.split(bib)
+    return os.path.join(head, f".{tail}.search")
+
+class SearchIndex():
+    """
+    An inverted index over the author, title, year, journal, key and DOI of entries.
+
+    Every query word must match a word of an entry, either whole or, for words of
+    MIN_PREFIX or more characters that are not numbers, as a prefix. Results are ranked by the field the
+    words matched in, whole-word matches and the rarity of the words (idf).
+
+    Attributes:
+        postings (dict): Maps words to {document number: weight} dicts.
+        words (list): The indexed words, sorted, for prefix lookups.
+
+    Methods:
+        add(self, entry): Indexes an entry.
+        remove(self, entry): Removes an entry from the index.
+        search(self, query, limit): Returns the best matching entries.
+        save(self, bib, entries): Persists the index next to the .bib file.
+        load(cls, bib, entries): Loads a persisted index.
+    """
+
+    def __init__(self, entries=()):
+        self.postings = dict()
+        self.words = list()
+        # Entries are numbered in the order they are indexed, i.e., file order after a build.
+        self._docs = dict()
+        self._entries = dict()
+        # What each entry was indexed under, so it can be removed after it changed.
+        # Not kept for entries of a loaded index, to keep loading fast.
+        self._indexed = dict()
+        self._next = 0
+        # As when loading a snapshot, the cyclic garbage collector would otherwise
+        # run many times while allocating the postings.
+        gc.disable()
+        try:
+            for entry in entries:
+                self._add(entry)
+        finally:
+            gc.enable()
+        # Sorting once is much cheaper than keeping the words sorted while building.
+        self.words = sorted(self.postings)
+
+    def __contains__(self, entry) -> bool:
+        return id(entry) in self._docs
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, entry) -> None:
+        """
+        Indexes an entry by its current fields, replacing what it was indexed under before.
+
+        Args:
+            entry (Entry): The entry to index.
+        """
+        if entry in self:
+            self.remove(entry)
+        for word in self._add(entry):
+            insort(self.words, word)
+
+    def _add(self, entry) -> list:
+        # Indexes an entry and returns the words that were not indexed before.
+        doc = self._next
+        self._next += 1
+        terms = entryTerms(entry)
+        new = []
+        for word, weight in terms.items():
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = dict()
+                new.append(word)
+            posting[doc] = weight
+        self._docs[id(entry)] = doc
+        self._entries[doc] = entry
+        self._indexed[doc] = terms
+        return new
+
+    def remove(self, entry) -> None:
+        """
+        Removes an entry from the index. Does nothing if the entry is not indexed.
+
+        Args:
+            entry (Entry): The entry to remove.
+        """
+        doc = self._docs.pop(id(entry), None)
+        if doc is None:
+            return
+        del self._entries[doc]
+        terms = self._indexed.pop(doc, None)
+        if terms is None:
+            terms = [word for word, posting in self.postings.items() if doc in posting]
+        for word in terms:
+            posting = self.postings[word]
+            del posting[doc]
+            if not posting:
+                del self.postings[word]
+                del self.words[bisect_left(self.words, word)]
+
+    def _expand(self, term) -> list:
+        # The indexed words matching a query term, with the factor their match counts for.
+        words = [(term, 1.0)] if term in self.postings else []
+        if len(term) < MIN_PREFIX or term.isdigit():
+            return words
+        for i in range(bisect_left(self.words, term), len(self.words)):
+            word = self.words[i]
+            if not word.startswith(term):
+                break
+            if word != term:
+                words.append((word, PREFIX_WEIGHT))
+        return words
+
+    def _scores(self, words, candidates=None) -> dict:
+        # Scores the documents containing any of the words, only among the candidates if given.
+        scores = dict()
+        for word, factor in words:
+            posting = self.postings[word]
+            idf = log(1 + len(self._docs) / len(posting))
+            if candidates is not None and len(candidates) < len(posting):
+                matches = ((doc, posting[doc]) for doc in candidates if doc in posting)
+            else:
+                matches = posting.items()
+            for doc, weight in matches:
+                score = weight * factor * idf
+                if scores.get(doc, 0) < score:
+                    scores[doc] = score
+        return scores
+
+    def search(self, query, limit=LIMIT) -> list:
+        """
+        Finds the entries matching every word of a query.
+
+        Args:
+            query (str): The words to look for, e.g., 'smith 2019 cardio'.
+            limit (int): Maximum number of results, or None for all.
+
+        Returns:
+            list: The matching entries, best first.
+        """
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term not in STOPWORDS]
+        if not terms:
+            return []
+        expansions = [self._expand(term) for term in terms]
+        # Start with the rarest term so the others only score its few matches.
+        expansions.sort(key=lambda words: sum(len(self.postings[word]) for word, _ in words))
+        total = None
+        for words in expansions:
+            scores = self._scores(words, total)
+            if total is None:
+                total = scores
+            else:
+                total = {doc: score + scores[doc] for doc, score in total.items() if doc in scores}
+            if not total:
+                return []
+        if limit is None:
+            ranked = sorted(total, key=total.get, reverse=True)
+        else:
+            ranked = nlargest(limit, total, key=total.get)
+        return [self._entries[doc] for doc in ranked]
+
+    def save(self, bib, entries) -> None:
+        """
+        Persists the index next to a .bib file that holds exactly the indexed entries.
+        Entries are stored by their position in the file.
+
+        Args:
+            bib (str): Path to the .bib file.
+            entries (list): The indexed entries, in file order.
+        """
+        order = [self._docs.get(id(entry)) for entry in entries]
+        if None in order or len(order) != len(self._docs):
+            return
+        if order == list(range(len(order))):
+            postings = self.postings
+        else:
+            position = {doc: i for i, doc in enumerate(order)}
+            postings = {word: {position[doc]: weight for doc, weight in posting.items()}
+                        for word, posting in self.postings.items()}
+        # The documents and weights of all postings, one after the other, read back by
+        # array.frombytes, which is much faster than decoding them from JSON.
+        lengths, docs, weights = array('I'), array('I'), array('d')
+        for posting in postings.values():
+            lengths.append(len(posting))
+            docs.extend(posting)
+            weights.extend(posting.values())
+        layout = {'count': len(order), 'byteorder': sys.byteorder, 'words': list(postings)}
+        try:
+            with open(bib, 'rb') as f:
+                current = fingerprint(bib, f.read())
+            current['version'] = SEARCH_VERSION
+            with open(searchPath(bib), 'wb') as f:
+                f.write(json.dumps(current).encode('utf-8') + b"\n")
+                f.write(json.dumps(layout).encode('utf-8') + b"\n")
+                f.write(lengths.tobytes())
+                f.write(docs.tobytes())
+                f.write(weights.tobytes())
+        except OSError:
+            # The persisted index is an optimization; searching works without it.
+            pass
+
+    @classmethod
+    def load(cls, bib, entries):
+        """
+        Loads the persisted index of a .bib file, if it was saved for the file as it is now.
+
+        Args:
+            bib (str): Path to the .bib file.
+            entries (list): The entries of the library loaded from the file, in file order.
+
+        Returns:
+            SearchIndex: The index, or None if there is no matching persisted index.
+        """
+        try:
+            with open(bib, 'rb') as f:
+                current = fingerprint(bib, f.read())
+            current['version'] = SEARCH_VERSION
+            with open(searchPath(bib), 'rb') as f:
+                if _header(f) != current:
+                    return None
+                layout = json.loads(f.readline())
+                words = layout['words']
+                if layout['count'] != len(entries) or layout['byteorder'] != sys.byteorder:
+                    return None
+                lengths, docs, weights = array('I'), array('I'), array('d')
+                lengths.frombytes(f.read(len(words) * lengths.itemsize))
+                total = sum(lengths)
+                docs.frombytes(f.read(total * docs.itemsize))
+                weights.frombytes(f.read(total * weights.itemsize))
+                if len(lengths) != len(words) or len(weights) != total or max(docs, default=0) >= max(len(entries), 1):
+                    return None
+                gc.disable()
+                try:
+                    postings = dict()
+                    start = 0
+                    for word, length in zip(words, lengths):
+                        end = start + length
+                        postings[word] = dict(zip(docs[start:end], weights[start:end]))
+                        start = end
+                finally:
+                    gc.enable()
+        except Exception:
+            # A missing, truncated or incompatible index is simply rebuilt.
+            return None
+        index = cls()
+        index.postings = postings
+        index.words = sorted(postings)
+        index._docs = {id(entry): doc for doc, entry in enumerate(entries)}
+        index._entries = dict(enumerate(entries))
+        index._next = len(entries)
+        return index
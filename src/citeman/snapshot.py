@@ -0,0 +1,152 @@
+from bibtexparser.library import Library
+from bibtexparser.model import Entry, ExplicitComment, Field, ImplicitComment, Preamble, String
+from hashlib import blake2b
+import gc
+import json
+import os
+
+# Bump whenever the stored layout changes so stale snapshots are ignored.
+# Version 1 was pickled; snapshots are JSON since, as a .bib file shared through git or a
+# synced folder can come with its snapshot, and unpickling it could run any code.
+SNAPSHOT_VERSION = 2
+# The blocks other than entries a snapshot can hold, by the tag of their rows.
+BLOCKS = {'string': String, 'preamble': Preamble, 'comment': ExplicitComment, 'implicit': ImplicitComment}
+
+def snapshotPath(bib) -> str:
+    """
+    Returns the path of the snapshot cache belonging to a .bib file.
+    The snapshot sits next to the .bib file as a hidden file.
+
+    Args:
+        bib (str): Path to the .bib file.
+
+    Returns:
+        str: Path to the snapshot file.
+    """
+    head, tail = os.path.split(bib)
+    return os.path.join(head, f".{tail}.snapshot")
+
+def fingerprint(bib, data) -> dict:
+    """
+    Describes a .bib file by path, size, modification time and content hash.
+
+    Args:
+        bib (str): Path to the .bib file.
+        data (bytes): The contents of the .bib file.
+
+    Returns:
+        dict: The fingerprint of the file.
+    """
+    stat = os.stat(bib)
+    return {
+        'version': SNAPSHOT_VERSION,
+        'path': os.path.abspath(bib),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'hash': blake2b(data, digest_size=16).hexdigest(),
+    }
+
+def _encode(library, texts=None):
+    # The blocks of a library as JSON rows, or None if it holds blocks a snapshot cannot
+    # (e.g., blocks that failed to parse), which are then parsed again every time.
+    # texts gives the text of entries in the file where it differs from their raw text.
+    rows = []
+    for block in library.blocks:
+        if type(block) is Entry:
+            raw = block.raw
+            if texts is not None and block.key in texts:
+                # Entries written by citeman are stored with the newline that ends them,
+                # which the raw text of a parsed entry stops before.
+                raw = texts[block.key]
+                raw = raw[:-1] if raw.endswith('\n') else raw
+            fields = [[field.key, field.value, field.start_line] for field in block.fields]
+            rows.append(['entry', block.entry_type, block.key, fields, block.start_line, raw, block.parser_metadata])
+        elif type(block) is String:
+            rows.append(['string', block.key, block.value, block.start_line, block.raw, block.parser_metadata])
+        elif type(block) is Preamble:
+            rows.append(['preamble', block.value, block.start_line, block.raw, block.parser_metadata])
+        elif type(block) in (ExplicitComment, ImplicitComment):
+            tag = 'comment' if type(block) is ExplicitComment else 'implicit'
+            rows.append([tag, block.comment, block.start_line, block.raw, block.parser_metadata])
+        else:
+            return None
+    return rows
+
+def _decode(rows) -> Library:
+    blocks = []
+    for row in rows:
+        tag = row[0]
+        if tag == 'entry':
+            _, entry_type, key, fields, start_line, raw, metadata = row
+            block = Entry(entry_type, key, [Field(*field) for field in fields], start_line, raw)
+        else:
+            *args, metadata = row[1:]
+            block = BLOCKS[tag](*args)
+        block._parser_metadata = metadata
+        blocks.append(block)
+    return Library(blocks)
+
+def _header(f):
+    # The fingerprint a snapshot or persisted index was saved for, on its first line.
+    return json.loads(f.readline())
+
+def loadSnapshot(bib, expected):
+    """
+    Loads the parsed library of a .bib file from its snapshot.
+    The fingerprint is read before the library so a stale snapshot is rejected cheaply.
+
+    Args:
+        bib (str): Path to the .bib file.
+        expected (dict): The current fingerprint of the .bib file.
+
+    Returns:
+        Library: The cached library, or None if there is no matching snapshot.
+    """
+    try:
+        with open(snapshotPath(bib), 'rb') as f:
+            if _header(f) != expected:
+                return None
+            # The cyclic garbage collector would otherwise run many times
+            # while allocating the entries, dominating the load time.
+            gc.disable()
+            try:
+                return _decode(json.loads(f.read()))
+            finally:
+                gc.enable()
+    except Exception:
+        # A missing, truncated or incompatible snapshot is simply a cache miss.
+        return None
+
+def snapshotMatches(bib, expected) -> bool:
+    """
+    Checks whether the snapshot of a .bib file was saved for the file as it is now,
+    reading only its fingerprint.
+    """
+    try:
+        with open(snapshotPath(bib), 'rb') as f:
+            return _header(f) == expected
+    except Exception:
+        return False
+
+def saveSnapshot(bib, library, current, texts=None) -> None:
+    """
+    Writes the parsed library of a .bib file to its snapshot.
+
+    Args:
+        bib (str): Path to the .bib file.
+        library (Library): The parsed library.
+        current (dict): The fingerprint of the .bib file the library was parsed from.
+        texts (dict): The text in the file of the entries, by key, where it differs from
+            their raw text (e.g., entries written by citeman).
+    """
+    rows = _encode(library, texts)
+    if rows is None:
+        return
+    try:
+        with open(snapshotPath(bib), 'w', encoding='utf-8') as f:
+            f.write(json.dumps(current) + "\n")
+            f.write(json.dumps(rows, separators=(',', ':')))
+    except (OSError, TypeError, ValueError):
+        # The cache is an optimization; never fail because of it. Fields holding values
+        # other than text, e.g., set by a middleware, are not stored.
+        pass
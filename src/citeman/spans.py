@@ -0,0 +1,164 @@
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+import json
+
+# Spans are only timed while a Profile or a hook is listening; otherwise span() hands out
+# a shared do-nothing context manager, so instrumented code pays for a function call.
+_profile = None
+_hooks = ()
+_active = False
+_lock = Lock()
+
+class Span():
+    """
+    Times a named phase and reports it to the profile and hooks when it ends.
+
+    Attributes:
+        name (str): The name of the phase, e.g., 'query.http'.
+        seconds (float): How long the phase took, once it ended.
+    """
+
+    __slots__ = ('name', 'start', 'seconds')
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = perf_counter() - self.start
+        _record(self.name, self.seconds)
+        return False
+
+class _NullSpan():
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullSpan()
+
+def span(name):
+    """
+    Returns a context manager timing a named phase, e.g., `with span('bibfile.write'):`.
+    """
+    return Span(name) if _active else _NULL
+
+def timed(name):
+    """
+    Decorates a function so that every call is timed as a span of the given name.
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return fn(*args, **kwargs)
+            with Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class Profile():
+    """
+    The timings of the spans, aggregated by name.
+
+    Attributes:
+        stats (dict): Maps span names to [count, total, min, max] seconds.
+
+    Methods:
+        record(self, name, seconds): Adds a timing.
+        report(self): Formats the timings as a table, slowest in total first.
+        asDict(self): Returns the timings as a JSON-serializable dict.
+        dump(self, path): Writes the timings to a JSON file.
+    """
+
+    def __init__(self):
+        self.stats = dict()
+        self._lock = Lock()
+
+    def record(self, name, seconds) -> None:
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                self.stats[name] = [1, seconds, seconds, seconds]
+            else:
+                stat[0] += 1
+                stat[1] += seconds
+                stat[2] = min(stat[2], seconds)
+                stat[3] = max(stat[3], seconds)
+
+    def asDict(self) -> dict:
+        with self._lock:
+            return {name: {'count': count, 'total': total, 'mean': total / count, 'min': low, 'max': high}
+                    for name, (count, total, low, high) in self.stats.items()}
+
+    def report(self) -> str:
+        stats = sorted(self.asDict().items(), key=lambda item: item[1]['total'], reverse=True)
+        lines = [f"{'span':<28} {'count':>7} {'total (ms)':>11} {'mean (ms)':>10} {'max (ms)':>10}"]
+        for name, stat in stats:
+            lines.append(f"{name:<28} {stat['count']:>7} {stat['total'] * 1000:>11.2f} "
+                         f"{stat['mean'] * 1000:>10.3f} {stat['max'] * 1000:>10.3f}")
+        return '\n'.join(lines)
+
+    def dump(self, path) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.asDict(), f, indent=2)
+
+def _record(name, seconds) -> None:
+    profile = _profile
+    if profile is not None:
+        profile.record(name, seconds)
+    for hook in _hooks:
+        hook(name, seconds)
+
+def _update() -> None:
+    global _active
+    _active = _profile is not None or bool(_hooks)
+
+def enable() -> Profile:
+    """
+    Starts aggregating the spans into a new Profile.
+
+    Returns:
+        Profile: The profile the spans are recorded in.
+    """
+    global _profile
+    with _lock:
+        _profile = Profile()
+        _update()
+        return _profile
+
+def disable() -> None:
+    """
+    Stops aggregating the spans. Hooks keep receiving them.
+    """
+    global _profile
+    with _lock:
+        _profile = None
+        _update()
+
+def addHook(hook) -> None:
+    """
+    Forwards every span to a function, e.g., to send it to a metrics system.
+    Hooks are called in the thread that ran the span, so they should be quick.
+
+    Args:
+        hook (function): Called with the name of the span and its duration in seconds.
+    """
+    global _hooks
+    with _lock:
+        _hooks = _hooks + (hook,)
+        _update()
+
+def removeHook(hook) -> None:
+    global _hooks
+    with _lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+        _update()
@@ -0,0 +1,151 @@
+from bibtexparser.middlewares.enclosing import RemoveEnclosingMiddleware
+from .entry import EntrySplitter
+import logging
+import re
+
+CHUNK = 1 << 16
+
+# The start of a block, e.g. '@article{', as recognized by bibtexparser.Splitter.
+BLOCK_START = re.compile(r"@(\w*)[ \t]*\{")
+# A possibly incomplete block start at the end of a chunk.
+PARTIAL_START = re.compile(r"@\w*[ \t]*$")
+# Unescaped braces.
+BRACES = re.compile(r"(?<!\\)[{}]")
+# Blocks that are not entries.
+NON_ENTRIES = ('comment', 'preamble', 'string')
+REMOVE_ENCLOSING = RemoveEnclosingMiddleware()
+
+def iterBlocks(f, chunkSize=CHUNK):
+    """
+    Reads the @-blocks of a .bib file one at a time.
+    Only the block being read is kept in memory, so memory use is bounded by the largest
+    block rather than by the file. Text between blocks (implicit comments) is skipped.
+
+    Args:
+        f (TextIO): The open .bib file.
+        chunkSize (int): Number of characters read at a time.
+
+    Yields:
+        tuple: (line, type, text): the line the block starts on (1-based), its lowercased
+        type (e.g., 'article'), and its full text. An unterminated last block is yielded
+        with whatever text it has.
+    """
+    buffer = ''
+    line = 1
+    inBlock = False
+    type = None
+    depth = 0
+    pos = 0
+    eof = False
+    while not eof:
+        chunk = f.read(chunkSize)
+        eof = not chunk
+        buffer += chunk
+        while True:
+            if not inBlock:
+                match = BLOCK_START.search(buffer, pos)
+                if match is None:
+                    # Keep only what could still become a block start.
+                    partial = PARTIAL_START.search(buffer)
+                    cut = partial.start() if partial and not eof else len(buffer)
+                    line += buffer.count('\n', 0, cut)
+                    buffer = buffer[cut:]
+                    pos = 0
+                    break
+                line += buffer.count('\n', 0, match.start())
+                buffer = buffer[match.start():]
+                inBlock = True
+                type = match.group(1).lower()
+                depth = 1
+                pos = match.end() - match.start()
+            for brace in BRACES.finditer(buffer, pos):
+                depth += 1 if brace.group(0) == '{' else -1
+                if depth == 0:
+                    end = brace.end()
+                    yield line, type, buffer[:end]
+                    line += buffer.count('\n', 0, end)
+                    buffer = buffer[end:]
+                    inBlock = False
+                    pos = 0
+                    break
+            else:
+                # The block continues in the next chunk.
+                pos = len(buffer)
+                if eof and buffer:
+                    yield line, type, buffer
+                break
+
+def iterEntries(f, chunkSize=CHUNK):
+    """
+    Reads the entries of a .bib file one at a time with EntrySplitter.
+
+    Field values are returned as parse_file returns them, with the enclosing braces or
+    quotes removed, except that @string references are not resolved. Each entry's raw
+    text is its original text in the file. Entries that cannot be parsed are skipped
+    with a warning (see validate).
+
+    Args:
+        f (TextIO): The open .bib file.
+        chunkSize (int): Number of characters read at a time.
+
+    Yields:
+        Entry: The entries, in file order.
+    """
+    for line, type, text in iterBlocks(f, chunkSize):
+        if type in NON_ENTRIES:
+            continue
+        try:
+            entry = EntrySplitter(text).split()
+        except Exception:
+            logging.warning(f"Skipping entry on line {line} that could not be parsed.")
+            continue
+        yield REMOVE_ENCLOSING.transform_entry(entry, None)
+
+def validate(f, fields=('author', 'year', 'title')):
+    """
+    Checks the entries of a .bib file without loading the whole library.
+
+    Args:
+        f (TextIO): The open .bib file.
+        fields (tuple): Fields every entry must have.
+
+    Yields:
+        tuple: (line, message) for each problem found.
+    """
+    keys = set()
+    for line, type, text in iterBlocks(f):
+        if type in NON_ENTRIES:
+            continue
+        try:
+            entry = EntrySplitter(text).split()
+        except Exception:
+            yield line, "Unable to parse entry."
+            continue
+        if entry.key in keys:
+            yield line, f"Duplicate key: {entry.key}"
+        keys.add(entry.key)
+        for field in fields:
+            if entry.get(field) is None:
+                yield line, f"Missing critical field: {field} ({entry.key})"
+
+def exportEntries(entries, f, keys=None) -> int:
+    """
+    Writes entries to a .bib file as they are read, keeping their original text.
+
+    Args:
+        entries (iterable): The entries, e.g., from iterEntries.
+        f (TextIO): The open output file.
+        keys (set): If given, only the entries with these keys are written.
+
+    Returns:
+        int: The number of entries written.
+    """
+    written = 0
+    for entry in entries:
+        if keys is not None and entry.key not in keys:
+            continue
+        if written:
+            f.write('\n\n')
+        f.write(entry.raw.rstrip('\n') + '\n')
+        written += 1
+    return written
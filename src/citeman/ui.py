@@ -1,18 +1,25 @@
 from consolemenu import ConsoleMenu, MenuFormatBuilder
 from consolemenu.items import FunctionItem
 from consolemenu.menu_component import Dimension
-from colors import blue
+from colors import blue, red
+from .errors import ExternalEditError
+from .pipeline import QueryPipeline
+from .ui_notice import noticeScreen
+from .ui_conflict import resolveConflict
 from .ui_history import showQueries
 from .ui_remove import removeCitations
+from .ui_search import searchCitations
 from .ui_show import showCitations
 from .ui_query import queryInput
 from .prepare import prepare_library, prepare_processor
-import pkg_resources
+import importlib.resources
 
 def logo():
-    logo_path = pkg_resources.resource_filename(__name__, 'logo')
-    with open(logo_path, 'r', encoding="utf-8") as f:
-        return ''.join([line for line in f])
+    try:
+        return importlib.resources.files(__package__).joinpath('logo').read_text(encoding="utf-8")
+    except AttributeError:
+        # Python 3.8
+        return importlib.resources.read_text(__package__, 'logo', encoding="utf-8")
     
 class MainMenu(ConsoleMenu):
     def __init__(self):
@@ -28,14 +35,44 @@ class MainMenu(ConsoleMenu):
                          show_exit_option=False,
                          formatter=formatter)
 
-def mainMenu():
-    library = prepare_library()
-    processor = prepare_processor(library)
+def reloading(action):
+    # Picks up the edits made to bibliography.bib outside citeman before every action.
+    def run(processor, *args, **kwargs):
+        try:
+            processor.reload()
+        except ExternalEditError as e:
+            resolveConflict(processor, e)
+        reportWriteError(processor)
+        action(processor, *args, **kwargs)
+    return run
+
+def reportWriteError(processor):
+    # Changes that failed to be written in the background are written again here, once a
+    # conflict was resolved, and the user told if they still cannot be.
+    if processor.writeError is None:
+        return
+    try:
+        processor.flush()
+    except ExternalEditError as e:
+        noticeScreen(f"Changes not written to the .bib file yet. {e}{', '.join(e.keys)}", red)
+    except Exception as e:
+        noticeScreen(f"Changes not written to the .bib file yet: {e}", red)
+
+def mainMenu(processor=None):
+    if processor is None:
+        library = prepare_library()
+        processor = prepare_processor(library)
     menu = MainMenu()
+    # Shared by the query and history screens, so queries keep resolving in between.
+    pipeline = QueryPipeline(processor)
     
-    menu.append_item(FunctionItem("Query", queryInput, [processor]))
-    menu.append_item(FunctionItem("Show citations", showCitations, [processor]))
-    menu.append_item(FunctionItem("Remove citations", removeCitations, [processor]))
-    menu.append_item(FunctionItem("View query history", showQueries, [processor]))
+    menu.append_item(FunctionItem("Query", reloading(queryInput), [processor], {'pipeline': pipeline}))
+    menu.append_item(FunctionItem("Show citations", reloading(showCitations), [processor]))
+    menu.append_item(FunctionItem("Search citations", reloading(searchCitations), [processor]))
+    menu.append_item(FunctionItem("Remove citations", reloading(removeCitations), [processor]))
+    menu.append_item(FunctionItem("View query history", showQueries, [processor], {'pipeline': pipeline}))
 
-    menu.show()
\ No newline at end of file
+    try:
+        menu.show()
+    finally:
+        pipeline.close()
\ No newline at end of file
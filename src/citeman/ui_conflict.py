@@ -0,0 +1,18 @@
+from consolemenu import PromptUtils, Screen
+from colors import red, blue
+
+def resolveConflict(processor, error):
+    """
+    Shows the entries changed both in the .bib file and in citeman, and reloads the file
+    keeping the versions the user chooses.
+
+    Args:
+        error (ExternalEditError): The conflicts, raised by a reload or a write.
+    """
+    pu = PromptUtils(Screen())
+    pu.clear()
+    pu.println(f"{red(error)}{blue(', '.join(error.keys))}")
+    pu.println()
+    keep = pu.prompt_for_yes_or_no("Keep the versions in bibliography.bib? (No keeps the versions in citeman)")
+    pu.clear()
+    processor.reload(resolve='file' if keep else 'library')
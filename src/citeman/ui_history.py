@@ -1,12 +1,21 @@
 from consolemenu import PromptUtils, Screen
+from colors import yellow
+from .pipeline import PendingQuery
 from .ui_list import listQueries
+from .ui_notice import noticeScreen
 from .ui_pretty import prettyPrintQuery
 
-def showQueries(processor):
-    listQueries(processor, "Select a query to view.", showQuery)
+def showQueries(processor, pipeline=None):
+    # Queries still resolving are listed as pending, and replaced by their result once it arrives.
+    listQueries(processor, "Select a query to view.", showQuery, pipeline=pipeline)
         
 def showQuery(selection):
+    if isinstance(selection, PendingQuery):
+        if selection.pending:
+            noticeScreen(f"{selection.id} is still resolving.", yellow)
+            return
+        selection = selection.result()
     pu = PromptUtils(Screen())
     pu.println(prettyPrintQuery(selection))
     pu.enter_to_continue()
-    pu.clear()
\ No newline at end of file
+    pu.clear()
@@ -1,36 +1,203 @@
-from consolemenu import SelectionMenu
+from consolemenu import PromptUtils, Screen, SelectionMenu
 from .ui_notice import noticeScreen
-from .ui_pretty import prettyPrintBlocks, prettyPrintQueries
+from .ui_pretty import prettyPrintCached, prettyPrintQueries
 from .errors import HistoryEmptyError, LibraryEmptyError
 from colors import red
+from threading import RLock
+
+# Number of items rendered per page of a list.
+PAGE_SIZE = 20
+# Seconds between checks for changes to a list that refreshes itself.
+REFRESH = 0.5
+NEXT = "Next page"
+PREVIOUS = "Previous page"
+JUMP = "Jump to page"
+
+def pageCount(total, pageSize=PAGE_SIZE) -> int:
+    return max(1, -(-total // pageSize))
+
+def pageOptions(page, pages) -> list:
+    """
+    Returns the navigation options shown below the items of a page.
+    """
+    options = []
+    if page < pages - 1:
+        options.append(NEXT)
+    if page > 0:
+        options.append(PREVIOUS)
+    if pages > 1:
+        options.append(JUMP)
+    return options
+
+def jumpToPage(page, pages) -> int:
+    pu = PromptUtils(Screen())
+    answer = pu.input(f"Enter page number (1-{pages}): ").input_string.strip()
+    try:
+        return min(max(int(answer), 1), pages) - 1
+    except ValueError:
+        return page
+
+class RefreshingMenu(SelectionMenu):
+    """
+    A SelectionMenu whose items can be redrawn from another thread while it waits for input.
+
+    Attributes:
+        lock (RLock): Held while the menu is drawn or an item is selected, so that the menu
+            is never redrawn once an item was selected.
+
+    Methods:
+        redraw(self, strings, subtitle): Replaces the text of the items and draws the menu again.
+    """
+
+    def __init__(self, strings, title=None, subtitle=None):
+        super().__init__(strings, title, subtitle)
+        self.lock = RLock()
+
+    def draw(self):
+        with self.lock:
+            super().draw()
+
+    def select(self):
+        with self.lock:
+            super().select()
+
+    def redraw(self, strings, subtitle=None) -> bool:
+        """
+        Replaces the text of the items, in order, and draws the menu again unless an item
+        was selected.
+
+        Returns:
+            bool: Whether the menu was drawn again.
+        """
+        with self.lock:
+            if self.should_exit:
+                return False
+            for item, text in zip(self.items, strings):
+                item.text = text
+            self.subtitle = subtitle
+            self.clear_screen()
+            self.draw()
+            return True
+
+def pageSubtitle(page, pages, total):
+    return f"Page {page + 1} of {pages} ({total} items)" if pages > 1 else None
+
+def selectPaged(items, render, title, page=0, pageSize=PAGE_SIZE, refresh=None):
+    """
+    Shows one page of a list in a SelectionMenu, with options to change pages.
+    Only the items of the page are rendered, so the cost does not grow with the list.
+
+    Args:
+        items (list): The items to choose from.
+        render (function): Renders a list of items as a list of strings.
+        title (str): The title of the menu.
+        page (int): The page to show, starting at 0.
+        pageSize (int): Number of items per page.
+        refresh (function): Waits at most the given number of seconds for the items to change,
+            and returns them, or None if they did not. The page is then drawn again, and items
+            replaced in place, unless the page would show a different number of items.
+
+    Returns:
+        tuple: (index, page): the index in items of the selected item, or None if a
+        page was changed or the menu exited (page is then None), and the page to show next.
+    """
+    pages = pageCount(len(items), pageSize)
+    page = min(max(page, 0), pages - 1)
+    start = page * pageSize
+    visible = items[start:start + pageSize]
+    navigation = pageOptions(page, pages)
+    subtitle = pageSubtitle(page, pages, len(items))
+    strings = render(visible) + navigation
+    if refresh is None:
+        selection = SelectionMenu.get_selection(strings, title=title, subtitle=subtitle)
+    else:
+        menu = RefreshingMenu(strings, title, subtitle)
+        menu.start()
+        while not menu.should_exit:
+            fresh = refresh(REFRESH)
+            if fresh is None:
+                continue
+            freshPages = pageCount(len(fresh), pageSize)
+            shown = fresh[start:start + pageSize]
+            if len(shown) != len(visible) or pageOptions(page, freshPages) != navigation:
+                # Other options would be needed; the list is fetched again after the selection.
+                continue
+            if menu.redraw(render(shown) + navigation, pageSubtitle(page, freshPages, len(fresh))):
+                items[:] = fresh
+        menu.join()
+        selection = menu.selected_option
+
+    if selection < len(visible):
+        return start + selection, page
+    if selection == len(visible) + len(navigation):
+        return None, None
+    option = navigation[selection - len(visible)]
+    if option == NEXT:
+        return None, page + 1
+    if option == PREVIOUS:
+        return None, page - 1
+    return None, jumpToPage(page, pages)
 
 def listCitations(processor, message, action, *args):
+    try:
+        entries = processor.entries
+    except LibraryEmptyError as e:
+        noticeScreen(e, red)
+        return
+
+    page = 0
     while True:
+        selection, page = selectPaged(entries, prettyPrintCached(processor.renderCache), message, page)
+        if page is None:
+            break
+        if selection is None:
+            continue
+        entry = entries[selection]
+        action(entry, *args)
+        # Keep the list in step with the library rather than fetching it again, unless the
+        # .bib file was reloaded meanwhile: entries edited outside citeman are then replaced.
+        if entry not in processor.index:
+            del entries[selection]
+        stale = len(entries) != len(processor.index) or not all(each in processor.index for each in entries)
         try:
-            entries = processor.entries
+            if stale:
+                entries = processor.entries
+            elif not entries:
+                raise LibraryEmptyError()
         except LibraryEmptyError as e:
             noticeScreen(e, red)
             break
 
-        exit = len(entries)
-        try:
-            selection = SelectionMenu.get_selection(prettyPrintBlocks(entries), title=message)
-            action(entries[selection], *args)
-        except IndexError:
-            if selection == exit:
-                break
+def listQueries(processor, message, action, *args, pipeline=None):
+    """
+    Lists the query history, followed by the queries still resolving if pipeline is given.
+    The list is drawn again as they resolve, and fetched again after every action.
 
-def listQueries(processor, message, action, *args):
+    Args:
+        pipeline (QueryPipeline): Resolves the queries entered on the Query screen.
+    """
+    page = 0
     while True:
-        try:
-            queries = processor.queryHistory
-        except HistoryEmptyError as e:
-            noticeScreen(e, red)
+        if pipeline is not None:
+            # Read first, so that a query resolving while the list is fetched refreshes it.
+            progress = pipeline.progress
+            queries = pipeline.history()
+
+            def refresh(timeout):
+                nonlocal progress
+                current = pipeline.waitForProgress(progress, timeout)
+                if current == progress:
+                    return None
+                progress = current
+                return pipeline.history()
+        else:
+            queries = list(processor.history.records)
+            refresh = None
+        if not queries:
+            noticeScreen(HistoryEmptyError(), red)
+            return
+        selection, page = selectPaged(queries, prettyPrintQueries, message, page, refresh=refresh)
+        if page is None:
             break
-        exit = len(queries)
-        try:
-            selection = SelectionMenu.get_selection(prettyPrintQueries(queries), title=message)
+        if selection is not None:
             action(queries[selection], *args)
-        except IndexError:
-            if selection == exit:
-                break
@@ -2,6 +2,8 @@ from colors import green, red, blue, yellow
 from .utils import removeBraces
 
 def prettyPrintQueryShort(query):
+    if getattr(query, 'pending', False):
+        return f"{query.id} - {yellow('Pending')}"
     if query.success:
         return f"{query.id} - {green('Success')}"
     elif not query.success:
@@ -68,3 +70,10 @@ def prettyPrintBlockShort(block):
     
 def prettyPrintBlocks(blocks):
     return [prettyPrintBlockShort(block) for block in blocks]
+
+def prettyPrintCached(cache):
+    """
+    Returns a function rendering lists of entries with prettyPrintBlockShort through a
+    RenderCache, e.g., the render cache of the processor, for selectPaged.
+    """
+    return lambda blocks: cache.getAll(blocks, prettyPrintBlockShort)
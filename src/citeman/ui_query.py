@@ -1,44 +1,94 @@
 from consolemenu import PromptUtils, Screen, UserQuit
-from colors import red, blue, green, strip_color
+from colors import red, blue, green, yellow, strip_color
 from .ui_pretty import prettyKey, prettyPrintBlock, prettyPrintQueryReport
 from .utils import removeAt, removeBraces
-from .errors import CriticalFieldException, KeyExistsError
+from .errors import CriticalFieldException, ExternalEditError, KeyExistsError
+from .extract import extractIds
+from .pipeline import QueryPipeline
+from .ui_conflict import resolveConflict
 
-def queryInput(processor):
+def queryInput(processor, pipeline=None):
+    """
+    Prompts for article IDs and resolves them in the background, so that several can be
+    entered without waiting. The results are reviewed in the order the IDs were entered,
+    as soon as each is ready.
+
+    Args:
+        processor (Processor): The processor of the library.
+        pipeline (QueryPipeline): Resolves the queries. Queries left unreviewed when the
+        screen is quit are reviewed the next time it opens. Defaults to a new pipeline.
+    """
     pu = PromptUtils(Screen())
+    owned = pipeline is None
+    if owned:
+        pipeline = QueryPipeline(processor)
+    try:
+        reviewLoop(pu, processor, pipeline)
+    finally:
+        if owned:
+            pipeline.close()
+
+def reviewLoop(pu, processor, pipeline):
     while True:
-        try:
-            input = pu.input(f"Enter {blue('DOI')}: ", 
-                            enable_quit=True, quit_string="q", 
-                            quit_message=f"('{red('q')}' to quit)").input_string.strip()
-        except UserQuit:
-            break
-        # Make the query and then return the last query from processor.
-        # The last query should be the query just processed.    
-        processor.processQuery(input)
+        # Review the results that are ready before asking for more.
+        query = pipeline.ready()
+        if query is None:
+            try:
+                input = pu.input(f"Enter {blue('DOI')} or {blue('PMID')}{pendingHint(pipeline)}: ",
+                                enable_quit=True, quit_string="q", 
+                                quit_message=f"('{red('q')}' to quit)").input_string.strip()
+            except UserQuit:
+                break
+            if input:
+                # Several IDs can be pasted at once, e.g., a line of a reference list.
+                # Input with none is queried as is, to report why.
+                for id in extractIds(input) or [input]:
+                    pipeline.submit(id)
+                    pu.println(f"{blue(id)} {yellow('resolving')}...")
+                continue
+            if not pipeline:
+                continue
+            # Nothing more to enter: wait for the next result in order.
+            pu.println(f"Waiting for {blue(pipeline.queue[0].id)}...")
+            query = pipeline.next()
+
         pu.clear()
-        query = processor.getLastQuery()
-        pu.println(prettyPrintQueryReport(query))
-        # If the query is succesful (i.e., no errors and returns a citation), do:
-        if query.success:
-            pu.println()
-            pu.println(query.raw)
+        reviewQuery(pu, processor, query)
+        if not pipeline:
+            again = pu.prompt_for_yes_or_no("Search again?")
+            if not again:
+                break
+        pu.clear()
+
+def pendingHint(pipeline) -> str:
+    if not pipeline:
+        return ''
+    ready = pipeline.readyCount()
+    return f" ({yellow(len(pipeline) - ready)} resolving, {green(ready)} ready; Enter to review the next)"
+
+def reviewQuery(pu, processor, query):
+    """
+    Shows the result of a query and, if it succeeded, walks through adding its entry.
+    """
+    pu.println(prettyPrintQueryReport(query))
+    # If the query is succesful (i.e., no errors and returns a citation), do:
+    if query.success:
+        pu.println()
+        pu.println(query.raw)
+        pu.println()
+        if processor.idExists(query):
+            pu.println(f"{yellow('Note:')} {query.type} {blue(query.id)} is already in the library.")
             pu.println()
-            confirm = pu.prompt_for_yes_or_no("Is this the citation you were looking for? ")
+        confirm = pu.prompt_for_yes_or_no("Is this the citation you were looking for? ")
 
-            if confirm:       
-                criticalFieldsUI(pu, processor, query, ['author', 'year', 'title'])
-                # Update the author field (if present) to remove the braces.
-                # This is necessary to prevent double brace wrapping of the author field which treats
-                # a list of multiple authors as a single author.
-                updateAuthorField(processor, query)
-                acceptKeyUI(pu, processor, query)
-                addKeyUI(pu, processor, query)
-        
-        again = pu.prompt_for_yes_or_no("Search again?")
-        if not again:
-            break
-        pu.clear()
+        if confirm:       
+            criticalFieldsUI(pu, processor, query, ['author', 'year', 'title'])
+            # Update the author field (if present) to remove the braces.
+            # This is necessary to prevent double brace wrapping of the author field which treats
+            # a list of multiple authors as a single author.
+            updateAuthorField(processor, query)
+            acceptKeyUI(pu, processor, query)
+            addKeyUI(pu, processor, query)
 
 def criticalFieldsUI(pu, processor, query, fields):
     while len(fields) > 0:
@@ -77,11 +127,28 @@ def addKeyUI(pu, processor, query):
     pu.clear()
     add = pu.prompt_for_yes_or_no(f"Add {prettyKey(query.block.key)} to library? ")
     pu.clear()
-    if add: 
-        try:
-            processor.add(query.block)
-            pu.println(prettyKey(query.block.key), green('added to library.'), "\n")
-        except:
-            raise
+    if add and addEntry(pu, processor, query.block):
+        pu.println(prettyKey(query.block.key), green('added to library.'), "\n")
     else:
-        pu.println(prettyKey(query.block.key), red('not added to library.'), "\n")
\ No newline at end of file
+        pu.println(prettyKey(query.block.key), red('not added to library.'), "\n")
+def addEntry(pu, processor, entry) -> bool:
+    # The .bib file is read again before the entry is appended to it, and may have been edited
+    # outside citeman since the key was accepted.
+    replaced = None
+    while True:
+        try:
+            if replaced is not None:
+                processor.remove(replaced)
+                replaced = None
+            processor.add(entry)
+            return True
+        except ExternalEditError as e:
+            resolveConflict(processor, e)
+        except KeyExistsError as e:
+            pu.println(f"{red(e)}{blue(e.key)}")
+            pu.println()
+            keep = pu.prompt_for_yes_or_no("Keep the version in bibliography.bib? (No replaces it with this citation)")
+            pu.clear()
+            if keep:
+                return False
+            replaced = processor.index.keys.get(e.key)
@@ -1,7 +1,9 @@
 from consolemenu import PromptUtils, Screen
+from .errors import ExternalEditError, StaleEntryError
+from .ui_conflict import resolveConflict
 from .ui_list import listCitations
 from .ui_pretty import prettyKey, prettyPrintBlock
-from colors import red, green
+from colors import blue, red, green
 
 def removeCitations(processor):
     listCitations(processor, "Select an entry to remove.", removeCitation, processor)
@@ -12,10 +14,33 @@ def removeCitation(selection, processor):
     pu.println()
     remove = pu.prompt_for_yes_or_no(f"Remove {prettyKey(selection.key)} from library?")
     pu.clear()
-    if remove:
-        processor.remove(selection)
+    if remove and removeEntry(pu, processor, selection):
         pu.println(prettyKey(selection.key), green('removed from library.'), "\n")
     else:
         pu.println(prettyKey(selection.key), red('not removed from library.'), "\n")
     pu.enter_to_continue()
-    pu.clear()
\ No newline at end of file
+    pu.clear()
+
+def removeEntry(pu, processor, entry) -> bool:
+    # The .bib file is read again before the entry is cut out of it, and may have been edited
+    # outside citeman since the list was shown.
+    while True:
+        try:
+            processor.remove(entry)
+            return True
+        except StaleEntryError as e:
+            entry = processor.index.keys.get(entry.key)
+            if entry is None:
+                # Removed from the file too.
+                return True
+            pu.println(f"{red(e)}{blue(', '.join(e.keys))}")
+            pu.println()
+            keep = pu.prompt_for_yes_or_no("Keep the version in bibliography.bib? (No removes it anyway)")
+            pu.clear()
+            if keep:
+                return False
+        except ExternalEditError as e:
+            resolveConflict(processor, e)
+            entry = processor.index.keys.get(entry.key)
+            if entry is None:
+                return True
@@ -0,0 +1,25 @@
+from consolemenu import PromptUtils, Screen
+from .ui_list import selectPaged
+from .ui_notice import noticeScreen
+from .ui_pretty import prettyPrintCached
+from .ui_show import showCitation
+from colors import red, blue
+
+def searchCitations(processor):
+    pu = PromptUtils(Screen())
+    query = pu.input(f"Search by {blue('author, title, year, journal, key or DOI')}: ").input_string.strip()
+    pu.clear()
+    if not query:
+        return
+    results = processor.search(query)
+    if not results:
+        noticeScreen(f"No citations match '{query}'.", red)
+        return
+
+    page = 0
+    while True:
+        selection, page = selectPaged(results, prettyPrintCached(processor.renderCache), f"Results for '{query}'. Select an entry to view.", page)
+        if page is None:
+            break
+        if selection is not None:
+            showCitation(results[selection])
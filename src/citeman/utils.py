@@ -1,5 +1,8 @@
 import re
 
+BRACES = re.compile(r'^\{?(.*?)\}?$')
+DOI_PREFIX = re.compile(r'^(https?://(dx\.)?doi\.org/|doi:\s*)', flags=re.I)
+
 def removeBraces(string):
     """
     Removes starting and ending braces from the given string.
@@ -13,7 +16,11 @@ def removeBraces(string):
     Returns:
         str: The string with braces removed.
     """
-    return re.sub(r'^\{?(.*?)\}?$', r'\1', string)
+    # Equivalent to BRACES.sub(r'\1', string), without the cost of expanding the template.
+    match = BRACES.match(string)
+    if match is None:
+        return string
+    return match.group(1) + string[match.end():]
 
 def removeAt(s):
     """
@@ -28,3 +35,24 @@ def removeAt(s):
         str: The string with leading '@' characters removed.
     """
     return re.sub(r'^@+', '', s)
+
+def normalizeId(type, id):
+    """
+    Normalizes an article identifier so that equal identifiers compare equal.
+    Removes enclosing braces and surrounding whitespace. DOIs are
+    case-insensitive, so they are lowercased and any resolver prefix
+    (e.g., 'https://doi.org/' or 'doi:') is removed. PMCIDs are uppercased.
+
+    Args:
+        type (str): The identifier type (e.g., 'DOI', 'PMID').
+        id (str): The identifier.
+
+    Returns:
+        str: The normalized identifier.
+    """
+    id = removeBraces(id.strip()).strip()
+    if type == 'DOI':
+        id = DOI_PREFIX.sub('', id).lower()
+    elif type == 'PMCID':
+        id = id.upper()
+    return id
\ No newline at end of file
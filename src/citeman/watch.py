@@ -0,0 +1,114 @@
+from .stream import BLOCK_START, BRACES, NON_ENTRIES
+import os
+import re
+
+# The key of an entry, right after the '{' of its block start.
+KEY = re.compile(r"\s*([^,\s]+)\s*,")
+
+def fileStat(bib):
+    """
+    Describes the state of a file cheaply enough to poll it: its size, modification
+    time and inode (replaced by an atomic write).
+
+    Args:
+        bib (str): Path to the file.
+
+    Returns:
+        tuple: (size, mtime, inode), or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(bib)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+def scanEntries(text):
+    """
+    Cuts the text of a .bib file into its entries without parsing them.
+
+    Args:
+        text (str): The contents of the .bib file.
+
+    Returns:
+        list: (key, text) of every entry, in file order, each text running from the '@'
+        to the closing brace as the raw text of a parsed entry does. None if the file holds
+        anything a scan cannot reproduce: comments, @string, @preamble or @comment blocks,
+        duplicate or unreadable keys, or unbalanced braces.
+    """
+    entries = []
+    keys = set()
+    pos = 0
+    while True:
+        match = BLOCK_START.search(text, pos)
+        if match is None:
+            break
+        if match.group(1).lower() in NON_ENTRIES or text[pos:match.start()].strip():
+            return None
+        key = KEY.match(text, match.end())
+        if key is None or key.group(1) in keys:
+            return None
+        depth = 1
+        for brace in BRACES.finditer(text, match.end()):
+            depth += 1 if brace.group(0) == '{' else -1
+            if depth == 0:
+                break
+        else:
+            return None
+        keys.add(key.group(1))
+        entries.append((key.group(1), text[match.start():brace.end()]))
+        pos = brace.end()
+    if text[pos:].strip():
+        return None
+    return entries
+
+def sameText(stored, text) -> bool:
+    # Entries written by citeman are stored as serialized, ending with a newline
+    # the scanned text stops before.
+    return stored == text or (len(stored) == len(text) + 1 and stored[-1] == '\n' and stored.startswith(text))
+
+class DiskState():
+    """
+    What the .bib file held when citeman last read or wrote it, to tell what was
+    edited outside citeman since.
+
+    Attributes:
+        stat (tuple): The fileStat of the .bib file.
+        texts (dict): Maps the key of every entry in the file to its text.
+
+    Methods:
+        changed(self, bib): Checks whether the file was changed since.
+    """
+
+    def __init__(self, stat, texts):
+        self.stat = stat
+        self.texts = texts
+
+    @classmethod
+    def fromLibrary(cls, bib, library):
+        # The raw text of a parsed entry is its text in the file.
+        return cls(fileStat(bib), {entry.key: entry.raw for entry in library.entries})
+
+    def changed(self, bib) -> bool:
+        return fileStat(bib) != self.stat
+
+class FileChanges():
+    """
+    The entries edited outside citeman, found by Processor.reload.
+
+    Attributes:
+        added (list): The keys of the entries that appeared in the file.
+        changed (list): The keys of the entries whose text changed.
+        removed (list): The keys of the entries that disappeared from the file.
+        conflicts (list): The keys among these that also had changes not written yet.
+        parsed (int): The number of entries parsed again.
+    """
+
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.removed = []
+        self.conflicts = []
+        self.parsed = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
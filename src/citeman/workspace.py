@@ -0,0 +1,215 @@
+from .errors import LibraryEmptyError, StaleEntryError, UnsavedChangesError
+from .index import SharedIndex
+from .processor import Processor
+from .rendercache import RenderCache
+from .search import LIMIT, SearchIndex
+from .spans import span
+import os
+
+class Workspace():
+    """
+    Several .bib files managed together, e.g., one per chapter and a shared lab library.
+
+    Each file keeps its own Processor, which writes only that file. Keys and article IDs are
+    checked against the entries of every file, so an entry cannot be added to one file with
+    the key or DOI of an entry in another. The processors share the query history, the
+    search index and the render cache, and a Workspace can be used wherever the user
+    interface expects a Processor.
+
+    Attributes:
+        processors (list): The Processor of each .bib file, in the order they were opened.
+        primary (Processor): The processor of the first file, where new entries are added by default.
+        history (History): The query history shared by the processors.
+        index (SharedIndex): The indexes of all the files, looked up as one.
+        renderCache (RenderCache): The one-line summaries of the entries shown in lists.
+        searchIndex (SearchIndex): The full-text index of the entries of all files, built on first use.
+        writeError (Exception): Why the pending changes of a file could not be written in the
+            background, if they could not.
+
+    Methods:
+        processor(self, bib): Returns the processor of a .bib file.
+        owner(self, block): Returns the processor of the file an entry is in.
+        add(self, block, bib): Adds a block to a file of the workspace.
+        addAll(self, blocks, bib): Adds blocks to a file of the workspace at once.
+        remove(self, block): Removes a block from the file it is in.
+        updateField(self, block, field, value): Changes a field of an entry in the file it is in.
+        addField(self, block, field, value): Adds a field to an entry in the file it is in.
+        updateKey(self, block, key): Changes the key of an entry in the file it is in.
+        search(self, query, limit): Finds the entries of all files matching a query.
+        reload(self, resolve): Picks up the entries edited in any of the files outside citeman.
+        compact(self): Rewrites every file and the query history journal.
+        close(self): Flushes the pending changes of every file.
+    """
+
+    checkCriticalField = staticmethod(Processor.checkCriticalField)
+
+    def __init__(self, processors):
+        """
+        Initializes a Workspace from the processors of its .bib files.
+
+        Args:
+            processors (list): The Processor of each file, sharing a History.
+        """
+        self.processors = list(processors)
+        self.primary = self.processors[0]
+        self.history = self.primary.history
+        self.index = SharedIndex([processor.index for processor in self.processors])
+        self.renderCache = RenderCache()
+        self._searchIndex = None
+        for processor in self.processors:
+            processor.lookup = self.index
+            processor.renderCache = self.renderCache
+
+    @property
+    def entries(self):
+        entries = [entry for processor in self.processors for entry in processor.library.entries]
+        if not entries:
+            raise LibraryEmptyError()
+        return entries
+
+    @property
+    def queryHistory(self):
+        return self.primary.queryHistory
+
+    @property
+    def searchIndex(self) -> SearchIndex:
+        # Not persisted, as it spans several files. The processors keep it up to date.
+        if self._searchIndex is None:
+            with span('search.build'):
+                index = SearchIndex(entry for processor in self.processors for entry in processor.library.entries)
+            for processor in self.processors:
+                processor._searchIndex = index
+            self._searchIndex = index
+        return self._searchIndex
+
+    def processor(self, bib=None) -> Processor:
+        """
+        Returns the processor of a .bib file of the workspace.
+
+        Args:
+            bib (str): Path to the .bib file. Defaults to the first file.
+
+        Raises:
+            ValueError: If the file is not part of the workspace.
+        """
+        if bib is None:
+            return self.primary
+        path = os.path.realpath(bib)
+        for processor in self.processors:
+            if os.path.realpath(processor.bib) == path:
+                return processor
+        raise ValueError(f"Not in the workspace: {bib}")
+
+    def owner(self, block):
+        """
+        Returns the processor of the file an entry is in, or None if it is in none of them
+        (e.g., the result of a query not added yet).
+        """
+        for processor in self.processors:
+            if block in processor.index:
+                return processor
+        return None
+
+    def _processorOf(self, block) -> Processor:
+        return self.owner(block) or self.primary
+
+    def processQuery(self, input, record=True):
+        return self.primary.processQuery(input, record)
+
+    def recordQuery(self, query) -> None:
+        self.primary.recordQuery(query)
+
+    def getQuery(self, index):
+        return self.primary.getQuery(index)
+
+    def getLastQuery(self):
+        return self.primary.getLastQuery()
+
+    def idExists(self, query):
+        return self.primary.idExists(query)
+
+    def keyExists(self, key):
+        return self.primary.keyExists(key)
+
+    def add(self, block, bib=None) -> None:
+        """
+        Adds a block to a file of the workspace.
+
+        Args:
+            block (Block): The block to be added.
+            bib (str): The .bib file to add it to. Defaults to the first file.
+
+        Raises:
+            KeyExistsError: If an entry of any file has the same key.
+        """
+        self.processor(bib).add(block)
+
+    def addAll(self, blocks, bib=None) -> None:
+        self.processor(bib).addAll(blocks)
+
+    def remove(self, block) -> None:
+        owner = self.owner(block)
+        if owner is None:
+            # Replaced or removed when its file was reloaded.
+            raise StaleEntryError([block.key])
+        owner.remove(block)
+
+    def updateField(self, block, field, value) -> None:
+        self._processorOf(block).updateField(block, field, value)
+
+    def addField(self, block, field, value) -> None:
+        self._processorOf(block).addField(block, field, value)
+
+    def updateKey(self, block, key) -> None:
+        self._processorOf(block).updateKey(block, key)
+
+    def search(self, query, limit=LIMIT) -> list:
+        with span('processor.search'):
+            return self.searchIndex.search(query, limit)
+
+    def reload(self, resolve=None) -> dict:
+        """
+        Picks up the entries edited outside citeman in any of the files (see Processor.reload).
+
+        Returns:
+            dict: The FileChanges of each file that changed, by path.
+        """
+        changes = dict()
+        for processor in self.processors:
+            changed = processor.reload(resolve)
+            if changed is not None:
+                changes[processor.bib] = changed
+        return changes
+
+    def compact(self) -> None:
+        for processor in self.processors:
+            processor.compact(history=False)
+        self.history.compact()
+
+    def enableWriteBehind(self, *args, **kwargs) -> None:
+        for processor in self.processors:
+            processor.enableWriteBehind(*args, **kwargs)
+
+    def flush(self) -> None:
+        for processor in self.processors:
+            processor.flush()
+
+    @property
+    def writeError(self):
+        return next((processor.writeError for processor in self.processors if processor.writeError is not None), None)
+
+    def close(self) -> None:
+        """
+        Closes the processor of every file, even if the changes of one cannot be written.
+
+        Raises:
+            UnsavedChangesError: For the first file whose pending changes cannot be written.
+        """
+        unsaved = None
+        for processor in self.processors:
+            try:
+                processor.close()
+            except UnsavedChangesError as e:
+                unsaved = unsaved or e
+        if unsaved is not None:
+            raise unsaved
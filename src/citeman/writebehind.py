@@ -0,0 +1,94 @@
+from threading import Condition, Thread
+from time import monotonic
+import atexit
+import errno
+
+# Changes are flushed once no new change was made for DELAY seconds,
+# but no later than MAX_DELAY seconds after the first change not flushed yet.
+DELAY = 0.5
+MAX_DELAY = 5.0
+
+def transient(error) -> bool:
+    """
+    Tells whether a failed flush may succeed if tried again unchanged, e.g., when the disk was
+    full or the file locked by another program. A read-only file or file system, or entries
+    changed outside citeman (ExternalEditError), need the user to act first.
+    """
+    return (isinstance(error, OSError) and not isinstance(error, PermissionError)
+            and error.errno != errno.EROFS)
+
+class WriteBehind():
+    """
+    Calls a flush function in a background thread after changes are signalled, coalescing
+    the changes made in quick succession into a single call (debouncing). What is pending
+    is flushed when the WriteBehind is closed, which also happens at exit.
+
+    Attributes:
+        flush (function): Writes the pending changes.
+        delay (float): Seconds without a change after which the changes are flushed.
+        maxDelay (float): Seconds after the first change by which the changes are flushed.
+        error (Exception): The error of the last flush in the background, if it failed.
+            The changes are flushed again after the next delay if the error is transient,
+            else with the next change, and on close.
+
+    Methods:
+        changed(self): Signals a change to be flushed.
+        close(self): Stops the background thread and flushes what is pending.
+    """
+
+    def __init__(self, flush, delay=DELAY, maxDelay=MAX_DELAY):
+        self.flush = flush
+        self.delay = delay
+        self.maxDelay = maxDelay
+        self.error = None
+        self._condition = Condition()
+        # Times of the first and last changes not flushed yet.
+        self._first = None
+        self._last = None
+        self._closed = False
+        self._thread = Thread(target=self._run, name='citeman-write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def changed(self) -> None:
+        with self._condition:
+            now = monotonic()
+            if self._first is None:
+                self._first = now
+            self._last = now
+            self._condition.notify()
+
+    def _due(self) -> float:
+        return min(self._last + self.delay, self._first + self.maxDelay)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and (self._first is None or monotonic() < self._due()):
+                    self._condition.wait(None if self._first is None else self._due() - monotonic())
+                if self._closed:
+                    return
+                self._first = self._last = None
+            try:
+                self.flush()
+                self.error = None
+            except Exception as e:
+                self.error = e
+                if transient(e):
+                    self.changed()
+
+    def close(self) -> None:
+        """
+        Stops the background thread, waiting for a flush in progress, and flushes what is pending.
+
+        Raises:
+            Exception: The error of the flush, if what is pending could not be written.
+        """
+        with self._condition:
+            closed = self._closed
+            self._closed = True
+            self._condition.notify()
+        if not closed:
+            self._thread.join()
+            atexit.unregister(self.close)
+        self.flush()
@@ -0,0 +1,10 @@
+from citeman.entry import EntrySplitter
+
+def makeEntry(key, title=None, author="Doe, Jane", year="2017", **fields):
+    """
+    Makes an @article entry as split from a .bib file, e.g., makeEntry("a", DOI="10.1000/a").
+    The title defaults to 'Title of <key>'; fields given as None are left out.
+    """
+    fields = dict(title=f"Title of {key}" if title is None else title, author=author, year=year, **fields)
+    text = ", ".join(f"{name}={{{value}}}" for name, value in fields.items() if value is not None)
+    return EntrySplitter(f"@article{{{key}, {text}}}").split()
@@ -0,0 +1,20 @@
+from citeman.atomic import atomicWrite
+import os
+
+def test_atomicWrite_keeps_mode(tmp_path):
+    path = tmp_path / "bibliography.bib"
+    path.write_text("old")
+    os.chmod(path, 0o640)
+    atomicWrite(str(path), "new")
+    assert path.read_text() == "new"
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["bibliography.bib"]
+
+def test_atomicWrite_follows_symlink(tmp_path):
+    target = tmp_path / "real.bib"
+    target.write_text("old")
+    link = tmp_path / "bibliography.bib"
+    link.symlink_to(target)
+    atomicWrite(str(link), "new")
+    assert link.is_symlink()
+    assert target.read_text() == "new"
@@ -0,0 +1,46 @@
+from conftest import makeEntry
+from bibtexparser.entrypoint import parse_file, parse_string, write_string
+from bibtexparser.library import Library
+from citeman.bibfile import SerializedCache, appendEntry, removeEntry, writeBlocks
+from citeman.processor import Processor
+
+def test_appendEntry(tmp_path):
+    bib = tmp_path / "bibliography.bib"
+    blocks = [makeEntry(key, f"A {{Study}} of {key}") for key in ("a", "b", "c")]
+    for block in blocks:
+        appendEntry(bib, block)
+    assert bib.read_text() == write_string(Library(blocks))
+
+def test_removeEntry(tmp_path):
+    bib = tmp_path / "bibliography.bib"
+    blocks = [makeEntry(key, f"A {{Study}} of {key}") for key in ("a", "b", "c")]
+    bib.write_text(write_string(Library(blocks)))
+
+    assert removeEntry(bib, "b")
+    assert bib.read_text() == write_string(Library([blocks[0], blocks[2]]))
+    assert removeEntry(bib, "c")
+    assert bib.read_text() == write_string(Library([blocks[0]]))
+    assert not removeEntry(bib, "c")
+    assert removeEntry(bib, "a")
+    assert bib.read_text() == ""
+    assert parse_file(str(bib)).entries == []
+
+def test_writeBlocks(tmp_path):
+    bib = tmp_path / "bibliography.bib"
+    library = parse_string("@article{a, title={X}, year=2020, note=\"q\"}\n\n@string{s={S}}\n% c\n"
+                           "@comment{x}\n@preamble{p}\n@article{a, title={Again}}\n")
+    blocks = library.blocks + [makeEntry("b", "A {Study} of b")]
+    writeBlocks(bib, blocks, SerializedCache())
+    assert bib.read_text() == write_string(Library(blocks))
+
+def test_serializedCache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    processor = Processor(Library([makeEntry("a", "A {Study} of a"), makeEntry("b", "A {Study} of b")]))
+    processor.compact()
+    assert len(processor.serializedCache) == 2
+    entry = processor.library.entries[0]
+    processor.updateField(entry, 'year', '{2018}')
+    processor.updateKey(processor.library.entries[1], 'c')
+    processor.compact()
+    assert (tmp_path / "bibliography.bib").read_text() == write_string(processor.library)
+    assert [entry.key for entry in parse_file("bibliography.bib").entries] == ["a", "c"]
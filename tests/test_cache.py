@@ -0,0 +1,51 @@
+from requests import HTTPError, Response
+from citeman.cache import ResolverCache
+from citeman.query import Query
+import pytest
+
+BIBTEX = "@article{Doe_2017, title={A study}, author={Doe, Jane}, year={2017}}"
+
+class CountingQuery(Query):
+    calls = 0
+
+    @classmethod
+    def _result(cls, id):
+        cls.calls += 1
+        if id == "10.1000/404":
+            response = Response()
+            response.status_code = 404
+            raise HTTPError("404 Client Error", response=response)
+        return BIBTEX
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResolverCache(str(tmp_path / "resolver.sqlite"), maxEntries=2)
+    monkeypatch.setattr(Query, "cache", cache)
+    CountingQuery.calls = 0
+    yield cache
+    cache.close()
+
+def test_cache_hit(cache):
+    assert CountingQuery("10.1000/abc").success
+    query = CountingQuery("https://doi.org/10.1000/ABC")
+    assert query.success and query.block.key == "Doe_2017"
+    assert CountingQuery.calls == 1
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+def test_cache_negative(cache):
+    assert not CountingQuery("10.1000/404").success
+    assert not CountingQuery("10.1000/404").success
+    assert CountingQuery.calls == 1
+    assert cache.stats()['negativeHits'] == 1
+
+def test_cache_ttl_and_lru(cache):
+    cache.put("DOI", "10.1000/1", "bibtex", "a")
+    cache.put("DOI", "10.1000/2", "bibtex", "b")
+    assert cache.get("DOI", "10.1000/1", "bibtex") == (True, "a")
+    cache.put("DOI", "10.1000/3", "bibtex", "c")
+    # 10.1000/2 was the least recently used.
+    assert cache.get("DOI", "10.1000/2", "bibtex") == (False, None)
+    assert len(cache) == 2 and cache.evictions == 1
+    cache.ttl = -1
+    assert cache.get("DOI", "10.1000/1", "bibtex") == (False, None)
+    assert cache.expired == 1
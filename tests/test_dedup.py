@@ -0,0 +1,74 @@
+from conftest import makeEntry
+from bibtexparser.library import Library
+from citeman.dedup import Features, candidatePairs, findDuplicates, firstAuthor
+from citeman.processor import Processor
+import pytest
+
+def makeEntries():
+    return [
+        makeEntry("smith2019", "{Cardiac outcomes after cardiac surgery in adults}", "Smith, John and Doe, Jane", "2019",
+                  DOI="10.1000/card.1"),
+        makeEntry("doe2020", "Imaging in oncology", year="2020"),
+        # The same paper without its DOI, with a slightly different title.
+        makeEntry("Smith_2019", "Cardiac Outcomes After Cardiac Surgery in Adults.", "John Smith", "2019", journal="Heart"),
+        # Same title, different year.
+        makeEntry("smith2021", "Cardiac outcomes after cardiac surgery in adults", "Smith, John", "2021"),
+        # The same DOI under another key.
+        makeEntry("card1", "Something else", author=None, year=None, doi="https://doi.org/10.1000/CARD.1"),
+        makeEntry("roe2018", "Imaging in oncology", "Roe, Rick", "2020"),
+    ]
+
+def test_firstAuthor():
+    assert firstAuthor("{Müller}, Ana and Smith, John") == "muller"
+    assert firstAuthor("Ana Müller and John Smith") == "muller"
+    assert firstAuthor("") is None
+
+def test_findDuplicates():
+    entries = makeEntries()
+    assert (0, 2) in candidatePairs([Features(entry) for entry in entries])
+    groups = findDuplicates(entries)
+    assert len(groups) == 1
+    group = groups[0]
+    assert group.keep.key == "smith2019"
+    assert [entry.key for entry in group.duplicates] == ["Smith_2019", "card1"]
+    assert group.reasons == {"Smith_2019": "title 1.00", "card1": "same DOI"}
+
+def test_bridge_joins_no_different_ids():
+    title = "Cardiac outcomes after cardiac surgery in adults"
+    entries = [
+        makeEntry("first", title, "Smith, John", "2019", DOI="10.1000/first"),
+        makeEntry("second", title, "Smith, John", "2019", DOI="10.1000/second"),
+        # Matches both by title, but the two above are different works.
+        makeEntry("bridge", title, "Smith, John", "2019"),
+    ]
+    groups = findDuplicates(entries)
+    assert len(groups) == 1
+    assert groups[0].keep.key == "first"
+    assert [entry.key for entry in groups[0].duplicates] == ["bridge"]
+
+def test_mergeDuplicates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    processor = Processor(Library(makeEntries()))
+    processor.mergeDuplicates(processor.findDuplicates())
+    assert [entry.key for entry in processor.library.entries] == ["smith2019", "doe2020", "smith2021", "roe2018"]
+    assert processor.library.entries[0]["journal"] == "{Heart}"
+    assert not processor.index.hasKey("card1")
+    text = (tmp_path / "bibliography.bib").read_text()
+    assert "Heart" in text and "card1" not in text
+    assert processor.findDuplicates() == []
+
+def test_mergeDuplicates_failed_write(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    processor = Processor(Library(makeEntries()))
+    processor.compact()
+    before = (tmp_path / "bibliography.bib").read_text()
+    def fail():
+        raise OSError("Disk full")
+    monkeypatch.setattr(processor, "_writeLibrary", fail)
+    with pytest.raises(OSError):
+        processor.mergeDuplicates(processor.findDuplicates())
+    assert (tmp_path / "bibliography.bib").read_text() == before
+    assert [entry.key for entry in processor.library.entries] == ["smith2019", "doe2020", "Smith_2019", "smith2021", "card1", "roe2018"]
+    assert "journal" not in processor.library.entries[0].fields_dict
+    assert processor.index.hasKey("card1")
+    assert len(processor.findDuplicates()) == 1
@@ -0,0 +1,44 @@
+from citeman.extract import extractIds, trimDoi
+from citeman.query import classify
+
+REFERENCES = """
+1. Doe J, Roe R. A study of things. PLoS One. 2017;12(3):e0173664. doi:10.1371/journal.PONE.0173664. PMID: 28301498; PMCID: PMC5354266.
+2. Smith A. Physics (1982). https://doi.org/10.1016/0370-2693(82)90059-8
+3. Vaswani A, et al. Attention is all you need. arXiv preprint arXiv:1706.03762v5, 2017.
+4. Old preprint, https://arxiv.org/abs/hep-th/9901001v1; see https://pubmed.ncbi.nlm.nih.gov/1/
+5. Same study again (doi: 10.1371/journal.pone.0173664), pmc5354266.
+28301498
+  0042
+Page 12 of 2017; contact someone@example.org, PMIDs of 10.5 mg.
+"""
+
+def test_extractIds():
+    assert extractIds(REFERENCES) == [
+        "10.1371/journal.pone.0173664", "28301498", "PMC5354266",
+        "10.1016/0370-2693(82)90059-8", "10.48550/arxiv.1706.03762",
+        "10.48550/arxiv.hep-th/9901001", "1",
+    ]
+    assert extractIds("no identifiers here") == []
+
+def test_bare_numbers():
+    # Page numbers, years and reference numbers in a reference list are not PMIDs.
+    assert extractIds("Doe J. A study. doi:10.1000/abc\n12\n2019\n") == ["10.1000/abc"]
+    # In a list of IDs, one per line, they are.
+    assert extractIds("10.1000/abc\n 28301498 \n\nhttps://doi.org/10.1000/def\nPMID: 1\n0042\n") == [
+        "10.1000/abc", "28301498", "10.1000/def", "1", "42",
+    ]
+
+def test_trimDoi():
+    assert trimDoi("10.1000/abc).") == "10.1000/abc"
+    assert trimDoi("10.1016/0370-2693(82)90059-8;") == "10.1016/0370-2693(82)90059-8"
+
+def test_extracted_ids_classify():
+    assert [classify(id) for id in extractIds(REFERENCES)] == ["DOI", "PMID", "PMCID", "DOI", "DOI", "DOI", "PMID"]
+
+def test_extract_megabytes():
+    text = "\n".join(f"{i}. Author A. Title {i}. Journal. 2019;{i % 50}:{i}. doi:10.{1000 + i % 9000}/abc.{i}. PMID: {30000000 + i}."
+                     for i in range(20000))
+    ids = extractIds(text)
+    # Its speed is measured by benchmarks/bench_extract.py.
+    assert len(ids) == 40000
+    assert ids[:2] == ["10.1000/abc.0", "30000000"]
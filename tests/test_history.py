@@ -0,0 +1,51 @@
+from citeman.history import History, QueryRecord
+import time
+
+class FakeQuery():
+    def __init__(self, id, age=0):
+        self.id = id
+        self.type = 'DOI'
+        self.success = True
+        self.result = f"Found DOI {id}"
+        self.raw = "@article{key,\n}\n"
+        self.time = time.time() - age
+
+def test_history_journal(tmp_path):
+    path = tmp_path / "citeman.history"
+    history = History(path, maxRecords=3)
+    for i in range(7):
+        history.append(FakeQuery(f"10.1/{i}"))
+    assert [query.id for query in history.records] == ["10.1/4", "10.1/5", "10.1/6"]
+    # The journal is append-only; eviction happens in memory until compaction.
+    assert len(path.read_text().splitlines()) == 7
+
+    with open(path, 'a') as f:
+        f.write('{"id": "10.1/torn", "ty')
+    reloaded = History(path, maxRecords=3)
+    reloaded.load()
+    assert [query.id for query in reloaded.records] == ["10.1/4", "10.1/5", "10.1/6"]
+    assert all(isinstance(query, QueryRecord) for query in reloaded.records)
+    # More lines were dropped than kept, so the journal was compacted.
+    assert len(path.read_text().splitlines()) == 3
+
+def test_append_after_torn_line(tmp_path):
+    path = tmp_path / "citeman.history"
+    history = History(path)
+    history.append(FakeQuery("10.1/first"))
+    history.append(FakeQuery("10.1/second"))
+    # Crash mid-append: the journal ends halfway through the second record.
+    text = path.read_text()
+    path.write_text(text[:len(text) - 20])
+    history.append(FakeQuery("10.1/third"))
+    reloaded = History(path)
+    reloaded.load()
+    assert [query.id for query in reloaded.records] == ["10.1/first", "10.1/third"]
+
+def test_history_age(tmp_path):
+    path = tmp_path / "citeman.history"
+    history = History(path, maxRecords=None, maxAgeDays=1)
+    history.append(FakeQuery("10.1/old", age=2 * 86400))
+    history.append(FakeQuery("10.1/new"))
+    assert [query.id for query in history.records] == ["10.1/new"]
+    history.compact()
+    assert "10.1/old" not in path.read_text()
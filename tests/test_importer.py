@@ -0,0 +1,50 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bibtexparser.entrypoint import parse_file
+from bibtexparser.library import Library
+from citeman.importer import importIds
+from citeman.processor import Processor
+from citeman.history import History
+from citeman.query import CrossRef
+import threading
+import pytest
+
+BIBTEX = {
+    "/10.1000/1": "@article{Doe_2017, title={A study}, author={Doe, Jane and Roe, Rick}, year={2017}, DOI={10.1000/1}}",
+    "/10.1000/2": "@article{Doe_2017, title={A second study}, author={Doe, Jane}, year={2017}, DOI={10.1000/2}}",
+    "/10.1000/3": "@article{Roe_2018, title={No author}, year={2018}, DOI={10.1000/3}}",
+}
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = BIBTEX.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-bibtex")
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def resolver(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(CrossRef, "url", f"http://127.0.0.1:{server.server_port}")
+    yield
+    server.shutdown()
+
+def test_importIds(tmp_path, monkeypatch, resolver):
+    monkeypatch.chdir(tmp_path)
+    processor = Processor(Library(), History(str(tmp_path / "citeman.history")))
+    report = importIds(processor, ["10.1000/1", "10.1000/2", "10.1000/3", "10.1000/404"], workers=4)
+
+    assert [block.key for block in report.added] == ["Doe_2017", "Doe_2017a"]
+    assert sorted(id for id, _ in report.failures) == ["10.1000/3", "10.1000/404"]
+    assert len(processor.history) == 4
+    assert [entry.key for entry in parse_file("bibliography.bib").entries] == ["Doe_2017", "Doe_2017a"]
+
+    again = importIds(processor, ["10.1000/1"])
+    assert not again.added and len(again.duplicates) == 1
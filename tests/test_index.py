@@ -0,0 +1,45 @@
+from conftest import makeEntry
+from bibtexparser.library import Library
+from citeman.errors import KeyExistsError
+from citeman.index import Index
+from citeman.processor import Processor
+import pytest
+
+class FakeQuery():
+    def __init__(self, type, id):
+        self.type = type
+        self.id = id
+
+def test_index():
+    a, b = makeEntry("a", DOI="10.1/A"), makeEntry("b", DOI="10.1/a")
+    index = Index([a, b])
+    assert index.hasKey("a") and index.hasKey("b")
+    assert index.hasId("DOI", "10.1/a")
+    index.remove(a)
+    assert not index.hasKey("a")
+    assert index.hasId("DOI", "https://doi.org/10.1/A")
+    index.remove(b)
+    assert not index.hasId("DOI", "10.1/a")
+    assert len(index) == 0
+
+def test_processor_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    entries = [makeEntry(f"k{i}", DOI=f"10.1/{i}") for i in range(3)]
+    processor = Processor(Library(entries))
+    # Not only the first entry is checked.
+    assert processor.idExists(FakeQuery("DOI", "10.1/2"))
+    with pytest.raises(KeyExistsError):
+        processor.keyExists("k2")
+
+    block = makeEntry("new", DOI="10.1/new")
+    processor.updateKey(block, "renamed")
+    processor.add(block)
+    processor.keyExists("new")
+    with pytest.raises(KeyExistsError):
+        processor.keyExists("renamed")
+    processor.updateKey(block, "renamed2")
+    processor.keyExists("renamed")
+
+    processor.remove(entries[2])
+    processor.keyExists("k2")
+    assert not processor.idExists(FakeQuery("DOI", "10.1/2"))
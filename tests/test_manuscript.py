@@ -0,0 +1,46 @@
+from bibtexparser.entrypoint import parse_string
+from citeman.cli import main
+from citeman.manuscript import checkCitations, scanCitations, writePruned
+import io
+
+TEXT = r"""As shown [@smith2020, p. 3; -@doe:99]. Mail me at a@b.com.
+@knuth84 says so, as does @{odd_key}.
+\citep[see][p. 2]{alpha, beta} and \parencite*{gamma}
+\textcite{delta,
+ epsilon}. Not \@escaped. Trailing @end.
+"""
+
+def test_scanCitations():
+    assert list(scanCitations(io.StringIO(TEXT))) == [
+        (1, "smith2020"), (1, "doe:99"), (2, "knuth84"), (2, "odd_key"), (3, "alpha"), (3, "beta"),
+        (3, "gamma"), (4, "delta"), (4, "epsilon"), (5, "end"),
+    ]
+
+def test_scanCitations_across_chunks():
+    text = TEXT * 50
+    expected = list(scanCitations(io.StringIO(text)))
+    for chunkSize in (1, 7, 100):
+        assert list(scanCitations(io.StringIO(text), chunkSize)) == expected
+
+def test_checkCitations(tmp_path):
+    (tmp_path / "chapters").mkdir()
+    (tmp_path / "chapters" / "one.md").write_text("See [@a] and [@missing].\n")
+    (tmp_path / "chapters" / "two.tex").write_text("\\makeatletter\\@maketitle{\\@title}\n\\cite{c}\n")
+    (tmp_path / "chapters" / "notes.log").write_text("@b\n")
+    library = parse_string("@string{j = {Journal}}\n@article{a, title={A}}\n@article{b, title={B}}\n@article{c, title={C}}")
+    report = checkCitations([str(tmp_path / "chapters")], library.entries_dict)
+    assert list(report.cited) == ["a", "missing", "c"]
+    assert report.missing == ["missing"]
+    assert report.cited["missing"] == (str(tmp_path / "chapters" / "one.md"), 1)
+    assert report.unused == ["b"]
+    out = io.StringIO()
+    assert writePruned([library], report, out) == 2
+    assert [entry.key for entry in parse_string(out.getvalue()).entries] == ["a", "c"]
+    assert "@string{j = {Journal}}" in out.getvalue()
+
+def test_scan_creates_no_files(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "paper.md").write_text("As shown [@a].\n")
+    assert main(["scan", "paper.md"]) == 1
+    assert "paper.md:1: Missing citation key: a" in capsys.readouterr().out
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["paper.md"]
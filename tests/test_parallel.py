@@ -0,0 +1,49 @@
+from bibtexparser.entrypoint import parse_string
+from bibtexparser.model import DuplicateBlockKeyBlock
+from citeman.parallel import chunkOffsets, parallelParse
+
+ENTRY = """@article{{key{0},
+\ttitle = {{{{Study {0}: a {{nested}} title}}}},
+\tauthor = {{Doe, Jane and Roe, Rick}},
+\tabstract = {{Line one
+{{Nested}} line two
+and line three}},
+\tyear = {{{{2017}}}}
+}}
+"""
+
+def bibliography(n, duplicates=()):
+    parts = []
+    for i in range(n):
+        parts.append(ENTRY.format(i))
+        if i % 7 == 3:
+            parts.append(f"% A comment after entry {i}\n")
+    for i in duplicates:
+        parts.append(ENTRY.format(i).replace("Study", "Duplicate"))
+    return "\n".join(parts)
+
+def comparable(blocks):
+    # The error of a DuplicateBlockKeyBlock is an Exception, which only equals itself.
+    return [
+        (block.key, block.start_line, block.raw, block.previous_block, block.ignore_error_block)
+        if isinstance(block, DuplicateBlockKeyBlock) else block
+        for block in blocks
+    ]
+
+def test_chunkOffsets():
+    text = bibliography(40)
+    offsets = chunkOffsets(text, 4)
+    assert len(offsets) == 4
+    for offset in offsets[1:]:
+        assert text.startswith("@article{key", offset)
+
+def test_parallelParse_matches_serial():
+    text = bibliography(60, duplicates=(2, 59))
+    serial = parse_string(text)
+    parallel = parallelParse(text, jobs=3)
+    assert comparable(parallel.blocks) == comparable(serial.blocks)
+    assert [block.key for block in parallel.failed_blocks if isinstance(block, DuplicateBlockKeyBlock)] == ['key2', 'key59']
+
+def test_parallelParse_strings_serial():
+    text = '@string{jn = "Journal"}\n\n' + bibliography(20)
+    assert parallelParse(text, jobs=4).blocks == parse_string(text).blocks
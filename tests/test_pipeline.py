@@ -0,0 +1,101 @@
+from citeman.pipeline import QueryPipeline
+from citeman.ui_pretty import prettyPrintQueryShort
+from threading import Event
+from types import SimpleNamespace
+import time
+
+class FakeQuery():
+    def __init__(self, id):
+        self.id = id
+        self.success = True
+
+class FakeProcessor():
+    # Each query resolves once its event is set, in whatever order the test chooses.
+    def __init__(self, ids):
+        self.events = {id: Event() for id in ids}
+        self.resolved = []
+        self.started = []
+        self.history = SimpleNamespace(records=[])
+
+    def processQuery(self, input, record=True):
+        self.started.append(input)
+        self.events[input].wait(5)
+        self.resolved.append(input)
+        query = FakeQuery(input)
+        if record:
+            self.recordQuery(query)
+        return query
+
+    def recordQuery(self, query):
+        self.history.records.append(query)
+
+def test_results_in_submission_order():
+    processor = FakeProcessor(["a", "b", "c"])
+    pipeline = QueryPipeline(processor, workers=3)
+    try:
+        for id in ["a", "b", "c"]:
+            pipeline.submit(id)
+        assert len(pipeline) == 3 and pipeline.ready() is None
+
+        # A later query resolving first waits for the earlier ones.
+        processor.events["c"].set()
+        pipeline.queue[2].future.result(5)
+        assert pipeline.ready() is None
+        assert pipeline.readyCount() == 1
+        assert [pending.id for pending in pipeline.unresolved()] == ["a", "b"]
+
+        processor.events["a"].set()
+        assert pipeline.next(5).id == "a"
+        processor.events["b"].set()
+        assert [pipeline.next(5).id, pipeline.next(5).id] == ["b", "c"]
+        assert not pipeline and processor.resolved[0] == "c"
+    finally:
+        for event in processor.events.values():
+            event.set()
+        pipeline.close(wait=True)
+
+def test_pending_shown_in_history():
+    processor = FakeProcessor(["a"])
+    pipeline = QueryPipeline(processor)
+    try:
+        pending = pipeline.submit("a")
+        assert "Pending" in prettyPrintQueryShort(pending)
+        processor.events["a"].set()
+        assert "Success" in prettyPrintQueryShort(pipeline.next(5))
+        assert not pending.pending and pipeline.unresolved() == []
+    finally:
+        pipeline.close(wait=True)
+
+def test_history_lists_each_query_once():
+    processor = FakeProcessor(["a", "b"])
+    pipeline = QueryPipeline(processor)
+    try:
+        pipeline.submit("a")
+        pipeline.submit("b")
+        assert [query.id for query in pipeline.history()] == ["a", "b"]
+        progress = pipeline.progress
+        processor.events["b"].set()
+        assert pipeline.waitForProgress(progress, 5) == progress + 1
+        listed = pipeline.history()
+        assert [query.id for query in listed] == ["b", "a"]
+        assert isinstance(listed[0], FakeQuery) and listed[1].pending
+        assert pipeline.waitForProgress(progress + 1, 0.01) == progress + 1
+    finally:
+        for event in processor.events.values():
+            event.set()
+        pipeline.close(wait=True)
+
+def test_close_cancels_queued():
+    processor = FakeProcessor(["a", "b"])
+    pipeline = QueryPipeline(processor, workers=1)
+    pipeline.submit("a")
+    pipeline.submit("b")
+    deadline = time.monotonic() + 5
+    while not processor.started and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # "a" is resolving and finishes; "b" is cancelled before it starts.
+    pipeline.close()
+    processor.events["a"].set()
+    assert [pending.id for pending in pipeline.queue] == ["a"]
+    assert pipeline.next(5).id == "a"
+    assert processor.resolved == ["a"]
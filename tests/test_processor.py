@@ -0,0 +1,197 @@
+from conftest import makeEntry
+from bibtexparser.entrypoint import parse_file, write_string
+from bibtexparser.library import Library
+from citeman.errors import ExternalEditError, KeyExistsError, UnsavedChangesError
+from citeman.processor import Processor
+import errno
+import pytest
+import time
+
+def makeProcessor(tmp_path, monkeypatch, keys=("a", "b", "c")):
+    monkeypatch.chdir(tmp_path)
+    processor = Processor(Library([makeEntry(key, DOI=f"10.1000/{key}") for key in keys]))
+    processor.compact()
+    return processor
+
+def fileKeys():
+    return [entry.key for entry in parse_file("bibliography.bib").entries]
+
+def test_transaction_commit(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    with processor.transaction():
+        processor.add(makeEntry("d"))
+        processor.add(makeEntry("e"))
+        assert fileKeys() == ["a", "b", "c"]
+    assert fileKeys() == ["a", "b", "c", "d", "e"]
+
+    with processor.transaction():
+        a, b = processor.library.entries[:2]
+        processor.remove(b)
+        processor.updateKey(a, "z")
+        processor.updateField(a, 'year', '{2020}')
+        processor.add(makeEntry("f"))
+    assert fileKeys() == ["z", "c", "d", "e", "f"]
+    assert (tmp_path / "bibliography.bib").read_text() == write_string(processor.library)
+    assert processor.index.hasKey("z") and not processor.index.hasKey("a")
+
+def test_transaction_rollback(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    before = (tmp_path / "bibliography.bib").read_text()
+    a, b, c = processor.library.entries
+    with pytest.raises(RuntimeError):
+        with processor.transaction():
+            processor.add(makeEntry("d", DOI="10.1000/d"))
+            processor.remove(b)
+            processor.updateKey(a, "z")
+            processor.updateField(c, 'year', '{2020}')
+            raise RuntimeError()
+    assert (tmp_path / "bibliography.bib").read_text() == before
+    assert [entry.key for entry in processor.library.entries] == ["a", "b", "c"]
+    assert processor.library.entries_dict.keys() == {"a", "b", "c"}
+    assert c["year"] == "{2017}"
+    assert sorted(processor.index.keys) == ["a", "b", "c"]
+    assert processor.index.hasId("DOI", "10.1000/b") and not processor.index.hasId("DOI", "10.1000/d")
+
+def test_add_duplicate_key(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    with pytest.raises(KeyExistsError):
+        processor.addAll([makeEntry("d"), makeEntry("a")])
+    assert processor.library.failed_blocks == []
+    assert [entry.key for entry in processor.library.entries] == ["a", "b", "c"]
+    assert fileKeys() == ["a", "b", "c"]
+    with pytest.raises(KeyExistsError):
+        processor.updateKey(processor.library.entries[0], "b")
+
+def test_updateKey_then_remove(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    entry = processor.library.entries[0]
+    processor.updateKey(entry, "z")
+    processor.remove(entry)
+    assert [entry.key for entry in processor.library.entries] == ["b", "c"]
+
+def test_write_behind(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    flushes = []
+    flush = processor.flush
+    monkeypatch.setattr(processor, 'flush', lambda: flushes.append(1) or flush())
+    # Delays long enough that nothing is written before close.
+    processor.enableWriteBehind(delay=60, maxDelay=60)
+    processor.add(makeEntry("d"))
+    processor.remove(processor.library.entries[1])
+    processor.add(makeEntry("e"))
+    assert fileKeys() == ["a", "b", "c"]
+    processor.close()
+    assert fileKeys() == ["a", "c", "d", "e"]
+    assert len(flushes) == 1
+
+def test_write_behind_debounce(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    processor.enableWriteBehind(delay=0.01, maxDelay=0.05)
+    try:
+        processor.addAll([makeEntry("d"), makeEntry("e")])
+        deadline = time.monotonic() + 5
+        while fileKeys() != ["a", "b", "c", "d", "e"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert fileKeys() == ["a", "b", "c", "d", "e"]
+    finally:
+        processor.close()
+    assert fileKeys() == ["a", "b", "c", "d", "e"]
+
+def test_write_behind_error(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    errors = [OSError(errno.ENOSPC, "No space left on device"), PermissionError(errno.EACCES, "Permission denied")]
+    attempts = []
+    writePending = processor._writePending
+    def failing(pending):
+        attempts.append(1)
+        if len(errors) > 1:
+            raise errors.pop(0)
+        if errors:
+            raise errors[0]
+        writePending(pending)
+    monkeypatch.setattr(processor, '_writePending', failing)
+    processor.enableWriteBehind(delay=0.01, maxDelay=0.05)
+    processor.add(makeEntry("d"))
+    deadline = time.monotonic() + 5
+    while not isinstance(processor.writeError, PermissionError) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The full disk is retried, the read-only file is not.
+    assert isinstance(processor.writeError, PermissionError)
+    time.sleep(0.2)
+    assert len(attempts) == 2 and fileKeys() == ["a", "b", "c"]
+
+    with pytest.raises(UnsavedChangesError) as error:
+        processor.close()
+    assert error.value.error is processor.writeError
+    errors.clear()
+    processor.close()
+    assert fileKeys() == ["a", "b", "c", "d"]
+
+def editFile(edit):
+    path = "bibliography.bib"
+    with open(path) as f:
+        text = f.read()
+    with open(path, "w") as f:
+        f.write(edit(text))
+
+def test_reload(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    a, b, c = processor.library.entries
+    editFile(lambda text: text.replace("Title of b", "Edited title")
+             .replace("10.1000/c", "10.1000/z") + "\n@article{d, title={New}, author={Roe, Rick}, year={2020}}\n")
+    changes = processor.reload()
+    assert (changes.changed, changes.added, changes.removed, changes.parsed) == (["b", "c"], ["d"], [], 3)
+    entries = processor.library.entries
+    assert [entry.key for entry in entries] == ["a", "b", "c", "d"]
+    assert entries[0] is a and entries[1] is not b
+    assert entries[1]["title"] == "{Edited title}"
+    assert processor.index.hasId("DOI", "10.1000/z") and not processor.index.hasId("DOI", "10.1000/c")
+    assert processor.reload() is None
+
+def test_write_keeps_external_edits(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    editFile(lambda text: text + "\n@article{d, title={New}, author={Roe, Rick}, year={2020}}\n")
+    with pytest.raises(KeyExistsError):
+        processor.add(makeEntry("d"))
+    processor.remove(processor.library.entries[0])
+    processor.compact()
+    assert fileKeys() == ["b", "c", "d"]
+
+def test_reload_conflict(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    b = processor.library.entries[1]
+    with pytest.raises(ExternalEditError) as error:
+        with processor.transaction():
+            processor.updateField(b, 'year', '{2020}')
+            editFile(lambda text: text.replace("Title of b", "Edited title"))
+    assert error.value.keys == ["b"]
+    assert "Edited title" in open("bibliography.bib").read()
+    # Written at once, so the edit conflicts with the file and is undone.
+    with pytest.raises(ExternalEditError):
+        processor.updateField(processor.library.entries[1], 'year', '{2020}')
+    assert processor.library.entries[1]["year"] == "{2017}"
+    processor.reload(resolve='file')
+    assert processor.library.entries[1]["title"] == "{Edited title}"
+    assert processor.library.entries[1]["year"] == "{2017}"
+
+def test_edits_written(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    a, b = processor.library.entries[:2]
+    processor.updateField(a, 'year', '{2020}')
+    processor.addField(b, 'journal', '{Journal}')
+    processor.updateKey(b, "z")
+    entries = parse_file("bibliography.bib").entries_dict
+    assert list(entries) == ["a", "z", "c"]
+    assert entries["a"]["year"] == "{2020}" and entries["z"]["journal"] == "{Journal}"
+    with pytest.raises(KeyExistsError):
+        processor.updateKey(a, "c")
+    assert fileKeys() == ["a", "z", "c"]
+
+    processor.enableWriteBehind(delay=60, maxDelay=60)
+    try:
+        processor.updateField(a, 'year', '{2021}')
+        assert parse_file("bibliography.bib").entries_dict["a"]["year"] == "{2020}"
+        processor.flush()
+        assert parse_file("bibliography.bib").entries_dict["a"]["year"] == "{2021}"
+    finally:
+        processor.close()
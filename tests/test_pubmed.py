@@ -0,0 +1,85 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from citeman.query import PubMed, PubMedCentral, makeQuery
+from citeman.importer import resolveIds
+import json
+import threading
+import pytest
+
+SUMMARIES = {
+    "28301498": {
+        "uid": "28301498",
+        "pubdate": "2017 Mar 16",
+        "source": "PLoS One",
+        "fulljournalname": "PloS one",
+        "authors": [{"name": "Smith JA", "authtype": "Author"}, {"name": "Doe J", "authtype": "Author"}],
+        "title": "A study of things.",
+        "volume": "12",
+        "issue": "3",
+        "pages": "e0173664",
+        "articleids": [{"idtype": "pubmed", "value": "28301498"}, {"idtype": "doi", "value": "10.1371/journal.pone.0173664"}],
+    },
+    "5354266": {
+        "uid": "5354266",
+        "pubdate": "2017 Mar 16",
+        "fulljournalname": "PloS one",
+        "authors": [{"name": "Smith JA", "authtype": "Author"}],
+        "title": "A study of things.",
+        "articleids": [{"idtype": "pmid", "value": "28301498"}, {"idtype": "pmcid", "value": "PMC5354266"}],
+    },
+    "1": {"uid": "1", "pubdate": "1975 Jun", "authors": [{"name": "Makar AB", "authtype": "Author"}],
+          "title": "Formate assay.", "source": "Biochem Med", "articleids": []},
+}
+
+class Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        ids = parse_qs(urlparse(self.path).query)["id"][0].split(",")
+        Handler.requests.append(ids)
+        result = {"uids": [id for id in ids if id in SUMMARIES]}
+        for id in ids:
+            result[id] = SUMMARIES.get(id, {"uid": id, "error": "cannot get document summary"})
+        body = json.dumps({"result": result}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def eutils(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(PubMed, "url", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(PubMed, "_prefetched", dict())
+    monkeypatch.setattr(PubMedCentral, "_prefetched", dict())
+    Handler.requests = []
+    yield
+    server.shutdown()
+
+def test_pubmed_query(eutils):
+    query = makeQuery("28301498")
+    assert isinstance(query, PubMed) and query.success
+    assert query.block.key == "Smith_2017"
+    assert query.block.get("author").value == "{Smith, JA and Doe, J}"
+    assert query.block.get("title").value == "{A study of things}"
+    assert query.block.get("DOI").value == "{10.1371/journal.pone.0173664}"
+    assert not makeQuery("99999999").success
+
+def test_pubmed_batch(eutils, monkeypatch):
+    monkeypatch.setattr(PubMed, "batchSize", 2)
+    queries = resolveIds(["28301498", "1", "99999999"], workers=3)
+    assert [query.success for query in queries] == [True, True, False]
+    assert Handler.requests == [["28301498", "1"], ["99999999"]]
+
+def test_pmc_query(eutils):
+    query = makeQuery("PMC5354266")
+    assert isinstance(query, PubMedCentral) and query.success
+    assert Handler.requests == [["5354266"]]
+    assert query.block.get("PMID").value == "{28301498}"
+    assert query.block.get("PMCID").value == "{PMC5354266}"
+    assert not makeQuery("PMC99999999").success
@@ -0,0 +1,67 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from citeman.resolver import ResolverClient, TokenBucket, configureSharedClient, sharedClient
+from time import monotonic
+import threading
+import pytest
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    responses = []
+    requests = []
+
+    def do_GET(self):
+        Handler.requests.append((self.path, self.headers.get("User-Agent")))
+        status, headers = Handler.responses.pop(0) if Handler.responses else (200, {})
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    Handler.responses = []
+    Handler.requests = []
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+def test_retry(server):
+    Handler.responses = [(503, {}), (429, {"Retry-After": "0"}), (200, {})]
+    client = ResolverClient(backoff=0.01, mailto="me@example.org")
+    response = client.get(f"{server}/10.1000/1")
+    assert response.status_code == 200
+    assert len(Handler.requests) == 3
+    assert "mailto:me@example.org" in Handler.requests[0][1]
+
+def test_retry_gives_up(server):
+    Handler.responses = [(500, {})] * 3
+    client = ResolverClient(retries=2, backoff=0.01)
+    assert client.get(f"{server}/10.1000/1").status_code == 500
+    assert len(Handler.requests) == 3
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=100, capacity=1)
+    start = monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert monotonic() - start >= 0.045
+    bucket.pause(0.05)
+    start = monotonic()
+    bucket.acquire()
+    assert monotonic() - start >= 0.045
+
+def test_configureSharedClient():
+    configureSharedClient(rate=2.0, mailto="me@example.org")
+    try:
+        client = sharedClient()
+        assert client.bucket.rate == 2.0
+        assert "mailto:me@example.org" in client.session.headers['User-Agent']
+        assert sharedClient() is client
+    finally:
+        configureSharedClient()
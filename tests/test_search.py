@@ -0,0 +1,58 @@
+from conftest import makeEntry
+from bibtexparser.library import Library
+from citeman.processor import Processor
+from citeman.search import SearchIndex, searchPath, tokenize
+
+ENTRIES = [
+    ("smith2019", "Smith, John and Müller, Ana", "Cardiac outcomes after surgery", 2019, "10.1000/card.1"),
+    ("doe2020", "Doe, Jane", "Outcomes of cardiology trials by Smith", 2020, "10.1000/card.2"),
+    ("roe2018", "Roe, Rick", "Imaging in oncology", 2018, "10.2000/onc.3"),
+]
+
+def makeEntries():
+    return [makeEntry(key, f"{{{title}}}", author, year, DOI=doi) for key, author, title, year, doi in ENTRIES]
+
+def keys(entries):
+    return [entry.key for entry in entries]
+
+def test_tokenize():
+    assert tokenize("{Müller}, Ana and Smith-Jones") == ["muller", "ana", "and", "smith", "jones"]
+
+def test_search():
+    index = SearchIndex(makeEntries())
+    # An author match ranks above a title match.
+    assert keys(index.search("smith")) == ["smith2019", "doe2020"]
+    assert keys(index.search("cardi outcomes")) == ["smith2019", "doe2020"]
+    assert keys(index.search("muller 2019")) == ["smith2019"]
+    assert keys(index.search("10.2000/onc.3")) == ["roe2018"]
+    assert keys(index.search("smith oncology")) == []
+    # One-letter terms only match whole words.
+    assert index.search("c") == []
+
+def test_processor_search(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    entries = makeEntries()
+    processor = Processor(Library(entries[:2]))
+    assert keys(processor.search("outcomes")) == ["smith2019", "doe2020"]
+    processor.add(entries[2])
+    assert keys(processor.search("oncology")) == ["roe2018"]
+    processor.updateField(entries[2], 'title', "Imaging in cardiology")
+    assert keys(processor.search("oncology")) == []
+    processor.remove(entries[0])
+    assert keys(processor.search("cardi")) == ["doe2020", "roe2018"]
+
+def test_persisted(tmp_path):
+    bib = str(tmp_path / "bibliography.bib")
+    entries = makeEntries()
+    with open(bib, 'w') as f:
+        f.write("\n\n".join(entry.raw for entry in entries))
+    SearchIndex(entries).save(bib, entries)
+    assert (tmp_path / ".bibliography.bib.search").exists()
+    assert searchPath(bib) == str(tmp_path / ".bibliography.bib.search")
+    loaded = SearchIndex.load(bib, entries)
+    assert keys(loaded.search("smith")) == ["smith2019", "doe2020"]
+    loaded.remove(entries[0])
+    assert keys(loaded.search("smith")) == ["doe2020"]
+    with open(bib, 'a') as f:
+        f.write("\n")
+    assert SearchIndex.load(bib, entries) is None
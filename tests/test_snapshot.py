@@ -0,0 +1,79 @@
+from bibtexparser.entrypoint import parse_file
+from citeman.entry import EntrySplitter
+from citeman.prepare import prepare_library
+from citeman.processor import Processor
+from citeman.search import SearchIndex
+from citeman.snapshot import fingerprint, loadSnapshot, snapshotPath
+import pickle
+
+BIB = """@article{a,
+\ttitle = {{A study}},
+\tauthor = {Doe, Jane and Roe, Rick},
+\tyear = {{2017}}
+}
+
+% A comment
+
+@book{b,
+\ttitle = {{A book}}
+}
+"""
+
+def test_snapshot_hit(tmp_path):
+    bib = tmp_path / "bibliography.bib"
+    bib.write_text(BIB)
+    parsed = prepare_library(str(bib))
+    assert (tmp_path / ".bibliography.bib.snapshot").exists()
+    cached = loadSnapshot(str(bib), fingerprint(str(bib), bib.read_bytes()))
+    assert cached is not None
+    assert cached.blocks == parsed.blocks
+    assert cached.blocks == parse_file(str(bib)).blocks
+
+def test_snapshot_miss(tmp_path):
+    bib = tmp_path / "bibliography.bib"
+    bib.write_text(BIB)
+    prepare_library(str(bib))
+    bib.write_text(BIB.replace("A book", "Another book"))
+    assert loadSnapshot(str(bib), fingerprint(str(bib), bib.read_bytes())) is None
+    library = prepare_library(str(bib))
+    assert library.entries_dict["b"]["title"] == "{Another book}"
+    assert snapshotPath(str(bib)) == str(tmp_path / ".bibliography.bib.snapshot")
+
+def contents(library):
+    # What a parse of the file gives, but for line numbers, which citeman does not keep up to date.
+    return [(entry.entry_type, entry.key, [(field.key, field.value) for field in entry.fields], entry.raw)
+            for entry in library.entries]
+
+def test_snapshot_saved_on_close(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bib = tmp_path / "bibliography.bib"
+    bib.write_text(BIB)
+    processor = Processor(prepare_library(str(bib)))
+    processor.searchIndex
+    processor.add(EntrySplitter("@article{c, title={New}, author={Roe, Rick}, year={2020}}").split())
+    processor.updateField(processor.library.entries_dict["a"], 'year', '{2018}')
+    current = fingerprint(str(bib), bib.read_bytes())
+    assert loadSnapshot(str(bib), current) is None
+    processor.close()
+    cached = loadSnapshot(str(bib), current)
+    assert cached is not None
+    assert contents(cached) == contents(parse_file(str(bib)))
+    loaded = SearchIndex.load(str(bib), cached.entries)
+    assert [entry.key for entry in loaded.search("roe")] == ["c", "a"]
+
+def test_pickled_snapshot_ignored(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bib = tmp_path / "bibliography.bib"
+    bib.write_text(BIB)
+    current = fingerprint(str(bib), bib.read_bytes())
+    # A snapshot shipped with a shared .bib file is never unpickled.
+    with open(snapshotPath(str(bib)), "wb") as f:
+        pickle.dump(current, f)
+        pickle.dump(Exploit(), f)
+    assert loadSnapshot(str(bib), current) is None
+    assert prepare_library(str(bib)).blocks == parse_file(str(bib)).blocks
+    assert not (tmp_path / "exploited").exists()
+
+class Exploit():
+    def __reduce__(self):
+        return (open, ("exploited", "w"))
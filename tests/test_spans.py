@@ -0,0 +1,43 @@
+from bibtexparser.library import Library
+from citeman import spans
+from citeman.entry import EntrySplitter
+from citeman.processor import Processor
+from citeman.spans import Span, addHook, disable, enable, removeHook, span, timed
+
+def test_span_disabled():
+    assert not isinstance(span('x'), Span)
+    with span('x'):
+        pass
+    assert spans._profile is None
+
+def test_profile():
+    profile = enable()
+    try:
+        for _ in range(3):
+            with span('outer'):
+                with span('inner'):
+                    pass
+        timed('decorated')(lambda: None)()
+    finally:
+        disable()
+    stats = profile.asDict()
+    assert stats['outer']['count'] == 3 and stats['inner']['count'] == 3
+    assert stats['outer']['total'] >= stats['inner']['total']
+    assert stats['decorated']['count'] == 1
+    assert profile.report().splitlines()[1].startswith('outer')
+    with span('after'):
+        pass
+    assert 'after' not in profile.stats
+
+def test_hooks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    received = []
+    hook = lambda name, seconds: received.append(name)
+    addHook(hook)
+    try:
+        processor = Processor(Library())
+        processor.add(EntrySplitter("@article{key, title={Title}, year={2020}}").split())
+    finally:
+        removeHook(hook)
+    assert received[-2:] == ['bibfile.append', 'processor.add']
+    assert not spans._active
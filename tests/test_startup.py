@@ -0,0 +1,14 @@
+import subprocess
+import sys
+
+def test_startup_defers_network_imports():
+    code = ("import citeman.cli, citeman.ui, sys; "
+            "print(sorted(m for m in ('requests', 'pkg_resources', 'concurrent.futures.process') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_core_imports_no_ui():
+    code = ("import citeman.processor, citeman.workspace, sys; "
+            "print(sorted(m for m in sys.modules if m.startswith('citeman.ui') or m in ('colors', 'consolemenu')))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,54 @@
+from bibtexparser.entrypoint import parse_string
+from citeman.cli import main
+from citeman.stream import exportEntries, iterEntries, validate
+import io
+import pytest
+
+BIB = """% Maintained by someone@example.org
+@string{plos = {PLOS ONE}}
+
+@article{a,
+\ttitle = {{A {Study} of \\{escaped\\} braces}},
+\tauthor = {Doe, Jane and Roe, Rick},
+\tyear = {{2017}}
+}
+
+@comment{Not an entry}
+
+@book{b,
+\ttitle = "A book",
+\tyear = 2018
+}
+"""
+
+@pytest.mark.parametrize("chunkSize", [1, 3, 16, 1 << 16])
+def test_iterEntries(chunkSize):
+    streamed = list(iterEntries(io.StringIO(BIB), chunkSize))
+    parsed = parse_string(BIB).entries
+    assert [entry.key for entry in streamed] == ["a", "b"]
+    assert [entry.fields_dict.keys() for entry in streamed] == [entry.fields_dict.keys() for entry in parsed]
+    assert [entry["title"] for entry in streamed] == [entry["title"] for entry in parsed]
+    assert streamed[1].raw == '@book{b,\n\ttitle = "A book",\n\tyear = 2018\n}'
+
+def test_validate():
+    bib = BIB + "\n@article{a,\n\ttitle = {Again}\n}\n"
+    problems = list(validate(io.StringIO(bib)))
+    assert (17, "Duplicate key: a") in problems
+    assert (12, "Missing critical field: author (b)") in problems
+    assert len(problems) == 4
+
+def test_exportEntries():
+    out = io.StringIO()
+    assert exportEntries(iterEntries(io.StringIO(BIB)), out, keys={"b"}) == 1
+    assert out.getvalue() == '@book{b,\n\ttitle = "A book",\n\tyear = 2018\n}\n'
+
+def test_commands_read_bib_option(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lab.bib").write_text(BIB)
+    assert main(["--bib", "lab.bib", "list"]) == 0
+    assert [line.split("\t")[0] for line in capsys.readouterr().out.splitlines()] == ["a", "b"]
+    assert main(["--bib", "lab.bib", "validate"]) == 1
+    assert "lab.bib:12: Missing critical field: author (b)" in capsys.readouterr().out
+    assert main(["--bib", "lab.bib", "export", "out.bib", "--keys", "b"]) == 0
+    assert (tmp_path / "out.bib").read_text() == '@book{b,\n\ttitle = "A book",\n\tyear = 2018\n}\n'
+    assert not (tmp_path / "bibliography.bib").exists()
@@ -0,0 +1,66 @@
+from conftest import makeEntry
+from bibtexparser.entrypoint import parse_file
+from bibtexparser.library import Library
+from citeman.processor import Processor
+from citeman.ui_query import addEntry
+from citeman.ui_remove import removeEntry
+
+class FakePrompt():
+    # Answers the yes or no questions in turn, and keeps what was printed.
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.printed = []
+
+    def println(self, *args):
+        self.printed.append(" ".join(str(arg) for arg in args))
+
+    def prompt_for_yes_or_no(self, question):
+        self.printed.append(question)
+        return self.answers.pop(0)
+
+    def clear(self):
+        pass
+
+def makeProcessor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    processor = Processor(Library([makeEntry(key) for key in "abc"]))
+    processor.compact()
+    return processor
+
+def editFile(edit):
+    with open("bibliography.bib") as f:
+        text = f.read()
+    with open("bibliography.bib", "w") as f:
+        f.write(edit(text))
+
+def fileTitles():
+    return {entry.key: entry["title"].strip("{}") for entry in parse_file("bibliography.bib").entries}
+
+def test_remove_edited_entry(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    b = processor.library.entries[1]
+    editFile(lambda text: text.replace("Title of b", "Edited title"))
+    pu = FakePrompt(True)
+    assert not removeEntry(pu, processor, b)
+    assert "Changed or removed in the .bib file outside citeman" in pu.printed[0]
+    assert fileTitles()["b"] == "Edited title"
+
+    editFile(lambda text: text.replace("Edited title", "Edited again"))
+    assert removeEntry(FakePrompt(False), processor, processor.library.entries[1])
+    assert list(fileTitles()) == ["a", "c"]
+
+def test_remove_entry_removed_outside(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    b = processor.library.entries[1]
+    editFile(lambda text: text.replace("@article{b,", "@article{z,"))
+    assert removeEntry(FakePrompt(), processor, b)
+    assert list(fileTitles()) == ["a", "z", "c"]
+
+def test_add_key_added_outside(tmp_path, monkeypatch):
+    processor = makeProcessor(tmp_path, monkeypatch)
+    editFile(lambda text: text + "\n@article{d, title={Added outside}, author={Roe, Rick}, year={2020}}\n")
+    assert not addEntry(FakePrompt(True), processor, makeEntry("d", "Queried"))
+    assert fileTitles()["d"] == "Added outside"
+    assert addEntry(FakePrompt(False), processor, makeEntry("d", "Queried"))
+    assert fileTitles()["d"] == "Queried"
+    assert [entry.key for entry in processor.library.entries] == ["a", "b", "c", "d"]
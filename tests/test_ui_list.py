@@ -0,0 +1,51 @@
+from consolemenu import SelectionMenu
+from citeman.ui_list import NEXT, PREVIOUS, JUMP, RefreshingMenu, pageCount, selectPaged
+
+def choose(monkeypatch, choice, shown):
+    def get_selection(strings, title=None, subtitle=None):
+        shown.append(strings)
+        return choice(strings)
+    monkeypatch.setattr(SelectionMenu, 'get_selection', get_selection)
+
+def test_selectPaged_renders_only_page(monkeypatch):
+    items = list(range(50000))
+    rendered = []
+    def render(page):
+        rendered.extend(page)
+        return [str(item) for item in page]
+    shown = []
+    choose(monkeypatch, lambda strings: 3, shown)
+    assert selectPaged(items, render, "Title", page=2, pageSize=20) == (43, 2)
+    assert rendered == list(range(40, 60))
+    assert shown[0][20:] == [NEXT, PREVIOUS, JUMP]
+
+def test_selectPaged_navigation(monkeypatch):
+    items = list(range(45))
+    render = lambda page: [str(item) for item in page]
+    shown = []
+    choose(monkeypatch, lambda strings: strings.index(NEXT), shown)
+    assert selectPaged(items, render, "Title", page=0) == (None, 1)
+    choose(monkeypatch, lambda strings: strings.index(PREVIOUS), shown)
+    assert selectPaged(items, render, "Title", page=2) == (None, 1)
+    # The exit option follows the navigation options.
+    choose(monkeypatch, lambda strings: len(strings), shown)
+    assert selectPaged(items, render, "Title", page=9) == (None, None)
+    assert shown[-1] == ['40', '41', '42', '43', '44', PREVIOUS, JUMP]
+    assert pageCount(0) == 1 and pageCount(40) == 2 and pageCount(41) == 3
+
+def test_selectPaged_refresh(monkeypatch):
+    items = ["a", "b"]
+    drawn = []
+    def redraw(menu, strings, subtitle=None):
+        drawn.append(strings)
+        menu.selected_option = 1
+        menu.should_exit = True
+        return True
+    monkeypatch.setattr(RefreshingMenu, 'start', lambda menu: None)
+    monkeypatch.setattr(RefreshingMenu, 'join', lambda menu: None)
+    monkeypatch.setattr(RefreshingMenu, 'redraw', redraw)
+    # Nothing changed, then a list too long for the page, then one that fits it.
+    updates = iter([None, ["a", "b", "c"], ["a", "c"]])
+    render = lambda page: [item.upper() for item in page]
+    assert selectPaged(items, render, "Title", refresh=lambda timeout: next(updates)) == (1, 0)
+    assert drawn == [["A", "C"]] and items == ["a", "c"]
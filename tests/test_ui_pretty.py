@@ -0,0 +1,34 @@
+from conftest import makeEntry
+from bibtexparser.library import Library
+from citeman.processor import Processor
+from citeman.rendercache import RenderCache
+from citeman.ui_pretty import prettyPrintBlockShort
+
+def test_renderCache():
+    renders = []
+    def render(block):
+        renders.append(block.key)
+        return prettyPrintBlockShort(block)
+    cache = RenderCache()
+    a, b = makeEntry("a", "A study"), makeEntry("b", "B study")
+    assert cache.getAll([a, b], render) == cache.getAll([a, b], render)
+    assert renders == ["a", "b"]
+    # An entry whose text changed is rendered again.
+    a._raw = a.raw.replace("A study", "A new study")
+    cache.get(a, render)
+    assert renders == ["a", "b", "a"]
+    assert cache.stats() == {'hits': 2, 'misses': 3, 'hitRate': 0.4, 'size': 2}
+
+def test_processor_invalidates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    a, b = makeEntry("a", "A study"), makeEntry("b", "B study")
+    processor = Processor(Library([a, b]))
+    cache = processor.renderCache
+    cache.getAll(processor.entries, prettyPrintBlockShort)
+    processor.updateField(a, 'title', "Another study")
+    assert "Another study" in cache.get(a, prettyPrintBlockShort)
+    processor.updateKey(b, "c")
+    assert len(cache) == 1
+    processor.remove(a)
+    assert len(cache) == 0
+    assert cache.misses == 3 and cache.hits == 0
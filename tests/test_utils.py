@@ -1,4 +1,4 @@
-from citeman.utils import removeBraces, removeAt
+from citeman.utils import removeBraces, removeAt, normalizeId
 
 def test_removeBraces():
     assert removeBraces("{Hello}") == "Hello"
@@ -15,4 +15,10 @@ def test_removeAt():
     assert removeAt("@") == ""
     assert removeAt("@@") == ""
     assert removeAt("@@Hello@") == "Hello@"
-    assert removeAt("@@Hell@o@@") == "Hell@o@@"
\ No newline at end of file
+    assert removeAt("@@Hell@o@@") == "Hell@o@@"
+
+def test_normalizeId():
+    assert normalizeId("DOI", "{10.1371/JOURNAL.pone.0173664}") == "10.1371/journal.pone.0173664"
+    assert normalizeId("DOI", "https://doi.org/10.1371/journal.pone.0173664") == "10.1371/journal.pone.0173664"
+    assert normalizeId("DOI", "doi: 10.1371/journal.pone.0173664") == "10.1371/journal.pone.0173664"
+    assert normalizeId("PMID", " {28301498} ") == "28301498"
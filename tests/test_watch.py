@@ -0,0 +1,16 @@
+from citeman.watch import sameText, scanEntries
+
+def test_scanEntries():
+    text = "@article{a,\n\ttitle = {A {B}}\n}\n\n@book{ b , title = {C}}\n"
+    assert scanEntries(text) == [("a", "@article{a,\n\ttitle = {A {B}}\n}"), ("b", "@book{ b , title = {C}}")]
+    assert scanEntries("") == []
+
+def test_scanEntries_unsupported():
+    assert scanEntries("% comment\n@article{a, title={A}}") is None
+    assert scanEntries("@string{s = {x}}\n@article{a, title={A}}") is None
+    assert scanEntries("@article{a, title={A}}\n@article{a, title={B}}") is None
+    assert scanEntries("@article{a, title={A}") is None
+
+def test_sameText():
+    assert sameText("@article{a, title={A}}\n", "@article{a, title={A}}")
+    assert not sameText("@article{a, title={A}}\n", "@article{a, title={B}}")
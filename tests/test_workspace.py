@@ -0,0 +1,48 @@
+from conftest import makeEntry
+from bibtexparser.entrypoint import parse_file
+from types import SimpleNamespace
+from citeman.errors import KeyExistsError
+from citeman.prepare import prepare_workspace
+import pytest
+
+def fileKeys(bib):
+    return [entry.key for entry in parse_file(bib).entries]
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for bib, keys in (("chapter.bib", "ab"), ("lab.bib", "cd")):
+        with open(bib, "w") as f:
+            f.write("\n\n".join(f"@article{{{key}, title={{Title of {key}}}, author={{Doe, Jane}}, "
+                                f"year={{2017}}, DOI={{10.1000/{key}}}}}" for key in keys))
+    # Two processes, as neither file has a snapshot yet.
+    return prepare_workspace(["chapter.bib", "lab.bib"], jobs=2)
+
+def test_workspace_loads_every_file(workspace):
+    assert [entry.key for entry in workspace.entries] == ["a", "b", "c", "d"]
+    assert [entry.key for entry in workspace.processor("lab.bib").library.entries] == ["c", "d"]
+    assert workspace.owner(workspace.entries[2]) is workspace.processors[1]
+    assert [entry.key for entry in workspace.search("title c")] == ["c"]
+
+def test_workspace_checks_collisions_across_files(workspace):
+    with pytest.raises(KeyExistsError):
+        workspace.add(makeEntry("c"))
+    with pytest.raises(KeyExistsError):
+        workspace.updateKey(workspace.entries[0], "d")
+    assert workspace.idExists(SimpleNamespace(type="DOI", id="10.1000/d", block=None))
+    assert fileKeys("chapter.bib") == ["a", "b"]
+
+def test_workspace_writes_the_owning_file(workspace):
+    workspace.add(makeEntry("e"), "lab.bib")
+    workspace.remove(workspace.entries[0])
+    assert fileKeys("chapter.bib") == ["b"]
+    assert fileKeys("lab.bib") == ["c", "d", "e"]
+    with pytest.raises(KeyExistsError):
+        workspace.add(makeEntry("e"))
+
+def test_workspace_compact(workspace, monkeypatch):
+    compactions = []
+    monkeypatch.setattr(workspace.history, "compact", lambda: compactions.append(1))
+    workspace.compact()
+    assert len(compactions) == 1
+    assert fileKeys("chapter.bib") == ["a", "b"] and fileKeys("lab.bib") == ["c", "d"]